@@ -0,0 +1,74 @@
+"""Сравнение поштучного создания комнат (handle_create_room) и пакетного (handle_bulk_create_rooms).
+
+Запуск: python benchmarks/bulk_rooms.py --sizes 1000 10000
+Нужна БД из DATABASE_URL; созданные адреса и комнаты удаляются после замера.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, select
+
+from src.app.modules.messages.application.schemas import RoomCreate
+from src.app.modules.messages.application.services.feedback_service import handle_create_room, handle_bulk_create_rooms
+from src.app.modules.messages.infrastructure.db.models import Location, Room
+from src.app.modules.messages.infrastructure.db.repos import LocationRepo, RoomRepo
+from src.app.modules.messages.infrastructure.db.session import SessionLocal
+
+
+def make_items(size: int, prefix: str, locations: int = 10) -> list[RoomCreate]:
+    return [
+        RoomCreate(address=f"{prefix} корпус {i % locations}", name=f"Аудитория {i}", tg_group_id=-1000000000000 - i)
+        for i in range(size)
+    ]
+
+
+def cleanup(prefix: str):
+    with SessionLocal() as db:
+        location_ids = select(Location.id).where(Location.address.like(f"{prefix}%")).scalar_subquery()
+        db.execute(delete(Room).where(Room.location_id.in_(location_ids)))
+        db.execute(delete(Location).where(Location.address.like(f"{prefix}%")))
+        db.commit()
+
+
+def bench_per_room(items: list[RoomCreate]) -> float:
+    with SessionLocal() as db:
+        location_repo, room_repo = LocationRepo(db), RoomRepo(db)
+        start = time.perf_counter()
+        for item in items:
+            handle_create_room(item.address, item.name, item.tg_group_id, location_repo, room_repo)
+        return time.perf_counter() - start
+
+
+def bench_bulk(items: list[RoomCreate]) -> float:
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        handle_bulk_create_rooms(items, LocationRepo(db), RoomRepo(db))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for mode, bench in (("per_room", bench_per_room), ("bulk", bench_bulk)):
+            prefix = f"bench-{uuid.uuid4().hex[:8]}"
+            try:
+                elapsed = bench(make_items(size, prefix))
+            finally:
+                cleanup(prefix)
+            results.append({"mode": mode, "rooms": size, "seconds": round(elapsed, 4),
+                            "rooms_per_second": round(size / elapsed, 1)})
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Холодный старт воркера API: время импорта main, запуск lifespan и первый ответ.
+
+Запуск: python benchmarks/cold_start.py --repeat 10 --top 15
+Каждый замер — в отдельном процессе интерпретатора, как у нового воркера при масштабировании:
+- import — только `import main` (без DATABASE_URL тоже должен проходить);
+- first_request — import, startup через lifespan и первый запрос к БД (GET /feedback/admin/locations);
+- uvicorn — от запуска процесса uvicorn до первого 200 на /metrics.
+Для first_request и uvicorn нужна БД из DATABASE_URL. --top выводит самые дорогие модули по -X importtime.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IMPORT_ONLY = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+FIRST_REQUEST = """
+import time
+start = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+imported = time.perf_counter()
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    response = client.get("/feedback/admin/locations")
+    assert response.status_code == 200, response.text
+    answered = time.perf_counter()
+print(imported - start, started - imported, answered - started, answered - start)
+"""
+
+
+def run_python(code: str, env: dict) -> list[float]:
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return [float(value) for value in output.split()]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def uvicorn_ready(env: dict, timeout: float = 30) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("uvicorn did not become ready")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summary(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(samples[0] * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+
+def import_profile(env: dict, top: int) -> list[dict]:
+    # Строки -X importtime: "import time: self | cumulative | module"
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, env=env, check=True,
+        capture_output=True, text=True,
+    ).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if parts[0].isdigit():
+            modules[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+    # Пакеты верхнего уровня и модули проекта; вложенные модули библиотек уже учтены в cumulative
+    rows = [
+        {"module": name, "self_ms": round(own / 1000, 1), "cumulative_ms": round(total / 1000, 1)}
+        for name, (own, total) in modules.items() if "." not in name or name.startswith("src.")
+    ]
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--skip-db", action="store_true", help="только import, без first_request и uvicorn")
+    args = parser.parse_args()
+
+    # Фоновые задачи и лимиты не участвуют в замере
+    env = dict(os.environ, OUTBOX_DISPATCHER_ENABLED="0", FEEDBACK_RATE_LIMIT_ENABLED="0", BOT_MODE="polling")
+    no_db_env = {key: value for key, value in env.items() if key not in ("DATABASE_URL", "ASYNC_DATABASE_URL")}
+
+    results = {"import": summary([run_python(IMPORT_ONLY, env)[0] for _ in range(args.repeat)])}
+    try:
+        run_python(IMPORT_ONLY, no_db_env)
+        results["import_without_database_url"] = "ok"
+    except subprocess.CalledProcessError as e:
+        results["import_without_database_url"] = e.stderr.strip().splitlines()[-1]
+
+    if not args.skip_db:
+        phases = [run_python(FIRST_REQUEST, env) for _ in range(args.repeat)]
+        results["first_request"] = {
+            name: summary([sample[index] for sample in phases])
+            for index, name in enumerate(("import", "startup", "first_query", "total"))
+        }
+        results["uvicorn_ready"] = summary([uvicorn_ready(env) for _ in range(args.repeat)])
+
+    results["import_profile"] = import_profile(env, args.top)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Нагрузочный бенчмарк POST /feedback/{token} и GET /feedback/room/{token}.
+
+Запуск:
+    python benchmarks/feedback_endpoints.py run --rooms 1000 --concurrency 1 8 32 128 --output head.json
+    python benchmarks/feedback_endpoints.py compare base.json head.json
+
+Приложение поднимается локальным uvicorn в этом же процессе, нагрузку даёт aiohttp. Нужна БД из
+DATABASE_URL с применёнными миграциями. Telegram заглушен: диспетчер outbox выключен, записи outbox
+и засеянные данные удаляются после прогона. Результат — JSON для сравнения между коммитами.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("OUTBOX_DISPATCHER_ENABLED", "0")
+# Нагрузка идёт с одного IP одинаковым текстом — лимиты и дедупликация исказили бы замер
+os.environ.setdefault("FEEDBACK_RATE_LIMIT_ENABLED", "0")
+os.environ.setdefault("FEEDBACK_DEDUP_WINDOW", "0")
+
+import aiohttp
+import uvicorn
+
+PORT = int(os.getenv("BENCH_PORT", "8765"))
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def seed(prefix: str, rooms: int, locations: int) -> tuple[list[str], int]:
+    from src.app.modules.messages.application.schemas import RoomCreate
+    from src.app.modules.messages.application.services.feedback_service import handle_bulk_create_rooms
+    from src.app.modules.messages.infrastructure.db.repos import LocationRepo, RoomRepo
+    from src.app.modules.messages.infrastructure.db.session import SessionLocal
+
+    chat_id = -random.randint(10 ** 12, 2 * 10 ** 12)
+    items = [
+        RoomCreate(address=f"{prefix} {i % locations}", name=f"room {i}", tg_group_id=chat_id)
+        for i in range(rooms)
+    ]
+    with SessionLocal() as db:
+        created = handle_bulk_create_rooms(items, LocationRepo(db), RoomRepo(db))
+    return [room["qr_token"] for room in created], chat_id
+
+
+def cleanup(prefix: str, chat_id: int):
+    from sqlalchemy import delete, select
+
+    from src.app.modules.messages.infrastructure.db.models import Location, Room, TelegramOutbox
+    from src.app.modules.messages.infrastructure.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        location_ids = select(Location.id).where(Location.address.like(f"{prefix} %")).scalar_subquery()
+        db.execute(delete(Room).where(Room.location_id.in_(location_ids)))
+        db.execute(delete(Location).where(Location.address.like(f"{prefix} %")))
+        db.execute(delete(TelegramOutbox).where(TelegramOutbox.chat_id == chat_id))
+        db.commit()
+
+
+async def drive(session: aiohttp.ClientSession, endpoint: str, tokens: list[str], concurrency: int,
+                requests: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            token = random.choice(tokens)
+            start = time.perf_counter()
+            try:
+                if endpoint == "send_feedback":
+                    request = session.post(f"{BASE_URL}/feedback/{token}", json={"text": "benchmark"})
+                else:
+                    request = session.get(f"{BASE_URL}/feedback/room/{token}")
+                async with request as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    from main import app
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    tokens, chat_id = seed(prefix, args.rooms, args.locations)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    results = []
+    try:
+        connector = aiohttp.TCPConnector(limit=max(args.concurrency))
+        async with aiohttp.ClientSession(connector=connector) as session:
+            # Прогрев: пул соединений, кэши, JIT планов запросов
+            await drive(session, "get_room_info", tokens, 8, min(len(tokens), 500))
+            for concurrency in args.concurrency:
+                for endpoint in args.endpoints:
+                    results.append(await drive(session, endpoint, tokens, concurrency, args.requests))
+    finally:
+        server.should_exit = True
+        await server_task
+        cleanup(prefix, chat_id)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "rooms": args.rooms,
+            "locations": args.locations,
+            "requests_per_step": args.requests,
+            "db_backend": os.getenv("DB_BACKEND", "sync"),
+            "cache_backend": os.getenv("CACHE_BACKEND", "memory"),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(args.head) as f:
+        head = json.load(f)["results"]
+    rows = []
+    for result in head:
+        before = base.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        rows.append({
+            "endpoint": result["endpoint"],
+            "concurrency": result["concurrency"],
+            **{
+                f"{metric}_change_pct": round((result[metric] - before[metric]) / before[metric] * 100, 1)
+                for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+                if before[metric]
+            },
+        })
+    print(json.dumps(rows, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--rooms", type=int, default=1000)
+    run_parser.add_argument("--locations", type=int, default=20)
+    run_parser.add_argument("--requests", type=int, default=2000)
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    run_parser.add_argument("--endpoints", nargs="+", default=["get_room_info", "send_feedback"],
+                            choices=["get_room_info", "send_feedback"])
+    run_parser.add_argument("--output")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Пропускная способность и задержки FSM-хранилищ бота при одновременных сессиях администраторов.
+
+Запуск: python benchmarks/fsm_storage.py --backends memory redis postgres --sessions 200
+Каждая сессия проходит сценарий /create → помещение (как в bot.py): 5 шагов, на каждом
+чтение состояния, запись состояния и данных. Для redis нужен REDIS_URL, для postgres — DATABASE_URL
+и применённые миграции.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiogram.fsm.storage.base import StorageKey
+
+from src.bot.storage import create_storage
+
+BOT_ID = 1
+STEPS = ["choosing_action", "choosing_address", "entering_room_name", "entering_group_id", None]
+
+
+async def session(storage, user_id: int, latencies: list[float]):
+    key = StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+    for step, state in enumerate(STEPS):
+        start = time.perf_counter()
+        await storage.get_state(key)
+        data = await storage.get_data(key)
+        await storage.set_state(key, f"CreateState:{state}" if state else None)
+        await storage.set_data(key, {**data, f"step{step}": "x" * 32} if state else {})
+        latencies.append(time.perf_counter() - start)
+
+
+async def bench(kind: str, sessions: int, ttl: int) -> dict:
+    storage = create_storage(kind, ttl=ttl, redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    latencies: list[float] = []
+    base = 10 ** 9 + int(time.time())
+    start = time.perf_counter()
+    await asyncio.gather(*(session(storage, base + i, latencies) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "backend": kind,
+        "sessions": sessions,
+        "steps_per_second": round(len(latencies) / elapsed, 1),
+        "step_p50_ms": round(quantiles[49] * 1000, 3),
+        "step_p95_ms": round(quantiles[94] * 1000, 3),
+        "step_p99_ms": round(quantiles[98] * 1000, 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["memory", "redis", "postgres"])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--ttl", type=int, default=3600)
+    args = parser.parse_args()
+    results = [await bench(kind, args.sessions, args.ttl) for kind in args.backends]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""Полнотекстовый поиск по отзывам против ILIKE на синтетическом корпусе.
+
+Запуск: python benchmarks/search.py --messages 2000000 --repeat 20
+Нужна БД из DATABASE_URL с применёнными миграциями. Корпус генерируется на стороне Postgres
+(generate_series) из словаря жалоб в разных словоформах; комнаты, сообщения и агрегаты удаляются
+после замера. Для каждого запроса — p50/p95 первой страницы: FTS по рангу, FTS по времени и ILIKE.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, select, text
+
+from src.app.modules.messages.application.schemas import RoomCreate
+from src.app.modules.messages.application.services.feedback_service import handle_bulk_create_rooms
+from src.app.modules.messages.infrastructure.db.models import Location, Message, Room
+from src.app.modules.messages.infrastructure.db.repos import LocationRepo, MessageRepo, RoomRepo
+from src.app.modules.messages.infrastructure.db.session import SessionLocal
+
+WORDS = [
+    "кондиционер", "кондиционера", "кондиционеры", "протечка", "протечки", "течёт", "вода", "кран",
+    "холодно", "жарко", "душно", "шумно", "грязно", "мусор", "запах", "свет", "лампа", "мигает",
+    "розетка", "дверь", "сломана", "сломан", "окно", "не", "работает", "очень", "в", "аудитории",
+    "туалете", "коридоре", "проектор", "доска", "стул", "парта", "отопление", "батарея", "wifi",
+    "projector", "broken", "please", "fix", "спасибо", "срочно", "опять", "снова", "уже", "неделю",
+]
+QUERIES = [
+    ("кондиционер", "%кондиционер%"),
+    ("протечка воды", "%протечк%вод%"),
+    ("не работает wifi", "%wifi%"),
+    ('"сломана дверь"', "%сломана дверь%"),
+]
+SEED_CHUNK = 200_000
+
+
+def seed(prefix: str, rooms: int, locations: int, messages: int) -> list[int]:
+    items = [RoomCreate(address=f"{prefix} {i % locations}", name=f"room {i}", tg_group_id=-1) for i in range(rooms)]
+    with SessionLocal() as db:
+        handle_bulk_create_rooms(items, LocationRepo(db), RoomRepo(db))
+        room_ids = list(db.scalars(
+            select(Room.id).join(Location, Room.location_id == Location.id).where(Location.address.like(f"{prefix} %"))
+        ))
+        location_ids = list(db.scalars(select(Location.id).where(Location.address.like(f"{prefix} %"))))
+        for start in range(0, messages, SEED_CHUNK):
+            # Длина зависит от g — подзапрос коррелированный, и текст генерируется для каждой строки заново
+            db.execute(text("""
+                INSERT INTO messages (room_id, text, timestamp)
+                SELECT (CAST(:room_ids AS int[]))[1 + g % :rooms],
+                       (SELECT string_agg((CAST(:words AS text[]))[1 + floor(random() * :vocabulary)::int], ' ')
+                        FROM generate_series(1, 6 + g % 10)),
+                       now() - random() * interval '25 days'
+                FROM generate_series(:start, :end) AS g
+            """), {"room_ids": room_ids, "rooms": len(room_ids), "words": WORDS, "vocabulary": len(WORDS),
+                   "start": start, "end": min(start + SEED_CHUNK, messages) - 1})
+            db.commit()
+            print(f"seeded {min(start + SEED_CHUNK, messages)}/{messages}", file=sys.stderr)
+        db.execute(text("ANALYZE messages"))
+        db.commit()
+    return location_ids
+
+
+def cleanup(prefix: str):
+    # Сообщения и агрегаты удаляются каскадом вместе с комнатами
+    with SessionLocal() as db:
+        location_ids = select(Location.id).where(Location.address.like(f"{prefix} %")).scalar_subquery()
+        db.execute(delete(Room).where(Room.location_id.in_(location_ids)))
+        db.execute(delete(Location).where(Location.address.like(f"{prefix} %")))
+        db.commit()
+
+
+def ilike_page(db, pattern: str, limit: int, location_id: int | None):
+    stmt = select(Message.id, Room.name, Message.text, Message.timestamp).join(Room, Message.room_id == Room.id)
+    stmt = stmt.where(Message.text.ilike(pattern))
+    if location_id is not None:
+        stmt = stmt.where(Room.location_id == location_id)
+    return db.execute(stmt.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit)).all()
+
+
+def measure(run, repeat: int) -> dict:
+    latencies = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(run())
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "rows": rows,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2_000_000)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    results = []
+    try:
+        location_ids = seed(prefix, args.rooms, args.locations, args.messages)
+        with SessionLocal() as db:
+            repo = MessageRepo(db)
+            for query, pattern in QUERIES:
+                for scope, location_id in (("all", None), ("location", location_ids[0])):
+                    modes = {
+                        "fts_rank": lambda: repo.search(query, args.limit, order="rank", location_id=location_id),
+                        "fts_recent": lambda: repo.search(query, args.limit, order="recent", location_id=location_id),
+                        "ilike": lambda: ilike_page(db, pattern, args.limit, location_id),
+                    }
+                    for mode, run in modes.items():
+                        run()
+                        results.append({"query": query, "scope": scope, "mode": mode, **measure(run, args.repeat)})
+    finally:
+        cleanup(prefix)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
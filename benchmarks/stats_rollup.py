@@ -0,0 +1,95 @@
+"""Сравнение статистики из агрегатов с GROUP BY по сырой таблице messages.
+
+Запуск: python benchmarks/stats_rollup.py --messages 10000000
+Данные засеваются в транзакции, которая откатывается в конце.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.app.modules.messages.infrastructure.db.repos import StatsRepo
+from src.app.modules.messages.infrastructure.db.session import get_engine
+
+RAW_LOCATIONS_QUERY = text("""
+    SELECT l.address, count(*)
+    FROM messages m JOIN rooms r ON r.id = m.room_id JOIN locations l ON l.id = r.location_id
+    WHERE m.timestamp >= :since
+    GROUP BY l.address
+""")
+
+
+def timed(fn, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(samples) * 1000, 2), "max_ms": round(max(samples) * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--rooms-per-location", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    prefix = f"stats-{uuid.uuid4().hex[:8]}"
+    with get_engine().connect() as conn:
+        trans = conn.begin()
+        try:
+            conn.execute(text("""
+                INSERT INTO locations (address) SELECT :prefix || ' ' || g FROM generate_series(1, :n) g
+            """), {"prefix": prefix, "n": args.locations})
+            conn.execute(text("""
+                INSERT INTO rooms (location_id, name, tg_group_id, qr_token)
+                SELECT l.id, 'room ' || g, -1000000000000, :prefix || '-' || l.id || '-' || g
+                FROM locations l, generate_series(1, :n) g WHERE l.address LIKE :prefix || ' %'
+            """), {"prefix": prefix, "n": args.rooms_per_location})
+            room_ids = [row[0] for row in conn.execute(
+                text("SELECT id FROM rooms WHERE qr_token LIKE :prefix || '-%'"), {"prefix": prefix})]
+            seed_start = time.perf_counter()
+            conn.execute(text("""
+                INSERT INTO messages (room_id, text, timestamp)
+                SELECT (:room_ids)[1 + (g % cardinality(:room_ids))], 'seed',
+                       now() - (random() * :days) * interval '1 day'
+                FROM generate_series(1, :n) g
+            """), {"room_ids": room_ids, "n": args.messages, "days": args.days})
+            seed_seconds = time.perf_counter() - seed_start
+            conn.execute(text("ANALYZE messages"))
+
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            repo = StatsRepo(db)
+            now = datetime.now(timezone.utc)
+            backfill_start = time.perf_counter()
+            repo.recompute(now - timedelta(days=args.days + 1), now + timedelta(days=1))
+            backfill_seconds = time.perf_counter() - backfill_start
+
+            since = now - timedelta(days=30)
+            result = {
+                "messages": args.messages,
+                "seed_seconds": round(seed_seconds, 2),
+                "backfill_seconds": round(backfill_seconds, 2),
+                "raw_group_by": timed(lambda: conn.execute(RAW_LOCATIONS_QUERY, {"since": since}).all(), args.repeats),
+                "rollup_daily": timed(lambda: repo.locations_totals("day", since), args.repeats),
+                "rollup_hourly": timed(lambda: repo.locations_totals("hour", since), args.repeats),
+            }
+            print(json.dumps(result, indent=2))
+        finally:
+            trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Нагрузочный тест диспетчера outbox против локального фейкового Telegram, отвечающего 429.
+
+Запуск: python benchmarks/telegram_load.py --entries 2000 --chats 5
+Фейковый сервер пропускает не больше --server-per-minute сообщений в минуту на чат, остальным
+отвечает 429 с retry_after. Нужна БД из DATABASE_URL; созданные записи outbox удаляются.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+FAKE_PORT = int(os.getenv("FAKE_TELEGRAM_PORT", "8081"))
+os.environ["TELEGRAM_API_BASE"] = f"http://127.0.0.1:{FAKE_PORT}"
+
+
+class FakeTelegram:
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.sent: dict[int, deque] = defaultdict(deque)
+        self.requests = 0
+        self.rejected = 0
+        self.delivered = 0
+
+    async def send_message(self, request: web.Request):
+        self.requests += 1
+        data = await request.post()
+        chat_id = int(data["chat_id"])
+        now = time.monotonic()
+        window = self.sent[chat_id]
+        while window and now - window[0] > 60:
+            window.popleft()
+        if len(window) >= self.per_minute:
+            self.rejected += 1
+            retry_after = int(60 - (now - window[0])) + 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }, status=429)
+        window.append(now)
+        self.delivered += 1
+        return web.json_response({"ok": True, "result": {"message_id": self.delivered}})
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--server-per-minute", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    from sqlalchemy import delete, func, select
+
+    from src.app.modules.messages.infrastructure.db.models import TelegramOutbox
+    from src.app.modules.messages.infrastructure.db.repos import OutboxRepo
+    from src.app.modules.messages.infrastructure.db.session import SessionLocal
+    from src.app.modules.messages.infrastructure.telegram import OutboxDispatcher
+
+    fake = FakeTelegram(args.server_per_minute)
+    app = web.Application()
+    app.router.add_post("/{bot}/sendMessage", fake.send_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", FAKE_PORT).start()
+
+    base = -random.randint(10 ** 12, 2 * 10 ** 12)
+    chats = [base - i for i in range(args.chats)]
+    with SessionLocal() as db:
+        repo = OutboxRepo(db)
+        for i in range(args.entries):
+            repo.add(chats[i % len(chats)], f"Сообщение #{i}")
+        db.commit()
+
+    def pending() -> int:
+        with SessionLocal() as db:
+            return db.execute(
+                select(func.count()).select_from(TelegramOutbox)
+                .where(TelegramOutbox.chat_id.in_(chats), TelegramOutbox.status == "pending")
+            ).scalar()
+
+    dispatcher = OutboxDispatcher(poll_interval=0.2)
+    start = time.perf_counter()
+    dispatcher.start()
+    try:
+        while time.perf_counter() - start < args.timeout and await asyncio.to_thread(pending):
+            await asyncio.sleep(0.5)
+    finally:
+        elapsed = time.perf_counter() - start
+        await dispatcher.stop()
+        await runner.cleanup()
+        left = pending()
+        with SessionLocal() as db:
+            db.execute(delete(TelegramOutbox).where(TelegramOutbox.chat_id.in_(chats)))
+            db.commit()
+
+    print(json.dumps({
+        "entries": args.entries,
+        "chats": args.chats,
+        "seconds": round(elapsed, 2),
+        "pending_left": left,
+        "telegram_requests": fake.requests,
+        "telegram_429": fake.rejected,
+        "telegram_messages": fake.delivered,
+        "digests": dispatcher.digests_sent,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Пропускная способность вставки отзывов: commit на каждый запрос против буфера пакетной записи.
+
+Запуск: python benchmarks/write_buffer.py --messages 20000 --concurrency 8 64 256
+Нужна БД из DATABASE_URL с применёнными миграциями. per_request — MessageRepo.create в пуле потоков,
+как в sync-обработчике; buffered — FeedbackWriteBuffer с ожиданием commit пачки. Комнаты, сообщения
+и записи outbox удаляются после замера.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, select
+
+from src.app.modules.messages.application.schemas import RoomCreate
+from src.app.modules.messages.application.services.feedback_service import handle_bulk_create_rooms
+from src.app.modules.messages.infrastructure.db.models import Location, Room, TelegramOutbox
+from src.app.modules.messages.infrastructure.db.repos import LocationRepo, MessageRepo, RoomRepo, PendingMessage
+from src.app.modules.messages.infrastructure.db.session import SessionLocal
+from src.app.modules.messages.infrastructure.db.write_buffer import FeedbackWriteBuffer
+
+
+def seed(prefix: str, rooms: int) -> tuple[list[int], int]:
+    chat_id = -random.randint(10 ** 12, 2 * 10 ** 12)
+    items = [RoomCreate(address=f"{prefix} {i % 10}", name=f"room {i}", tg_group_id=chat_id) for i in range(rooms)]
+    with SessionLocal() as db:
+        handle_bulk_create_rooms(items, LocationRepo(db), RoomRepo(db))
+        room_ids = db.scalars(
+            select(Room.id).join(Location, Room.location_id == Location.id).where(Location.address.like(f"{prefix} %"))
+        ).all()
+    return list(room_ids), chat_id
+
+
+def cleanup(prefix: str, chat_id: int):
+    # Сообщения и счётчики статистики удаляются каскадом вместе с комнатами
+    with SessionLocal() as db:
+        location_ids = select(Location.id).where(Location.address.like(f"{prefix} %")).scalar_subquery()
+        db.execute(delete(Room).where(Room.location_id.in_(location_ids)))
+        db.execute(delete(Location).where(Location.address.like(f"{prefix} %")))
+        db.execute(delete(TelegramOutbox).where(TelegramOutbox.chat_id == chat_id))
+        db.commit()
+
+
+def make_items(room_ids: list[int], chat_id: int, count: int) -> list[PendingMessage]:
+    return [PendingMessage(random.choice(room_ids), f"benchmark {i}", chat_id, f"benchmark {i}") for i in range(count)]
+
+
+def bench_per_request(items: list[PendingMessage], concurrency: int) -> float:
+    def create(item: PendingMessage):
+        with SessionLocal() as db:
+            MessageRepo(db).create(item.room_id, item.text, item.notify_chat_id, item.notify_text)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(create, items))
+        return time.perf_counter() - start
+
+
+async def bench_buffered(items: list[PendingMessage], concurrency: int, flush_rows: int,
+                         flush_interval_ms: float) -> tuple[float, int]:
+    buffer = FeedbackWriteBuffer(flush_rows=flush_rows, flush_interval=flush_interval_ms / 1000, wait_commit=True)
+    buffer.start()
+    queue = list(items)
+
+    async def client():
+        while queue:
+            await buffer.submit(queue.pop())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await buffer.stop()
+    return elapsed, buffer.batches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 64, 256])
+    parser.add_argument("--flush-rows", type=int, default=500)
+    parser.add_argument("--flush-interval-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    room_ids, chat_id = seed(prefix, args.rooms)
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            items = make_items(room_ids, chat_id, args.messages)
+            # Как у FastAPI: sync-обработчики выполняются в threadpool не более чем из 40 потоков
+            elapsed = bench_per_request(items, min(concurrency, 40))
+            results.append({"mode": "per_request", "concurrency": concurrency, "messages": len(items),
+                            "seconds": round(elapsed, 4), "rows_per_second": round(len(items) / elapsed, 1)})
+
+            items = make_items(room_ids, chat_id, args.messages)
+            elapsed, batches = asyncio.run(bench_buffered(items, concurrency, args.flush_rows, args.flush_interval_ms))
+            results.append({"mode": "buffered", "concurrency": concurrency, "messages": len(items),
+                            "seconds": round(elapsed, 4), "rows_per_second": round(len(items) / elapsed, 1),
+                            "batches": batches, "avg_batch": round(len(items) / max(batches, 1), 1)})
+    finally:
+        cleanup(prefix, chat_id)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
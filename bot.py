@@ -1,29 +1,44 @@
 import asyncio
 import logging
-import requests
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 from aiogram import Bot, Dispatcher
 from aiogram.filters import CommandStart, Command
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove, BufferedInputFile
-from io import BytesIO
-import qrcode
-from dotenv import load_dotenv
-import os
+from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 
-load_dotenv()
+from src.bot.api_client import BackendClient, BackendError
+from src.bot.admin_cache import AdminAuthCache
+from src.bot.qr import QRCache, make_executor
+from src.bot.storage import PostgresStorage, create_storage
+from src.app.settings import env, settings
 
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-API_BASE = os.getenv("API_BASE")
-FORM_URL = os.getenv("FORM_URL")
+BOT_TOKEN = settings.bot_token
+API_BASE = settings.api_base
+FORM_URL = settings.form_url
 
 if not BOT_TOKEN or not API_BASE:
     raise ValueError("Не заданы переменные окружения BOT_TOKEN или API_BASE")
 
+FSM_STORAGE = env("FSM_STORAGE", "memory")
+FSM_TTL = int(env("FSM_TTL", "3600"))
+
 bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher(storage=MemoryStorage())
+storage = create_storage(FSM_STORAGE, ttl=FSM_TTL, redis_url=env("FSM_REDIS_URL") or settings.redis_url)
+dp = Dispatcher(storage=storage)
+api = BackendClient(API_BASE, timeout=float(env("API_TIMEOUT", "10")))
+admin_cache = AdminAuthCache(
+    api.is_authorized,
+    ttl=float(env("ADMIN_CACHE_TTL", "300")),
+    negative_ttl=float(env("ADMIN_CACHE_NEGATIVE_TTL", "15")),
+    maxsize=int(env("ADMIN_CACHE_SIZE", "10000")),
+)
+qr_cache = QRCache(
+    directory=env("QR_CACHE_DIR", ".qr_cache"),
+    maxsize=int(env("QR_CACHE_SIZE", "256")),
+    executor=make_executor(env("QR_RENDER_EXECUTOR", "process"), int(env("QR_RENDER_WORKERS", "2"))),
+)
 
 logging.basicConfig(level=logging.INFO)
 
@@ -41,11 +56,8 @@ class RoomQueryState(StatesGroup):
 
 async def is_admin(user_id: int) -> bool:
     try:
-        r = requests.get(f"{API_BASE}/admin/is_authorized/{user_id}")
-        r.raise_for_status()
-        data = r.json()
-        return data.get("authorized", False)
-    except requests.exceptions.RequestException:
+        return await admin_cache.is_admin(user_id)
+    except BackendError:
         return None
 
 
@@ -63,13 +75,6 @@ def admin_required(handler):
 
     return wrapper
 
-def make_qr_bytes(link: str) -> BytesIO:
-    qr = qrcode.make(link)
-    buf = BytesIO()
-    qr.save(buf, format="PNG")
-    buf.seek(0)
-    return buf
-
 @dp.message(CommandStart())
 async def cmd_start(message: Message):
     await message.answer(
@@ -78,6 +83,8 @@ async def cmd_start(message: Message):
         "/create — создать адрес или помещение\n"
         "/rooms — список комнат по адресам\n"
         "/qr <token> — получить ссылку на форму по токену\n"
+        "/stats [адрес] — число отзывов за 7 дней\n"
+        "/search <текст> — поиск по тексту отзывов\n"
         "/cancel — отменить текущее действие\n"
         "/help — полная инструкция по использованию\n"
         "/getgroupid — узнать Telegram group id\n"
@@ -105,8 +112,7 @@ async def choose_action(message: Message, state: FSMContext):
         await message.answer("Введите новый адрес:", reply_markup=ReplyKeyboardRemove())
     elif text == "помещение":
         try:
-            r = requests.get(f"{API_BASE}/admin/locations")
-            locations = r.json()
+            locations = await api.list_locations()
             if not locations:
                 return await message.answer("Нет доступных адресов. Сначала добавьте адрес.", reply_markup=ReplyKeyboardRemove())
             buttons = [[KeyboardButton(text=addr)] for addr in locations]
@@ -123,8 +129,7 @@ async def choose_action(message: Message, state: FSMContext):
 async def add_address(message: Message, state: FSMContext):
     address = message.text
     try:
-        r = requests.post(f"{API_BASE}/admin/add_location", data={"address": address})
-        if r.status_code == 200:
+        if await api.add_location(address):
             await message.answer("✅ Адрес успешно добавлен!", reply_markup=ReplyKeyboardRemove())
         else:
             await message.answer("Ошибка при добавлении адреса.", reply_markup=ReplyKeyboardRemove())
@@ -163,27 +168,22 @@ async def enter_group_id(message: Message, state: FSMContext):
     await state.update_data(tg_group_id=group_id)
     data = await state.get_data()
     try:
-        r = requests.post(f"{API_BASE}/admin/create_room", data={
-            "address": data["address"],
-            "name": data["name"],
-            "tg_group_id": int(group_id)
-        })
-        result = r.json()
+        result = await api.create_room(data["address"], data["name"], int(group_id))
         link = result['qr_link']
-        qr_buf = make_qr_bytes(link)
-        photo = BufferedInputFile(qr_buf.getvalue(), filename="qr.png")
+        photo = await qr_cache.photo(link)
         caption = (
             f"✅ Помещение создано!\n"
             f"📍 Адрес: {data['address']}\n"
             f"📌 Название: {data['name']}\n"
             f"🔗 <a href=\"{link}\">Открыть форму</a>"
         )
-        await message.answer_photo(
+        sent = await message.answer_photo(
             photo=photo,
             caption=caption,
             parse_mode="HTML",
             reply_markup=ReplyKeyboardRemove()
         )
+        qr_cache.remember_sent(link, sent)
     except Exception as e:
         await message.answer(f"Ошибка: {e}")
     await state.clear()
@@ -192,8 +192,7 @@ async def enter_group_id(message: Message, state: FSMContext):
 @admin_required
 async def cmd_rooms(message: Message, state: FSMContext):
     try:
-        r = requests.get(f"{API_BASE}/admin/locations")
-        addresses = r.json()
+        addresses = await api.list_locations()
         if not addresses:
             return await message.answer("Нет адресов в системе.")
         buttons = [[KeyboardButton(text=addr)] for addr in addresses]
@@ -208,8 +207,7 @@ async def cmd_rooms(message: Message, state: FSMContext):
 async def show_rooms(message: Message, state: FSMContext):
     address = message.text
     try:
-        r = requests.get(f"{API_BASE}/admin/rooms/by_location", params={"address": address})
-        rooms = r.json()
+        rooms = await api.rooms_by_location(address)
         if not rooms:
             await message.answer("По этому адресу нет комнат.", reply_markup=ReplyKeyboardRemove())
         else:
@@ -217,6 +215,8 @@ async def show_rooms(message: Message, state: FSMContext):
             for room in rooms:
                 text += f"• {room['name']} — token: `{room['qr_token']}`\n"
             await message.answer(text, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
+            # Фоновая предгенерация QR для всех комнат адреса, чтобы последующие /qr отвечали сразу
+            qr_cache.prerender_in_background([f"{FORM_URL}/feedback/{room['qr_token']}" for room in rooms])
     except Exception as e:
         await message.answer(f"Ошибка: {e}", reply_markup=ReplyKeyboardRemove())
     await state.clear()
@@ -230,15 +230,13 @@ async def cmd_qr(message: Message):
     token = args[1]
 
     try:
-        r = requests.get(f"{API_BASE}/room/{token}")
-        if r.status_code == 404:
+        room = await api.room_info(token)
+        if room is None:
             return await message.answer("Токен не найден.")
 
-        room = r.json()
         link = f"{FORM_URL}/feedback/{token}"
 
-        qr_buf = make_qr_bytes(link)
-        photo = BufferedInputFile(qr_buf.getvalue(), filename="qr.png")
+        photo = await qr_cache.photo(link)
 
         caption = (
             f"📌 <b>{room['name']}</b>\n"
@@ -246,16 +244,66 @@ async def cmd_qr(message: Message):
             f"🔗 <a href=\"{link}\">Открыть форму</a>"
         )
 
-        await bot.send_photo(
+        sent = await bot.send_photo(
             chat_id=message.chat.id,
             photo=photo,
             caption=caption,
             parse_mode="HTML"
         )
+        qr_cache.remember_sent(link, sent)
 
     except Exception as e:
         await message.answer(f"Ошибка: {e}")
 
+@dp.message(Command("stats"))
+@admin_required
+async def cmd_stats(message: Message):
+    args = message.text.split(maxsplit=1)
+    address = args[1].strip() if len(args) == 2 else None
+    since = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+    try:
+        stats = await api.stats(address=address, since=since)
+    except BackendError as e:
+        return await message.answer(f"Ошибка: {e}")
+
+    if address:
+        if not stats["rooms"]:
+            return await message.answer(f"🏢 {address}\nЗа 7 дней отзывов нет.")
+        text = f"🏢 {address}\n📊 Отзывов за 7 дней: {stats['total']}\n"
+        for room in stats["rooms"]:
+            text += f"• {room['name']} — {room['count']}\n"
+    else:
+        if not stats["locations"]:
+            return await message.answer("За 7 дней отзывов нет.")
+        text = "📊 Отзывы за 7 дней:\n"
+        for location in stats["locations"]:
+            text += f"• {location['address']} — {location['count']}\n"
+    await message.answer(text)
+
+@dp.message(Command("search"))
+@admin_required
+async def cmd_search(message: Message):
+    args = message.text.split(maxsplit=1)
+    if len(args) != 2:
+        return await message.answer("Используйте: /search <текст> [| адрес]")
+    query, _, address = args[1].partition("|")
+    query, address = query.strip(), address.strip() or None
+    if len(query) < 2:
+        return await message.answer("Запрос слишком короткий.")
+    try:
+        page = await api.search(query, address=address)
+    except BackendError as e:
+        return await message.answer(f"Ошибка: {e}")
+
+    if not page["items"]:
+        return await message.answer("Ничего не найдено.")
+    text = f"🔎 {query}" + (f"\n🏢 {address}" if address else "") + "\n\n"
+    for item in page["items"]:
+        timestamp = datetime.fromisoformat(item["timestamp"]).strftime("%d.%m.%Y %H:%M")
+        snippet = item["text"] if len(item["text"]) <= 300 else item["text"][:300] + "…"
+        text += f"• {timestamp}, {item['room']}\n{snippet}\n\n"
+    await message.answer(text[:4096])
+
 @dp.message(Command("getgroupid"))
 async def cmd_getgroupid(message: Message):
     if message.chat.type in ("group", "supergroup"):
@@ -284,6 +332,8 @@ async def cmd_help(message: Message):
         "• /create — создать новый адрес или помещение (требуется доступ администратора)\n"
         "• /rooms — получить список всех комнат по выбранному адресу (админ)\n"
         "• /qr &lt;token&gt; — получить QR-код и ссылку на форму обратной связи по токену комнаты (админ)\n"
+        "• /stats [адрес] — количество отзывов за последние 7 дней по адресам или по комнатам адреса (админ)\n"
+        "• /search &lt;текст&gt; [| адрес] — поиск по тексту отзывов, самые релевантные сначала (админ)\n"
         "• /getgroupid — узнать Telegram group id\n"
         "• /cancel — отменить текущее действие и сбросить состояние бота\n\n"
         "<b>3. Как создать новый адрес?</b>\n"
@@ -317,7 +367,29 @@ async def cmd_help(message: Message):
         , parse_mode="HTML"
     )
 
+@dp.startup()
+async def on_startup():
+    # Предзагрузка списка администраторов одним запросом
+    if env("ADMIN_PREFETCH", "1") == "1":
+        try:
+            admin_cache.prime(await api.list_admins())
+        except BackendError as e:
+            logging.warning("Admin prefetch failed: %s", e)
+    if isinstance(storage, PostgresStorage):
+        # Фоновая очистка брошенных сценариев
+        dp["fsm_cleanup"] = asyncio.create_task(storage.run_cleanup(interval=min(FSM_TTL, 600)))
+
+@dp.shutdown()
+async def on_shutdown():
+    await api.close()
+    if "fsm_cleanup" in dp.workflow_data:
+        dp["fsm_cleanup"].cancel()
+    await storage.close()
+    qr_cache.executor.shutdown(wait=False, cancel_futures=True)
+
 async def main():
+    # Polling для локальной разработки; в продакшене BOT_MODE=webhook в main.py
+    await bot.delete_webhook()
     await dp.start_polling(bot)
 
 if __name__ == "__main__":
@@ -1,28 +1,77 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.requests import Request
 from fastapi.exception_handlers import RequestValidationError
 from fastapi import status
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from src.app.settings import settings
+from src.app.modules.messages.infrastructure.db.session import DB_BACKEND, db_pool_stats, dispose_engines
+from src.app.modules.messages.infrastructure.cache import get_cache, close_cache
+from src.app.modules.messages.infrastructure.rate_limit import close_rate_limiter
+from src.app.metrics import MetricsMiddleware, StatsCollector, metrics_payload
+from prometheus_client import REGISTRY
+
+# роуты: sync (threadpool) или async в зависимости от DB_BACKEND
+if DB_BACKEND == "async":
+    from src.app.modules.messages.api.async_endpoints import router
+else:
+    from src.app.modules.messages.api.endpoints import router
+from src.app.modules.messages.infrastructure.telegram import OutboxDispatcher
+from src.app.modules.messages.infrastructure.db.write_buffer import FEEDBACK_WRITE_BEHIND, feedback_buffer
+from src.app.modules.messages.infrastructure.db.stats_buffer import STATS_ROLLUP_FLUSH_INTERVAL, stats_rollup_buffer
+from src.app.modules.messages.infrastructure.db.repos.stats import STATS_ROLLUP_INLINE
+from src.app.modules.messages.api.stream import router as stream_router
+from src.app.modules.messages.infrastructure.realtime import feedback_broker
+
+# Диспетчер outbox обычно работает отдельным процессом (outbox_worker.py); OUTBOX_DISPATCHER_ENABLED=1
+# запускает его в процессе API — только при одном воркере uvicorn, иначе лимиты Telegram умножатся на число воркеров
+outbox_dispatcher = OutboxDispatcher()
+webhook = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Движок БД, кэш и HTTP-клиенты создаются лениво при первом обращении, здесь — только фоновые задачи
+    await feedback_broker.start()
+    if FEEDBACK_WRITE_BEHIND:
+        feedback_buffer.start()
+    if STATS_ROLLUP_INLINE and STATS_ROLLUP_FLUSH_INTERVAL > 0:
+        stats_rollup_buffer.start()
+    if settings.outbox_dispatcher_enabled:
+        outbox_dispatcher.start()
+    if webhook is not None:
+        await webhook.startup()
+    try:
+        yield
+    finally:
+        # Порядок важен: сначала перестаём принимать работу, затем дописываем буфер отзывов,
+        # дорассылаем outbox, который он наполнил, и только потом закрываем клиенты и пул соединений
+        if webhook is not None:
+            await webhook.shutdown()
+        await feedback_broker.stop()
+        await feedback_buffer.stop()
+        await stats_rollup_buffer.stop()
+        await outbox_dispatcher.stop(drain_timeout=settings.outbox_drain_timeout)
+        await close_cache()
+        close_rate_limiter()
+        await dispose_engines()
 
-from src.app.modules.messages.api.endpoints import router  # роуты
 
 # Инициализация FastAPI-приложения
 app = FastAPI(
     title="Feedback Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-allowed_origins = os.getenv("CORS_ALLOWED_ORIGINS", "")
-allowed_origins = [origin.strip() for origin in allowed_origins.split(",") if origin.strip()]
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=allowed_origins,
+    allow_origins=list(settings.cors_allowed_origins),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -30,6 +79,29 @@ app.add_middleware(
 
 # Подключение роутов
 app.include_router(router)
+app.include_router(stream_router)
+
+# Бот в режиме webhook работает в том же процессе, что и API; для локальной разработки — python bot.py (polling)
+if settings.bot_mode == "webhook":
+    import bot as admin_bot
+    from src.bot.webhook import setup_webhook
+
+    webhook = setup_webhook(
+        app,
+        admin_bot.dp,
+        admin_bot.bot,
+        path=settings.bot_webhook_path,
+        base_url=settings.bot_webhook_url,
+        secret=settings.bot_webhook_secret,
+        concurrency=settings.bot_webhook_concurrency,
+    )
+
+REGISTRY.register(StatsCollector(db_pool_stats, lambda: get_cache().stats()))
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    payload, content_type = metrics_payload()
+    return Response(content=payload, media_type=content_type)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
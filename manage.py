@@ -0,0 +1,115 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from src.app.modules.messages.infrastructure.db.models import Message
+from src.app.modules.messages.infrastructure.db.repos import OutboxRepo, StatsRepo
+from src.app.modules.messages.infrastructure.db.session import SessionLocal
+from src.app.modules.messages.infrastructure.telegram.outbox_dispatcher import OUTBOX_RETENTION_DAYS
+from src.app.modules.messages.infrastructure.db.partitions import (
+    MESSAGES_ARCHIVE_DIR,
+    MESSAGES_PARTITIONS_AHEAD,
+    MESSAGES_RETENTION_MONTHS,
+    archive_partition,
+    detach_partition,
+    ensure_partitions,
+    expired_partitions,
+    missing_partitions,
+)
+
+
+def parse_datetime(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def backfill_stats(args):
+    # Пересчёт агрегатов из сырых сообщений по дням, чтобы не держать одну огромную транзакцию
+    with SessionLocal() as db:
+        since = args.since
+        until = args.until or datetime.now(timezone.utc)
+        if since is None:
+            since = db.execute(select(func.min(Message.timestamp))).scalar()
+            if since is None:
+                print("Нет сообщений")
+                return
+        repo = StatsRepo(db)
+        step = timedelta(days=args.step_days)
+        start = since
+        while start < until:
+            end = min(start + step, until)
+            start_day, end_day = repo.recompute(start, end)
+            print(f"{start_day.date()} — {end_day.date()}: ok")
+            start = end_day
+
+
+def compact_stats(args):
+    # Периодический пересчёт последних часов при STATS_ROLLUP_INLINE=0 или после потери буферизованных
+    # инкрементов (STATS_ROLLUP_FLUSH_INTERVAL > 0). Часы моложе STATS_RECOMPUTE_SETTLE не трогаются
+    until = datetime.now(timezone.utc)
+    since = until - timedelta(hours=args.hours)
+    with SessionLocal() as db:
+        StatsRepo(db).recompute(since, until)
+
+
+def prune_outbox(args):
+    # Диспетчер и сам чистит outbox раз в OUTBOX_PRUNE_INTERVAL; команда — для разовой чистки или cron
+    with SessionLocal() as db:
+        deleted = OutboxRepo(db).prune(timedelta(days=args.days))
+    print(f"Удалено записей outbox: {deleted}")
+
+
+def maintain_partitions(args):
+    # Запускать по cron раз в сутки: партиции вперёд и ротация старых по политике хранения.
+    # Агрегаты статистики остаются, поэтому backfill-stats за архивные месяцы запускать не нужно
+    with SessionLocal() as db:
+        if args.dry_run:
+            for partition in missing_partitions(db, args.ahead):
+                print(f"{partition.name}: будет создана")
+        else:
+            for name in ensure_partitions(db, args.ahead):
+                print(f"{name}: создана")
+        for partition in expired_partitions(db, args.retention_months):
+            if args.dry_run:
+                print(f"{partition.name}: будет {'архивирована' if args.archive_dir else 'отсоединена'}")
+                continue
+            if args.archive_dir:
+                path = archive_partition(db, partition, args.archive_dir)
+                print(f"{partition.name}: выгружена в {path} и удалена")
+            else:
+                detach_partition(db, partition)
+                print(f"{partition.name}: отсоединена")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-stats", help="пересчитать агрегаты статистики")
+    backfill.add_argument("--since", type=parse_datetime)
+    backfill.add_argument("--until", type=parse_datetime)
+    backfill.add_argument("--step-days", type=int, default=7)
+    backfill.set_defaults(func=backfill_stats)
+
+    compact = commands.add_parser("compact-stats", help="пересчитать агрегаты за последние часы")
+    compact.add_argument("--hours", type=int, default=2)
+    compact.set_defaults(func=compact_stats)
+
+    partitions = commands.add_parser("partitions", help="создать будущие партиции messages и убрать устаревшие")
+    partitions.add_argument("--ahead", type=int, default=MESSAGES_PARTITIONS_AHEAD)
+    partitions.add_argument("--retention-months", type=int, default=MESSAGES_RETENTION_MONTHS)
+    partitions.add_argument("--archive-dir", default=MESSAGES_ARCHIVE_DIR)
+    partitions.add_argument("--dry-run", action="store_true")
+    partitions.set_defaults(func=maintain_partitions)
+
+    outbox = commands.add_parser("prune-outbox", help="удалить старые отправленные и неотправленные уведомления")
+    outbox.add_argument("--days", type=float, default=OUTBOX_RETENTION_DAYS)
+    outbox.set_defaults(func=prune_outbox)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
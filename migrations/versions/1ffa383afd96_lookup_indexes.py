@@ -0,0 +1,29 @@
+"""Lookup indexes
+
+Revision ID: 1ffa383afd96
+Revises: 8a3f41c2d7e9
+Create Date: 2026-10-18 12:40:07.118254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1ffa383afd96'
+down_revision: Union[str, None] = '8a3f41c2d7e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_room_id_timestamp', 'messages', ['room_id', 'timestamp'])
+    op.create_index('ix_rooms_location_id', 'rooms', ['location_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rooms_location_id', table_name='rooms')
+    op.drop_index('ix_messages_room_id_timestamp', table_name='messages')
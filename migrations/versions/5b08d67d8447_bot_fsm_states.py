@@ -0,0 +1,39 @@
+"""Bot FSM states
+
+Revision ID: 5b08d67d8447
+Revises: 6eb3f223cf04
+Create Date: 2026-10-18 15:31:18.447902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b08d67d8447'
+down_revision: Union[str, None] = '6eb3f223cf04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'bot_fsm_states',
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('state', sa.Text(), nullable=True),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_bot_fsm_states_expires_at', 'bot_fsm_states', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bot_fsm_states_expires_at', table_name='bot_fsm_states')
+    op.drop_table('bot_fsm_states')
@@ -0,0 +1,92 @@
+"""Partition messages by month
+
+Revision ID: 5c7cd7abc8da
+Revises: 5b08d67d8447
+Create Date: 2026-10-18 17:02:41.318264
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7cd7abc8da'
+down_revision: Union[str, None] = '5b08d67d8447'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Партиции создаются вперёд на столько месяцев; дальше их поддерживает manage.py partitions
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # Старая таблица переименовывается, имена её индексов освобождаются для новой
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER INDEX IF EXISTS messages_pkey RENAME TO messages_legacy_pkey")
+    op.execute("ALTER INDEX ix_messages_room_id_timestamp RENAME TO ix_messages_legacy_room_id_timestamp")
+    sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence('messages_legacy', 'id')")).scalar()
+
+    op.execute(f"""
+        CREATE TABLE messages (
+            id integer NOT NULL DEFAULT nextval('{sequence}'),
+            room_id integer REFERENCES rooms (id) ON DELETE CASCADE,
+            text text NOT NULL,
+            timestamp timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY messages.id")
+    op.create_index('ix_messages_room_id_timestamp', 'messages', ['room_id', 'timestamp'])
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    first = conn.execute(sa.text("SELECT min(timestamp) FROM messages_legacy")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = first.astimezone(timezone.utc).date().replace(day=1) if first else current
+    while month <= _add_months(current, PARTITIONS_AHEAD):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE messages_{month:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month}') TO ('{end}')"
+        )
+        month = end
+
+    op.execute("""
+        INSERT INTO messages (id, room_id, text, timestamp)
+        SELECT id, room_id, text, coalesce(timestamp, now()) FROM messages_legacy
+    """)
+    op.execute("DROP TABLE messages_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence('messages', 'id')")).scalar()
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_partitioned_pkey")
+    op.execute("ALTER INDEX ix_messages_room_id_timestamp RENAME TO ix_messages_partitioned_room_id_timestamp")
+    op.execute(f"""
+        CREATE TABLE messages (
+            id integer NOT NULL DEFAULT nextval('{sequence}'),
+            room_id integer REFERENCES rooms (id) ON DELETE CASCADE,
+            text text NOT NULL,
+            timestamp timestamptz DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY messages.id")
+    op.execute("""
+        INSERT INTO messages (id, room_id, text, timestamp)
+        SELECT id, room_id, text, timestamp FROM messages_partitioned
+    """)
+    op.create_index('ix_messages_room_id_timestamp', 'messages', ['room_id', 'timestamp'])
+    op.execute("DROP TABLE messages_partitioned")
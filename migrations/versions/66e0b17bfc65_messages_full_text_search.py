@@ -0,0 +1,37 @@
+"""Messages full-text search
+
+Revision ID: 66e0b17bfc65
+Revises: 5c7cd7abc8da
+Create Date: 2026-10-18 17:48:09.552130
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66e0b17bfc65'
+down_revision: Union[str, None] = '5c7cd7abc8da'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Добавление STORED-колонки переписывает все партиции messages
+    op.add_column('messages', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('russian'::regconfig, text) || to_tsvector('english'::regconfig, text)", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_messages_search_vector', 'messages', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_search_vector', table_name='messages')
+    op.drop_column('messages', 'search_vector')
@@ -0,0 +1,57 @@
+"""Message stats rollups
+
+Revision ID: 6eb3f223cf04
+Revises: 1ffa383afd96
+Create Date: 2026-10-18 14:05:52.690417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6eb3f223cf04'
+down_revision: Union[str, None] = '1ffa383afd96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'message_stats_hourly',
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('room_id', 'bucket'),
+    )
+    op.create_table(
+        'message_stats_daily',
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('room_id', 'day'),
+    )
+    # Первичное заполнение агрегатов из существующих сообщений
+    op.execute("""
+        INSERT INTO message_stats_hourly (room_id, bucket, count)
+        SELECT room_id, timezone('UTC', date_trunc('hour', timezone('UTC', timestamp))), count(*)
+        FROM messages WHERE room_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY 1, 2
+    """)
+    op.execute("""
+        INSERT INTO message_stats_daily (room_id, day, count)
+        SELECT room_id, timezone('UTC', timestamp)::date, count(*)
+        FROM messages WHERE room_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('message_stats_daily')
+    op.drop_table('message_stats_hourly')
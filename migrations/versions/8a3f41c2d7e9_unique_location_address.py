@@ -0,0 +1,43 @@
+"""Unique location address
+
+Revision ID: 8a3f41c2d7e9
+Revises: 2d2a1c347cdd
+Create Date: 2026-10-18 12:31:54.602117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3f41c2d7e9'
+down_revision: Union[str, None] = '2d2a1c347cdd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Перед уникальным индексом сливаем дубли адресов: комнаты переносятся на адрес с минимальным id
+    op.execute("""
+        WITH keep AS (
+            SELECT address, min(id) AS id FROM locations GROUP BY address HAVING count(*) > 1
+        )
+        UPDATE rooms SET location_id = keep.id
+        FROM locations, keep
+        WHERE rooms.location_id = locations.id
+          AND locations.address = keep.address
+          AND locations.id <> keep.id
+    """)
+    op.execute("""
+        DELETE FROM locations l
+        USING locations d
+        WHERE l.address = d.address AND l.id > d.id
+    """)
+    op.create_unique_constraint('locations_address_key', 'locations', ['address'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('locations_address_key', 'locations', type_='unique')
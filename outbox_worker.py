@@ -0,0 +1,23 @@
+import asyncio
+import logging
+import signal
+
+from src.app.modules.messages.infrastructure.telegram import OutboxDispatcher
+from src.app.settings import settings
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main():
+    # Единственный процесс, рассылающий outbox: лимиты Telegram на чат и глобальный считаются здесь
+    dispatcher = OutboxDispatcher()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    dispatcher.start()
+    await stop.wait()
+    await dispatcher.stop(drain_timeout=settings.outbox_drain_timeout)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from sqlalchemy import event
+
+from src.app.settings import env
+
+# Порог для лога медленных запросов, мс; 0 — выключено
+DB_SLOW_QUERY_MS = float(env("DB_SLOW_QUERY_MS", "0"))
+
+logger = logging.getLogger("feedback.slow_query")
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+# SSE и WebSocket живут минутами и часами — отдельно, чтобы не искажать перцентили обычных запросов
+HTTP_STREAM_DURATION = Histogram(
+    "http_stream_duration_seconds",
+    "Длительность подключения SSE/WebSocket",
+    ["route"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 4 * 3600, 12 * 3600),
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Длительность SQL-запроса",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Число SQL-запросов на HTTP-запрос",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Суммарное время SQL на HTTP-запрос",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+TELEGRAM_SEND_DURATION = Histogram(
+    "telegram_send_duration_seconds",
+    "Длительность вызова Telegram sendMessage",
+    ["result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+FEEDBACK_RATE_LIMITED = Counter(
+    "feedback_rate_limited_total",
+    "Отклонённые лимитом отправки отзывов",
+    ["scope"],
+)
+FEEDBACK_STREAM_DROPPED = Counter(
+    "feedback_stream_dropped_total",
+    "События ленты отзывов, выброшенные из-за медленного подписчика",
+)
+FEEDBACK_WRITE_DROPPED = Counter(
+    "feedback_write_dropped_total",
+    "Отзывы, не записанные буфером после ответа клиенту (FEEDBACK_WAIT_COMMIT=0)",
+)
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL-запросы дольше DB_SLOW_QUERY_MS")
+
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Статистика SQL текущего HTTP-запроса; контекст копируется и в threadpool sync-обработчиков
+_request_db_stats: ContextVar[RequestDbStats | None] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+    if DB_SLOW_QUERY_MS and elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def instrument_engine(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route(scope) -> str:
+    # Шаблон маршрута (/feedback/{token}), а не фактический путь — ограниченная кардинальность
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def _is_event_stream(headers) -> bool:
+    return any(name.lower() == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers)
+
+
+class MetricsMiddleware:
+    # Чистый ASGI-middleware: без BaseHTTPMiddleware и лишних копирований тела ответа
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            start = time.perf_counter()
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                HTTP_STREAM_DURATION.labels(_route(scope)).observe(time.perf_counter() - start)
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = _is_event_stream(message.get("headers", ()))
+            await send(message)
+
+        stats = RequestDbStats()
+        token = _request_db_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db_stats.reset(token)
+            route = _route(scope)
+            if streaming:
+                HTTP_STREAM_DURATION.labels(route).observe(elapsed)
+            else:
+                HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(elapsed)
+                DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+                DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+
+
+class StatsCollector:
+    # Снимает показатели пула соединений и кэша в момент запроса /metrics
+    def __init__(self, pool_stats, cache_stats):
+        self.pool_stats = pool_stats
+        self.cache_stats = cache_stats
+
+    def collect(self):
+        gauges = {
+            name: GaugeMetricFamily(f"db_pool_{name}", f"Пул соединений: {name}", labels=["engine"])
+            for name in ("size", "checked_out", "overflow")
+        }
+        counters = {
+            "checkouts_total": CounterMetricFamily("db_pool_checkouts", "Выдачи соединений", labels=["engine"]),
+            "checkout_timeouts_total": CounterMetricFamily("db_pool_checkout_timeouts", "Таймауты ожидания соединения", labels=["engine"]),
+            "checkout_wait_seconds_total": CounterMetricFamily("db_pool_checkout_wait_seconds", "Суммарное ожидание соединения", labels=["engine"]),
+        }
+        for engine_name, stats in self.pool_stats().items():
+            for name, metric in gauges.items():
+                if name in stats:
+                    metric.add_metric([engine_name], stats[name])
+            for name, metric in counters.items():
+                if name in stats:
+                    metric.add_metric([engine_name], stats[name])
+        yield from gauges.values()
+        yield from counters.values()
+
+        cache = self.cache_stats()
+        for name in ("hits", "misses"):
+            metric = CounterMetricFamily(f"cache_{name}", f"Кэш: {name}", labels=["backend"])
+            metric.add_metric([cache["backend"]], cache.get(name, 0))
+            yield metric
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,249 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Body, Depends, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+
+from src.app.modules.messages.application.schemas import Feedback, RoomInfo, RoomCreate, CreatedRoomLink, MessagePage, MessageSearchPage
+from src.app.modules.messages.infrastructure.db.repos import (
+    get_async_room_repo,
+    get_async_location_repo,
+    get_async_message_repo,
+    get_async_admin_repo,
+    get_async_streaming_message_repo,
+    get_async_stats_repo,
+    AsyncRoomRepo,
+    AsyncLocationRepo,
+    AsyncMessageRepo,
+    AsyncAdminRepo,
+    AsyncStatsRepo
+)
+from src.app.modules.messages.application.services.feedback_service import (
+    handle_send_feedback_async,
+    handle_get_room_info_async,
+    handle_create_room_async,
+    handle_bulk_create_rooms_async,
+    parse_rooms_csv,
+    handle_admin_auth_async,
+    handle_list_admins_async,
+    handle_add_location_async, handle_list_locations_async, handle_rooms_by_location_async
+)
+from src.app.modules.messages.application.services.history_service import (
+    handle_room_history_async,
+    handle_location_history_async,
+    handle_export_room_history_async,
+    handle_export_location_history_async,
+    handle_search_messages_async
+)
+from src.app.modules.messages.application.services.stats_service import handle_stats_async
+from src.app.modules.messages.api.rate_limit import feedback_rate_limit_async
+from src.app.modules.messages.infrastructure.db.write_buffer import BufferFull
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+# Те же маршруты, что и в endpoints.py, но на async-движке (DB_BACKEND=async)
+router = APIRouter(prefix="/feedback", tags=["Feedback"])
+
+@router.post("/{token}", dependencies=[Depends(feedback_rate_limit_async)])
+async def send_feedback(
+    token: str,
+    feedback: Feedback,
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo),
+    message_repo: AsyncMessageRepo = Depends(get_async_message_repo),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=128)
+):
+    try:
+        return await handle_send_feedback_async(token, feedback, room_repo, message_repo, idempotency_key)
+    except BufferFull:
+        raise HTTPException(status_code=503, detail="Service overloaded", headers={"Retry-After": "1"})
+
+
+@router.get("/room/{token}", response_model=RoomInfo)
+async def get_room_info(
+    token: str,
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo)
+):
+    try:
+        return await handle_get_room_info_async(token, room_repo)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Комната не найдена")
+
+
+@router.post("/admin/create_room")
+async def create_room(
+    address: str = Form(...),
+    name: str = Form(...),
+    tg_group_id: int = Form(...),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo)
+):
+    return await handle_create_room_async(address, name, tg_group_id, location_repo, room_repo)
+
+
+@router.post("/admin/rooms/bulk", response_model=list[CreatedRoomLink])
+async def bulk_create_rooms(
+    items: list[RoomCreate] = Body(...),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo)
+):
+    try:
+        return await handle_bulk_create_rooms_async(items, location_repo, room_repo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/admin/rooms/bulk_csv", response_model=list[CreatedRoomLink])
+async def bulk_create_rooms_csv(
+    file: UploadFile = File(...),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo)
+):
+    try:
+        items = parse_rooms_csv((await file.read()).decode("utf-8-sig"))
+        return await handle_bulk_create_rooms_async(items, location_repo, room_repo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/admin/is_authorized/{tg_user_id}")
+async def is_authorized(
+    tg_user_id: str,
+    admin_repo: AsyncAdminRepo = Depends(get_async_admin_repo)
+):
+    return await handle_admin_auth_async(tg_user_id, admin_repo)
+
+@router.get("/admin/admins")
+async def list_admins(
+    admin_repo: AsyncAdminRepo = Depends(get_async_admin_repo)
+):
+    return await handle_list_admins_async(admin_repo)
+
+@router.post("/admin/add_location")
+async def add_location(
+    address: str = Form(...),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo)
+):
+    try:
+        return await handle_add_location_async(address, location_repo)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Адрес уже существует")
+
+@router.get("/admin/locations")
+async def list_locations(
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo)
+):
+    return await handle_list_locations_async(location_repo)
+
+@router.get("/admin/rooms/by_location")
+async def rooms_by_location(
+    address: str = Query(...),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo)
+):
+    try:
+        return await handle_rooms_by_location_async(address, location_repo)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Адрес не найден")
+
+
+@router.get("/admin/rooms/{token}/messages", response_model=MessagePage)
+async def room_history(
+    token: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo),
+    message_repo: AsyncMessageRepo = Depends(get_async_message_repo)
+):
+    try:
+        return await handle_room_history_async(token, room_repo, message_repo, limit, cursor, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/locations/messages", response_model=MessagePage)
+async def location_history(
+    address: str = Query(...),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    message_repo: AsyncMessageRepo = Depends(get_async_message_repo)
+):
+    try:
+        return await handle_location_history_async(address, location_repo, message_repo, limit, cursor, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/rooms/{token}/messages/export")
+async def export_room_history(
+    token: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo),
+    message_repo: AsyncMessageRepo = Depends(get_async_streaming_message_repo)
+):
+    try:
+        content = await handle_export_room_history_async(token, room_repo, message_repo, format, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[format])
+
+@router.get("/admin/locations/messages/export")
+async def export_location_history(
+    address: str = Query(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    message_repo: AsyncMessageRepo = Depends(get_async_streaming_message_repo)
+):
+    try:
+        content = await handle_export_location_history_async(address, location_repo, message_repo, format, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[format])
+
+@router.get("/admin/messages/search", response_model=MessageSearchPage)
+async def search_messages(
+    q: str = Query(..., min_length=2, max_length=200),
+    token: str | None = Query(None),
+    address: str | None = Query(None),
+    order: str = Query("rank", pattern="^(rank|recent)$"),
+    limit: int = Query(20, ge=1, le=500),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    message_repo: AsyncMessageRepo = Depends(get_async_message_repo)
+):
+    try:
+        return await handle_search_messages_async(
+            q, room_repo, location_repo, message_repo, limit, cursor, order, token, address, since, until
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/stats")
+async def stats(
+    address: str | None = Query(None),
+    token: str | None = Query(None),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    location_repo: AsyncLocationRepo = Depends(get_async_location_repo),
+    room_repo: AsyncRoomRepo = Depends(get_async_room_repo),
+    stats_repo: AsyncStatsRepo = Depends(get_async_stats_repo)
+):
+    try:
+        return await handle_stats_async(address, token, granularity, since, until, location_repo, room_repo, stats_repo)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,35 +1,61 @@
-from fastapi import APIRouter, Depends, Form, HTTPException, Query
+from datetime import datetime
 
-from src.app.modules.messages.application.schemas import Feedback, RoomInfo
+from fastapi import APIRouter, Body, Depends, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from src.app.modules.messages.application.schemas import Feedback, RoomInfo, RoomCreate, CreatedRoomLink, MessagePage, MessageSearchPage
 from src.app.modules.messages.infrastructure.db.repos import (
     get_room_repo,
     get_location_repo,
     get_message_repo,
     get_admin_repo,
+    get_streaming_message_repo,
+    get_stats_repo,
     RoomRepo,
     LocationRepo,
     MessageRepo,
-    AdminRepo
+    AdminRepo,
+    StatsRepo
 )
 from src.app.modules.messages.application.services.feedback_service import (
     handle_send_feedback,
     handle_get_room_info,
     handle_create_room,
+    handle_bulk_create_rooms,
+    parse_rooms_csv,
     handle_admin_auth,
+    handle_list_admins,
     handle_add_location, handle_list_locations, handle_rooms_by_location
 )
+from src.app.modules.messages.application.services.history_service import (
+    handle_room_history,
+    handle_location_history,
+    handle_export_room_history,
+    handle_export_location_history,
+    handle_search_messages
+)
+from src.app.modules.messages.application.services.stats_service import handle_stats
+from src.app.modules.messages.api.rate_limit import feedback_rate_limit
+from src.app.modules.messages.infrastructure.db.write_buffer import BufferFull
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
 
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
-@router.post("/{token}")
+@router.post("/{token}", dependencies=[Depends(feedback_rate_limit)])
 def send_feedback(
     token: str,
     feedback: Feedback,
     room_repo: RoomRepo = Depends(get_room_repo),
-    message_repo: MessageRepo = Depends(get_message_repo)
+    message_repo: MessageRepo = Depends(get_message_repo),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=128)
 ):
-    return handle_send_feedback(token, feedback, room_repo, message_repo)
+    try:
+        return handle_send_feedback(token, feedback, room_repo, message_repo, idempotency_key)
+    except BufferFull:
+        raise HTTPException(status_code=503, detail="Service overloaded", headers={"Retry-After": "1"})
 
 
 @router.get("/room/{token}", response_model=RoomInfo)
@@ -37,7 +63,10 @@ def get_room_info(
     token: str,
     room_repo: RoomRepo = Depends(get_room_repo)
 ):
-    return handle_get_room_info(token, room_repo)
+    try:
+        return handle_get_room_info(token, room_repo)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Комната не найдена")
 
 
 @router.post("/admin/create_room")
@@ -51,6 +80,31 @@ def create_room(
     return handle_create_room(address, name, tg_group_id, location_repo, room_repo)
 
 
+@router.post("/admin/rooms/bulk", response_model=list[CreatedRoomLink])
+def bulk_create_rooms(
+    items: list[RoomCreate] = Body(...),
+    location_repo: LocationRepo = Depends(get_location_repo),
+    room_repo: RoomRepo = Depends(get_room_repo)
+):
+    try:
+        return handle_bulk_create_rooms(items, location_repo, room_repo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/admin/rooms/bulk_csv", response_model=list[CreatedRoomLink])
+async def bulk_create_rooms_csv(
+    file: UploadFile = File(...),
+    location_repo: LocationRepo = Depends(get_location_repo),
+    room_repo: RoomRepo = Depends(get_room_repo)
+):
+    try:
+        items = parse_rooms_csv((await file.read()).decode("utf-8-sig"))
+        return await run_in_threadpool(handle_bulk_create_rooms, items, location_repo, room_repo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/admin/is_authorized/{tg_user_id}")
 def is_authorized(
     tg_user_id: str,
@@ -58,6 +112,12 @@ def is_authorized(
 ):
     return handle_admin_auth(tg_user_id, admin_repo)
 
+@router.get("/admin/admins")
+def list_admins(
+    admin_repo: AdminRepo = Depends(get_admin_repo)
+):
+    return handle_list_admins(admin_repo)
+
 @router.post("/admin/add_location")
 def add_location(
     address: str = Form(...),
@@ -83,3 +143,107 @@ def rooms_by_location(
         return handle_rooms_by_location(address, location_repo)
     except Exception:
         raise HTTPException(status_code=404, detail="Адрес не найден")
+
+
+@router.get("/admin/rooms/{token}/messages", response_model=MessagePage)
+def room_history(
+    token: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    room_repo: RoomRepo = Depends(get_room_repo),
+    message_repo: MessageRepo = Depends(get_message_repo)
+):
+    try:
+        return handle_room_history(token, room_repo, message_repo, limit, cursor, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/locations/messages", response_model=MessagePage)
+def location_history(
+    address: str = Query(...),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    location_repo: LocationRepo = Depends(get_location_repo),
+    message_repo: MessageRepo = Depends(get_message_repo)
+):
+    try:
+        return handle_location_history(address, location_repo, message_repo, limit, cursor, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/rooms/{token}/messages/export")
+def export_room_history(
+    token: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    room_repo: RoomRepo = Depends(get_room_repo),
+    message_repo: MessageRepo = Depends(get_streaming_message_repo)
+):
+    try:
+        content = handle_export_room_history(token, room_repo, message_repo, format, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[format])
+
+@router.get("/admin/locations/messages/export")
+def export_location_history(
+    address: str = Query(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    location_repo: LocationRepo = Depends(get_location_repo),
+    message_repo: MessageRepo = Depends(get_streaming_message_repo)
+):
+    try:
+        content = handle_export_location_history(address, location_repo, message_repo, format, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[format])
+
+@router.get("/admin/messages/search", response_model=MessageSearchPage)
+def search_messages(
+    q: str = Query(..., min_length=2, max_length=200),
+    token: str | None = Query(None),
+    address: str | None = Query(None),
+    order: str = Query("rank", pattern="^(rank|recent)$"),
+    limit: int = Query(20, ge=1, le=500),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    room_repo: RoomRepo = Depends(get_room_repo),
+    location_repo: LocationRepo = Depends(get_location_repo),
+    message_repo: MessageRepo = Depends(get_message_repo)
+):
+    try:
+        return handle_search_messages(
+            q, room_repo, location_repo, message_repo, limit, cursor, order, token, address, since, until
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/stats")
+def stats(
+    address: str | None = Query(None),
+    token: str | None = Query(None),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    location_repo: LocationRepo = Depends(get_location_repo),
+    room_repo: RoomRepo = Depends(get_room_repo),
+    stats_repo: StatsRepo = Depends(get_stats_repo)
+):
+    try:
+        return handle_stats(address, token, granularity, since, until, location_repo, room_repo, stats_repo)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
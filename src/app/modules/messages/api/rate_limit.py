@@ -0,0 +1,82 @@
+import json
+import math
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from src.app.metrics import FEEDBACK_RATE_LIMITED
+from src.app.modules.messages.infrastructure.db.repos import (
+    RoomRepo,
+    AsyncRoomRepo,
+    RoomSnapshot,
+    peek_room_snapshot,
+    peek_room_snapshot_async
+)
+from src.app.modules.messages.infrastructure.db.session import AsyncSessionLocal, SessionLocal
+from src.app.modules.messages.infrastructure.rate_limit import get_rate_limiter
+from src.app.settings import env
+
+FEEDBACK_RATE_LIMIT_ENABLED = env("FEEDBACK_RATE_LIMIT_ENABLED", "1") == "1"
+FEEDBACK_RATE_WINDOW = float(env("FEEDBACK_RATE_WINDOW", "60"))
+# Лимиты на окно: на один QR-токен и на один IP клиента
+FEEDBACK_TOKEN_LIMIT = int(env("FEEDBACK_TOKEN_LIMIT", "30"))
+FEEDBACK_IP_LIMIT = int(env("FEEDBACK_IP_LIMIT", "10"))
+# Переопределения по адресу локации: {"ул. Ленина, 1": 60} или {"ул. Ленина, 1": {"token": 60, "ip": 20}}
+FEEDBACK_LOCATION_LIMITS = json.loads(env("FEEDBACK_LOCATION_LIMITS", "{}"))
+# За reverse proxy IP клиента берётся из X-Forwarded-For
+TRUST_FORWARDED_FOR = env("TRUST_FORWARDED_FOR", "0") == "1"
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def location_limits(room: RoomSnapshot | None) -> tuple[int, int]:
+    override = FEEDBACK_LOCATION_LIMITS.get(room.address) if room else None
+    if override is None:
+        return FEEDBACK_TOKEN_LIMIT, FEEDBACK_IP_LIMIT
+    if isinstance(override, dict):
+        return int(override.get("token", FEEDBACK_TOKEN_LIMIT)), int(override.get("ip", FEEDBACK_IP_LIMIT))
+    return int(override), FEEDBACK_IP_LIMIT
+
+
+def _apply_limits(request: Request, token: str, room: RoomSnapshot | None):
+    limiter = get_rate_limiter()
+    token_limit, ip_limit = location_limits(room)
+    for scope, key, limit in (("ip", f"ip:{client_ip(request)}", ip_limit), ("token", f"token:{token}", token_limit)):
+        retry_after = limiter.hit(key, limit, FEEDBACK_RATE_WINDOW)
+        if retry_after:
+            FEEDBACK_RATE_LIMITED.labels(scope).inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+# Зависимость роутера: выполняется до get_db, так что отклонённый запрос обычно не берёт соединение из пула.
+# Адрес для переопределений берётся из кэша снапшота комнаты; при промахе комната читается из БД
+# (только если переопределения заданы) — этот же снапшот затем берёт из кэша обработчик
+def feedback_rate_limit(request: Request, token: str):
+    if not FEEDBACK_RATE_LIMIT_ENABLED:
+        return
+    room = peek_room_snapshot(token)
+    if room is None and FEEDBACK_LOCATION_LIMITS:
+        with SessionLocal() as db:
+            room = RoomRepo(db).get_snapshot_by_token(token)
+    _apply_limits(request, token, room)
+
+
+async def feedback_rate_limit_async(request: Request, token: str):
+    if not FEEDBACK_RATE_LIMIT_ENABLED:
+        return
+    room = await peek_room_snapshot_async(token)
+    if room is None and FEEDBACK_LOCATION_LIMITS:
+        async with AsyncSessionLocal() as db:
+            room = await AsyncRoomRepo(db).get_snapshot_by_token(token)
+    # Лимитер синхронный (Redis-клиент блокирующий), поэтому не в event loop
+    await run_in_threadpool(_apply_limits, request, token, room)
@@ -0,0 +1,84 @@
+import json
+import time
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from src.app.modules.messages.infrastructure.realtime import feedback_broker, TooManySubscribers
+from src.app.settings import env
+
+# Комментарий/ping раз в столько секунд, чтобы прокси и балансировщик не закрывали простаивающее соединение
+STREAM_KEEPALIVE = float(env("STREAM_KEEPALIVE", "15"))
+# Поток закрывается через столько секунд и клиент переподключается: подписчики перераспределяются между
+# воркерами, а uvicorn при остановке не ждёт вечных соединений (см. --timeout-graceful-shutdown)
+STREAM_MAX_AGE = float(env("STREAM_MAX_AGE", "300"))
+
+# Лента новых отзывов для дашбордов; роутер общий для sync и async бэкендов — БД он не трогает
+router = APIRouter(prefix="/feedback", tags=["Feedback"])
+
+
+def _subscribe(address: str | None, token: str | None):
+    try:
+        return feedback_broker.subscribe(address=address, token=token)
+    except TooManySubscribers as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+async def _sse_events(subscription):
+    with subscription:
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + STREAM_MAX_AGE
+        while time.monotonic() < deadline:
+            try:
+                event = await subscription.get(timeout=STREAM_KEEPALIVE)
+            except StopAsyncIteration:
+                return
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/admin/stream")
+async def stream_feedback(
+    address: str | None = Query(None),
+    token: str | None = Query(None),
+):
+    # Server-Sent Events: подписка создаётся до ответа, чтобы при переполнении вернуть 503, а не пустой поток
+    subscription = _subscribe(address, token)
+    return StreamingResponse(
+        _sse_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Если клиент ушёл до первого байта, генератор не запускался и сам не отпишется
+        background=BackgroundTask(subscription.close),
+    )
+
+
+@router.websocket("/admin/ws")
+async def stream_feedback_ws(
+    websocket: WebSocket,
+    address: str | None = Query(None),
+    token: str | None = Query(None),
+):
+    try:
+        subscription = feedback_broker.subscribe(address=address, token=token)
+    except TooManySubscribers:
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    deadline = time.monotonic() + STREAM_MAX_AGE
+    with subscription:
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    event = await subscription.get(timeout=STREAM_KEEPALIVE)
+                except StopAsyncIteration:
+                    await websocket.close(code=1001)
+                    return
+                await websocket.send_json(event if event is not None else {"type": "ping"})
+            await websocket.close(code=1001)
+        except (WebSocketDisconnect, RuntimeError):
+            # Клиент ушёл — отписываемся; сообщения от клиента не ожидаются
+            return
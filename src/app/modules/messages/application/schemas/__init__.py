@@ -1,2 +1,4 @@
 from .feedback import Feedback
-from .room_info import RoomInfo
\ No newline at end of file
+from .room_info import RoomInfo
+from .bulk_rooms import RoomCreate, CreatedRoomLink
+from .history import MessageItem, MessagePage, MessageSearchItem, MessageSearchPage
\ No newline at end of file
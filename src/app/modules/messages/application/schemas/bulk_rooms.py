@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+class RoomCreate(BaseModel):
+    address: str
+    name: str
+    tg_group_id: int
+
+class CreatedRoomLink(BaseModel):
+    address: str
+    name: str
+    qr_token: str
+    qr_link: str
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Feedback(BaseModel):
     text: str
+    submission_id: str | None = Field(None, max_length=128)
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+class MessageItem(BaseModel):
+    id: int
+    room: str
+    text: str
+    timestamp: datetime
+
+class MessagePage(BaseModel):
+    items: list[MessageItem]
+    next_cursor: str | None = None
+
+class MessageSearchItem(MessageItem):
+    rank: float
+
+class MessageSearchPage(BaseModel):
+    items: list[MessageSearchItem]
+    next_cursor: str | None = None
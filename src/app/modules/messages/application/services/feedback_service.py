@@ -1,44 +1,82 @@
+import csv
+import io
 import uuid
-import os
-from dotenv import load_dotenv
+from functools import partial
 
-from src.app.modules.messages.application.schemas import Feedback, RoomInfo
+from pydantic import ValidationError
+
+from src.app.modules.messages.application.schemas import Feedback, RoomInfo, RoomCreate
 from src.app.modules.messages.infrastructure.db.repos import (
     RoomRepo,
     LocationRepo,
     MessageRepo,
-    AdminRepo
+    AdminRepo,
+    AsyncRoomRepo,
+    AsyncLocationRepo,
+    AsyncMessageRepo,
+    AsyncAdminRepo,
+    PendingMessage,
+    invalidate_locations,
+    invalidate_locations_async
+)
+from src.app.modules.messages.infrastructure.db.write_buffer import FEEDBACK_WRITE_BEHIND, feedback_buffer
+from src.app.modules.messages.infrastructure.telegram import notify_outbox
+from src.app.modules.messages.infrastructure.realtime import publish_feedback
+from src.app.modules.messages.application.services.idempotency import (
+    claim_submission,
+    release_submission,
+    claim_submission_async,
+    release_submission_async
 )
-from src.utils import send_telegram_message
+from src.app.settings import settings
 
 
-load_dotenv()
+FORM_URL = settings.form_url
+
+def format_feedback_notification(address: str, room_name: str, text: str) -> str:
+    return (
+        f"\U0001F6A8 Новое сообщение!\n"
+        f"\U0001F4CD Адрес: {address}\n"
+        f"\U0001F3E0 Помещение: {room_name}\n"
+        f"\u2709\uFE0F Сообщение: {text}"
+    )
 
-FORM_URL = os.getenv("FORM_URL")
 
-def handle_send_feedback(token: str, feedback: Feedback, room_repo: RoomRepo, message_repo: MessageRepo):
-    room = room_repo.get_by_token(token)
+def handle_send_feedback(token: str, feedback: Feedback, room_repo: RoomRepo, message_repo: MessageRepo,
+                         idempotency_key: str | None = None):
+    room = room_repo.get_snapshot_by_token(token)
     if not room:
         raise ValueError("Room not found")
 
-    _ = message_repo.create(room_id=room.id, text=feedback.text)
+    # Повтор той же отправки (ретрай браузера или одинаковый текст подряд) не пишется и не уведомляет повторно
+    claimed = claim_submission(token, idempotency_key or feedback.submission_id, feedback.text)
+    if claimed is None:
+        return {"status": "ok"}
 
-    tg_msg = (
-        f"\U0001F6A8 Новое сообщение!\n"
-        f"\U0001F4CD Адрес: {room.location.address}\n"
-        f"\U0001F3E0 Помещение: {room.name}\n"
-        f"\u2709\uFE0F Сообщение: {feedback.text}"
-    )
-    send_telegram_message(room.tg_group_id, tg_msg)
+    tg_msg = format_feedback_notification(room.address, room.name, feedback.text)
+    publish = partial(publish_feedback, token, room.name, room.address, feedback.text)
+    try:
+        if FEEDBACK_WRITE_BEHIND:
+            # Запись пачкой в буфере; outbox будит и в ленту публикует сам буфер после commit.
+            # Если строку не удалось записать без ожидания commit, ключи освобождает тоже буфер
+            feedback_buffer.submit_threadsafe(PendingMessage(room.id, feedback.text, room.tg_group_id, tg_msg),
+                                              publish, partial(release_submission_async, claimed))
+            return {"status": "ok"}
+        message_repo.create(room_id=room.id, text=feedback.text, notify_chat_id=room.tg_group_id, notify_text=tg_msg)
+        notify_outbox()
+    except Exception:
+        release_submission(claimed)
+        raise
 
+    publish()
     return {"status": "ok"}
 
 
 def handle_get_room_info(token: str, room_repo: RoomRepo) -> RoomInfo:
-    room = room_repo.get_by_token(token)
+    room = room_repo.get_snapshot_by_token(token)
     if not room:
         raise ValueError("Room not found")
-    return RoomInfo(address=room.location.address, name=room.name)
+    return RoomInfo(address=room.address, name=room.name)
 
 
 def handle_create_room(address: str, name: str, tg_group_id: int, location_repo: LocationRepo, room_repo: RoomRepo):
@@ -46,8 +84,8 @@ def handle_create_room(address: str, name: str, tg_group_id: int, location_repo:
     if not location:
         location = location_repo.create(address)
 
-    token = uuid.uuid4().hex[:8]
-    room = room_repo.create(location_id=location.id, name=name, tg_group_id=tg_group_id, token=token)
+    token = new_room_token()
+    room_repo.create(location_id=location.id, name=name, tg_group_id=tg_group_id, token=token)
     qr_link = f"{FORM_URL}/room/{token}"
     return {
         "qr_token": token,
@@ -55,11 +93,68 @@ def handle_create_room(address: str, name: str, tg_group_id: int, location_repo:
     }
 
 
+def new_room_token() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+ROOMS_CSV_COLUMNS = ("address", "name", "tg_group_id")
+
+
+def parse_rooms_csv(content: str) -> list[RoomCreate]:
+    # Ожидаются колонки address,name,tg_group_id; ошибки формата — ValueError с номером строки (400, а не 500)
+    reader = csv.DictReader(io.StringIO(content), restkey="__extra__")
+    try:
+        missing = [column for column in ROOMS_CSV_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"В CSV нет колонок: {', '.join(missing)}")
+        items = []
+        for row in reader:
+            if "__extra__" in row or any(row[column] is None for column in ROOMS_CSV_COLUMNS):
+                raise ValueError(f"Строка {reader.line_num}: ожидается {len(ROOMS_CSV_COLUMNS)} колонки")
+            try:
+                items.append(RoomCreate(**{column: row[column] for column in ROOMS_CSV_COLUMNS}))
+            except ValidationError as e:
+                error = e.errors()[0]
+                raise ValueError(f"Строка {reader.line_num}: {error['loc'][0]}: {error['msg']}") from None
+    except csv.Error as e:
+        raise ValueError(f"Строка {reader.line_num}: {e}") from None
+    return items
+
+
+def _bulk_room_links(rooms: list[dict], addresses: dict[int, str]):
+    return [
+        {
+            "address": addresses[room["location_id"]],
+            "name": room["name"],
+            "qr_token": room["qr_token"],
+            "qr_link": f"{FORM_URL}/room/{room['qr_token']}",
+        }
+        for room in rooms
+    ]
+
+
+def handle_bulk_create_rooms(items: list[RoomCreate], location_repo: LocationRepo, room_repo: RoomRepo):
+    if not items:
+        raise ValueError("Список помещений пуст")
+    location_ids = location_repo.upsert_many([item.address for item in items])
+    rows = [
+        {"location_id": location_ids[item.address], "name": item.name, "tg_group_id": item.tg_group_id}
+        for item in items
+    ]
+    rooms = room_repo.create_many(rows, new_room_token)
+    invalidate_locations()
+    return _bulk_room_links(rooms, {location_id: address for address, location_id in location_ids.items()})
+
+
 def handle_admin_auth(tg_user_id: str, admin_repo: AdminRepo):
     admin = admin_repo.is_admin(tg_user_id)
     return {"authorized": bool(admin)}
 
 
+def handle_list_admins(admin_repo: AdminRepo):
+    return {"admins": admin_repo.list_usernames()}
+
+
 def handle_add_location(address: str, location_repo: LocationRepo):
     if location_repo.get_by_address(address):
         raise Exception
@@ -68,11 +163,102 @@ def handle_add_location(address: str, location_repo: LocationRepo):
 
 
 def handle_list_locations(location_repo: LocationRepo):
-    return [l.address for l in location_repo.list()]
+    return location_repo.list_addresses()
 
 
 def handle_rooms_by_location(address: str, location_repo: LocationRepo):
-    location = location_repo.get_by_address(address)
+    rooms = location_repo.list_rooms_by_address(address)
+    if rooms is None:
+        raise Exception
+    return rooms
+
+
+# Async-версии обработчиков для DB_BACKEND=async
+
+async def handle_send_feedback_async(token: str, feedback: Feedback, room_repo: AsyncRoomRepo, message_repo: AsyncMessageRepo,
+                                     idempotency_key: str | None = None):
+    room = await room_repo.get_snapshot_by_token(token)
+    if not room:
+        raise ValueError("Room not found")
+
+    # Повтор той же отправки (ретрай браузера или одинаковый текст подряд) не пишется и не уведомляет повторно
+    claimed = await claim_submission_async(token, idempotency_key or feedback.submission_id, feedback.text)
+    if claimed is None:
+        return {"status": "ok"}
+
+    tg_msg = format_feedback_notification(room.address, room.name, feedback.text)
+    publish = partial(publish_feedback, token, room.name, room.address, feedback.text)
+    try:
+        if FEEDBACK_WRITE_BEHIND:
+            await feedback_buffer.submit(PendingMessage(room.id, feedback.text, room.tg_group_id, tg_msg),
+                                         publish, partial(release_submission_async, claimed))
+            return {"status": "ok"}
+        await message_repo.create(room_id=room.id, text=feedback.text, notify_chat_id=room.tg_group_id, notify_text=tg_msg)
+        notify_outbox()
+    except Exception:
+        await release_submission_async(claimed)
+        raise
+
+    publish()
+    return {"status": "ok"}
+
+
+async def handle_get_room_info_async(token: str, room_repo: AsyncRoomRepo) -> RoomInfo:
+    room = await room_repo.get_snapshot_by_token(token)
+    if not room:
+        raise ValueError("Room not found")
+    return RoomInfo(address=room.address, name=room.name)
+
+
+async def handle_create_room_async(address: str, name: str, tg_group_id: int, location_repo: AsyncLocationRepo, room_repo: AsyncRoomRepo):
+    location = await location_repo.get_by_address(address)
     if not location:
+        location = await location_repo.create(address)
+
+    token = new_room_token()
+    await room_repo.create(location_id=location.id, name=name, tg_group_id=tg_group_id, token=token)
+    qr_link = f"{FORM_URL}/room/{token}"
+    return {
+        "qr_token": token,
+        "qr_link": qr_link,
+    }
+
+
+async def handle_bulk_create_rooms_async(items: list[RoomCreate], location_repo: AsyncLocationRepo, room_repo: AsyncRoomRepo):
+    if not items:
+        raise ValueError("Список помещений пуст")
+    location_ids = await location_repo.upsert_many([item.address for item in items])
+    rows = [
+        {"location_id": location_ids[item.address], "name": item.name, "tg_group_id": item.tg_group_id}
+        for item in items
+    ]
+    rooms = await room_repo.create_many(rows, new_room_token)
+    await invalidate_locations_async()
+    return _bulk_room_links(rooms, {location_id: address for address, location_id in location_ids.items()})
+
+
+async def handle_admin_auth_async(tg_user_id: str, admin_repo: AsyncAdminRepo):
+    admin = await admin_repo.is_admin(tg_user_id)
+    return {"authorized": bool(admin)}
+
+
+async def handle_list_admins_async(admin_repo: AsyncAdminRepo):
+    return {"admins": await admin_repo.list_usernames()}
+
+
+async def handle_add_location_async(address: str, location_repo: AsyncLocationRepo):
+    if await location_repo.get_by_address(address):
+        raise Exception
+    await location_repo.create(address)
+    return {"status": "ok"}
+
+
+async def handle_list_locations_async(location_repo: AsyncLocationRepo):
+    return await location_repo.list_addresses()
+
+
+async def handle_rooms_by_location_async(address: str, location_repo: AsyncLocationRepo):
+    rooms = await location_repo.list_rooms_by_address(address)
+    if rooms is None:
         raise Exception
-    return [{"name": r.name, "qr_token": r.qr_token} for r in location.rooms]
+    return rooms
@@ -0,0 +1,233 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+
+from src.app.modules.messages.application.schemas import MessageItem, MessagePage, MessageSearchItem, MessageSearchPage
+from src.app.modules.messages.infrastructure.db.repos import (
+    RoomRepo,
+    LocationRepo,
+    MessageRepo,
+    AsyncRoomRepo,
+    AsyncLocationRepo,
+    AsyncMessageRepo
+)
+
+MAX_PAGE_SIZE = 500
+CSV_HEADER = ["id", "room", "text", "timestamp"]
+
+
+def encode_cursor(timestamp: datetime, message_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Некорректный курсор")
+
+
+def encode_search_cursor(rank: float, timestamp: datetime, message_id: int) -> str:
+    return encode_cursor(timestamp, message_id) + "." + base64.urlsafe_b64encode(repr(rank).encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, datetime, int]:
+    history_cursor, _, rank = cursor.partition(".")
+    timestamp, message_id = decode_cursor(history_cursor)
+    try:
+        return float(base64.urlsafe_b64decode(rank + "=" * (-len(rank) % 4)).decode()), timestamp, message_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Некорректный курсор")
+
+
+def _filters(since: datetime | None, until: datetime | None, cursor: str | None = None, **scope) -> dict:
+    filters = {"since": since, "until": until, **scope}
+    if cursor:
+        filters["before"] = decode_cursor(cursor)
+    return filters
+
+
+def _page(rows, limit: int) -> MessagePage:
+    items = [MessageItem(id=row.id, room=row.name, text=row.text, timestamp=row.timestamp) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+    return MessagePage(items=items, next_cursor=next_cursor)
+
+
+def _search_page(rows, limit: int) -> MessageSearchPage:
+    items = [
+        MessageSearchItem(id=row.id, room=row.name, text=row.text, timestamp=row.timestamp, rank=row.rank)
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_search_cursor(last.rank, last.timestamp, last.id)
+    return MessageSearchPage(items=items, next_cursor=next_cursor)
+
+
+def _search_filters(order: str, since: datetime | None, until: datetime | None, cursor: str | None, **scope) -> dict:
+    filters = {"order": order, "since": since, "until": until, **scope}
+    if cursor:
+        filters["after"] = decode_search_cursor(cursor)
+    return filters
+
+
+def _limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _ndjson_line(row) -> str:
+    return json.dumps(
+        {"id": row.id, "room": row.name, "text": row.text, "timestamp": row.timestamp.isoformat()},
+        ensure_ascii=False,
+    ) + "\n"
+
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def _csv_row(row) -> str:
+    return _csv_line([row.id, row.name, row.text, row.timestamp.isoformat()])
+
+
+def iter_export(rows, fmt: str):
+    if fmt == "csv":
+        yield _csv_line(CSV_HEADER)
+        for row in rows:
+            yield _csv_row(row)
+    else:
+        for row in rows:
+            yield _ndjson_line(row)
+
+
+async def iter_export_async(rows, fmt: str):
+    if fmt == "csv":
+        yield _csv_line(CSV_HEADER)
+        async for row in rows:
+            yield _csv_row(row)
+    else:
+        async for row in rows:
+            yield _ndjson_line(row)
+
+
+def _room_id(room_repo: RoomRepo, token: str) -> int:
+    room = room_repo.get_snapshot_by_token(token)
+    if not room:
+        raise LookupError("Комната не найдена")
+    return room.id
+
+
+def _location_id(location_repo: LocationRepo, address: str) -> int:
+    location = location_repo.get_by_address(address)
+    if not location:
+        raise LookupError("Адрес не найден")
+    return location.id
+
+
+def handle_room_history(token: str, room_repo: RoomRepo, message_repo: MessageRepo, limit: int,
+                        cursor: str | None, since: datetime | None, until: datetime | None) -> MessagePage:
+    limit = _limit(limit)
+    filters = _filters(since, until, cursor, room_id=_room_id(room_repo, token))
+    return _page(message_repo.list_history(limit + 1, **filters), limit)
+
+
+def handle_location_history(address: str, location_repo: LocationRepo, message_repo: MessageRepo, limit: int,
+                            cursor: str | None, since: datetime | None, until: datetime | None) -> MessagePage:
+    limit = _limit(limit)
+    filters = _filters(since, until, cursor, location_id=_location_id(location_repo, address))
+    return _page(message_repo.list_history(limit + 1, **filters), limit)
+
+
+def handle_export_room_history(token: str, room_repo: RoomRepo, message_repo: MessageRepo, fmt: str,
+                               since: datetime | None, until: datetime | None):
+    filters = _filters(since, until, room_id=_room_id(room_repo, token))
+    return iter_export(message_repo.stream_history(**filters), fmt)
+
+
+def handle_export_location_history(address: str, location_repo: LocationRepo, message_repo: MessageRepo, fmt: str,
+                                   since: datetime | None, until: datetime | None):
+    filters = _filters(since, until, location_id=_location_id(location_repo, address))
+    return iter_export(message_repo.stream_history(**filters), fmt)
+
+
+def handle_search_messages(query: str, room_repo: RoomRepo, location_repo: LocationRepo, message_repo: MessageRepo,
+                           limit: int, cursor: str | None, order: str, token: str | None = None,
+                           address: str | None = None, since: datetime | None = None,
+                           until: datetime | None = None) -> MessageSearchPage:
+    limit = _limit(limit)
+    scope = {}
+    if token:
+        scope["room_id"] = _room_id(room_repo, token)
+    if address:
+        scope["location_id"] = _location_id(location_repo, address)
+    filters = _search_filters(order, since, until, cursor, **scope)
+    return _search_page(message_repo.search(query, limit + 1, **filters), limit)
+
+
+# Async-версии для DB_BACKEND=async
+
+async def _room_id_async(room_repo: AsyncRoomRepo, token: str) -> int:
+    room = await room_repo.get_snapshot_by_token(token)
+    if not room:
+        raise LookupError("Комната не найдена")
+    return room.id
+
+
+async def _location_id_async(location_repo: AsyncLocationRepo, address: str) -> int:
+    location = await location_repo.get_by_address(address)
+    if not location:
+        raise LookupError("Адрес не найден")
+    return location.id
+
+
+async def handle_room_history_async(token: str, room_repo: AsyncRoomRepo, message_repo: AsyncMessageRepo, limit: int,
+                                    cursor: str | None, since: datetime | None, until: datetime | None) -> MessagePage:
+    limit = _limit(limit)
+    filters = _filters(since, until, cursor, room_id=await _room_id_async(room_repo, token))
+    return _page(await message_repo.list_history(limit + 1, **filters), limit)
+
+
+async def handle_location_history_async(address: str, location_repo: AsyncLocationRepo, message_repo: AsyncMessageRepo,
+                                        limit: int, cursor: str | None, since: datetime | None,
+                                        until: datetime | None) -> MessagePage:
+    limit = _limit(limit)
+    filters = _filters(since, until, cursor, location_id=await _location_id_async(location_repo, address))
+    return _page(await message_repo.list_history(limit + 1, **filters), limit)
+
+
+async def handle_export_room_history_async(token: str, room_repo: AsyncRoomRepo, message_repo: AsyncMessageRepo,
+                                           fmt: str, since: datetime | None, until: datetime | None):
+    filters = _filters(since, until, room_id=await _room_id_async(room_repo, token))
+    return iter_export_async(message_repo.stream_history(**filters), fmt)
+
+
+async def handle_export_location_history_async(address: str, location_repo: AsyncLocationRepo,
+                                               message_repo: AsyncMessageRepo, fmt: str, since: datetime | None,
+                                               until: datetime | None):
+    filters = _filters(since, until, location_id=await _location_id_async(location_repo, address))
+    return iter_export_async(message_repo.stream_history(**filters), fmt)
+
+
+async def handle_search_messages_async(query: str, room_repo: AsyncRoomRepo, location_repo: AsyncLocationRepo,
+                                       message_repo: AsyncMessageRepo, limit: int, cursor: str | None, order: str,
+                                       token: str | None = None, address: str | None = None,
+                                       since: datetime | None = None, until: datetime | None = None) -> MessageSearchPage:
+    limit = _limit(limit)
+    scope = {}
+    if token:
+        scope["room_id"] = await _room_id_async(room_repo, token)
+    if address:
+        scope["location_id"] = await _location_id_async(location_repo, address)
+    filters = _search_filters(order, since, until, cursor, **scope)
+    return _search_page(await message_repo.search(query, limit + 1, **filters), limit)
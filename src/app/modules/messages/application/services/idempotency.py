@@ -0,0 +1,56 @@
+import hashlib
+
+from src.app.modules.messages.infrastructure.cache import get_cache
+from src.app.settings import env
+
+IDEMPOTENCY_TTL = float(env("IDEMPOTENCY_TTL", "86400"))
+# Окно, в котором одинаковый текст для той же комнаты считается повтором; 0 — выключено
+FEEDBACK_DEDUP_WINDOW = float(env("FEEDBACK_DEDUP_WINDOW", "60"))
+
+
+def _keys(token: str, idempotency_key: str | None, text: str) -> list[str]:
+    keys = []
+    if idempotency_key:
+        keys.append(f"idem:{token}:{idempotency_key}")
+    if FEEDBACK_DEDUP_WINDOW > 0:
+        digest = hashlib.sha256(" ".join(text.split()).casefold().encode()).hexdigest()
+        keys.append(f"dedup:{token}:{digest}")
+    return keys
+
+
+def _ttl(key: str) -> float:
+    return IDEMPOTENCY_TTL if key.startswith("idem:") else FEEDBACK_DEDUP_WINDOW
+
+
+def claim_submission(token: str, idempotency_key: str | None, text: str) -> list[str] | None:
+    # Возвращает занятые ключи или None, если такая отправка уже была
+    cache = get_cache()
+    claimed = []
+    for key in _keys(token, idempotency_key, text):
+        if not cache.add(key, True, _ttl(key)):
+            release_submission(claimed)
+            return None
+        claimed.append(key)
+    return claimed
+
+
+async def claim_submission_async(token: str, idempotency_key: str | None, text: str) -> list[str] | None:
+    cache = get_cache()
+    claimed = []
+    for key in _keys(token, idempotency_key, text):
+        if not await cache.add_async(key, True, _ttl(key)):
+            await release_submission_async(claimed)
+            return None
+        claimed.append(key)
+    return claimed
+
+
+def release_submission(keys: list[str]):
+    # Запись не удалась — освобождаем ключи, чтобы повтор клиента прошёл
+    if keys:
+        get_cache().invalidate(*keys)
+
+
+async def release_submission_async(keys: list[str]):
+    if keys:
+        await get_cache().invalidate_async(*keys)
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from src.app.modules.messages.infrastructure.db.repos import (
+    RoomRepo,
+    LocationRepo,
+    StatsRepo,
+    AsyncRoomRepo,
+    AsyncLocationRepo,
+    AsyncStatsRepo
+)
+
+# Статистика читается только из агрегатов message_stats_hourly / message_stats_daily
+
+
+def _locations_result(granularity: str, rows):
+    return {
+        "granularity": granularity,
+        "locations": [{"address": address, "count": int(count)} for address, count in rows],
+    }
+
+
+def _location_result(address: str, granularity: str, rooms, series):
+    return {
+        "address": address,
+        "granularity": granularity,
+        "total": sum(int(count) for _, _, count in rooms),
+        "rooms": [{"name": name, "qr_token": qr_token, "count": int(count)} for name, qr_token, count in rooms],
+        "series": [{"bucket": bucket, "count": int(count)} for bucket, count in series],
+    }
+
+
+def handle_stats(address: str | None, token: str | None, granularity: str, since: datetime | None,
+                 until: datetime | None, location_repo: LocationRepo, room_repo: RoomRepo, stats_repo: StatsRepo):
+    if not address:
+        return _locations_result(granularity, stats_repo.locations_totals(granularity, since, until))
+    location = location_repo.get_by_address(address)
+    if not location:
+        raise LookupError("Адрес не найден")
+    room_id = None
+    if token:
+        room = room_repo.get_snapshot_by_token(token)
+        if not room:
+            raise LookupError("Комната не найдена")
+        room_id = room.id
+    rooms = stats_repo.rooms_totals(location.id, granularity, since, until)
+    series = stats_repo.series(location.id, granularity, since, until, room_id)
+    return _location_result(address, granularity, rooms, series)
+
+
+async def handle_stats_async(address: str | None, token: str | None, granularity: str, since: datetime | None,
+                             until: datetime | None, location_repo: AsyncLocationRepo, room_repo: AsyncRoomRepo,
+                             stats_repo: AsyncStatsRepo):
+    if not address:
+        return _locations_result(granularity, await stats_repo.locations_totals(granularity, since, until))
+    location = await location_repo.get_by_address(address)
+    if not location:
+        raise LookupError("Адрес не найден")
+    room_id = None
+    if token:
+        room = await room_repo.get_snapshot_by_token(token)
+        if not room:
+            raise LookupError("Комната не найдена")
+        room_id = room.id
+    rooms = await stats_repo.rooms_totals(location.id, granularity, since, until)
+    series = await stats_repo.series(location.id, granularity, since, until, room_id)
+    return _location_result(address, granularity, rooms, series)
@@ -0,0 +1,41 @@
+import threading
+
+from .memory import TTLCache, MemoryCacheBackend, MISSING
+from .redis_backend import RedisCacheBackend
+from src.app.settings import env, settings
+
+# memory — кэш внутри процесса, redis — общий кэш для всех воркеров
+CACHE_BACKEND = settings.cache_backend
+REDIS_URL = settings.redis_url
+CACHE_MAXSIZE = int(env("CACHE_MAXSIZE", "10000"))
+CACHE_LOCAL_TTL = float(env("CACHE_LOCAL_TTL", "5"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if CACHE_BACKEND == "redis":
+                    _cache = RedisCacheBackend(url=REDIS_URL, local_maxsize=CACHE_MAXSIZE, local_ttl=CACHE_LOCAL_TTL)
+                else:
+                    _cache = MemoryCacheBackend(maxsize=CACHE_MAXSIZE, default_ttl=300)
+    return _cache
+
+
+async def close_cache():
+    # При остановке приложения; следующий get_cache() создаст бэкенд заново
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        await cache.close_async()
+
+
+def set_cache(cache):
+    # Подмена бэкенда, например на RedisCacheBackend(client=fakeredis.FakeRedis(), async_client=fakeredis.FakeAsyncRedis())
+    global _cache
+    _cache = cache
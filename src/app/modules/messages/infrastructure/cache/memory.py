@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    # Ограниченный LRU-кэш с TTL; None тоже кэшируется (негативный кэш) со своим TTL
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float | None = None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def add(self, key, value, ttl: float) -> bool:
+        # Атомарно записывает значение, только если живого ключа ещё нет
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                return False
+            self._data[key] = (now + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class MemoryCacheBackend:
+    # Кэш в памяти процесса: инвалидация видна только текущему воркеру
+    def __init__(self, maxsize: int, default_ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=default_ttl)
+
+    def get(self, key: str):
+        return self._cache.get(key)
+
+    def set(self, key: str, value, ttl: float):
+        self._cache.set(key, value, ttl)
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        return self._cache.add(key, value, ttl)
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    # Тот же интерфейс, что у RedisCacheBackend, для async-репозиториев; сети нет, ждать нечего
+    async def get_async(self, key: str):
+        return self.get(key)
+
+    async def set_async(self, key: str, value, ttl: float):
+        self.set(key, value, ttl)
+
+    async def add_async(self, key: str, value, ttl: float) -> bool:
+        return self.add(key, value, ttl)
+
+    async def invalidate_async(self, *keys: str):
+        self.invalidate(*keys)
+
+    def clear(self):
+        self._cache.clear()
+
+    def close(self):
+        pass
+
+    async def close_async(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
@@ -0,0 +1,195 @@
+import json
+import logging
+import threading
+
+from .memory import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCacheBackend:
+    # Общий для всех воркеров кэш в Redis плюс короткоживущий локальный near-cache.
+    # Инвалидации публикуются в канал, и каждый воркер сбрасывает свою локальную копию.
+    # Методы *_async — для async-репозиториев: синхронный клиент заблокировал бы event loop на время запроса
+    def __init__(self, url: str | None = None, client=None, prefix: str = "feedback:",
+                 channel: str = "feedback:cache:invalidate", local_maxsize: int = 10000,
+                 local_ttl: float = 5.0, async_client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.url = url
+        self.client = client
+        self._async_client = async_client
+        self.prefix = prefix
+        self.channel = channel
+        self.local = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.local_ttl = local_ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._closed = threading.Event()
+        self._pubsub = None
+        self._listener = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+        self._listener.start()
+
+    @property
+    def async_client(self):
+        # Создаётся при первом async-вызове, внутри event loop, к которому привязаны его соединения
+        if self._async_client is None:
+            import redis.asyncio
+
+            self._async_client = redis.asyncio.Redis.from_url(self.url)
+        return self._async_client
+
+    def _local_get(self, key: str):
+        value = self.local.get(key)
+        if value is not MISSING:
+            self.hits += 1
+        return value
+
+    def _loaded(self, key: str, raw):
+        if raw is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value, self.local_ttl)
+        return value
+
+    def get(self, key: str):
+        value = self._local_get(key)
+        if value is not MISSING:
+            return value
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            # Redis недоступен — работаем как при промахе, запрос уйдёт в БД
+            self.errors += 1
+            logger.warning("Redis cache get failed", exc_info=True)
+            return MISSING
+        return self._loaded(key, raw)
+
+    async def get_async(self, key: str):
+        value = self._local_get(key)
+        if value is not MISSING:
+            return value
+        try:
+            raw = await self.async_client.get(self.prefix + key)
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache get failed", exc_info=True)
+            return MISSING
+        return self._loaded(key, raw)
+
+    def set(self, key: str, value, ttl: float):
+        self.local.set(key, value, min(ttl, self.local_ttl))
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache set failed", exc_info=True)
+
+    async def set_async(self, key: str, value, ttl: float):
+        self.local.set(key, value, min(ttl, self.local_ttl))
+        try:
+            await self.async_client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache set failed", exc_info=True)
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        # SET NX без локального near-cache: решение должно быть общим для всех воркеров
+        try:
+            return bool(self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000), nx=True))
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache add failed", exc_info=True)
+            return True
+
+    async def add_async(self, key: str, value, ttl: float) -> bool:
+        try:
+            return bool(await self.async_client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000), nx=True))
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache add failed", exc_info=True)
+            return True
+
+    def _invalidation_pipeline(self, client, keys: tuple[str, ...]):
+        for key in keys:
+            self.local.delete(key)
+        pipe = client.pipeline()
+        pipe.delete(*(self.prefix + key for key in keys))
+        for key in keys:
+            pipe.publish(self.channel, key)
+        return pipe
+
+    def invalidate(self, *keys: str):
+        if not keys:
+            return
+        try:
+            self._invalidation_pipeline(self.client, keys).execute()
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache invalidation failed", exc_info=True)
+
+    async def invalidate_async(self, *keys: str):
+        if not keys:
+            return
+        try:
+            await self._invalidation_pipeline(self.async_client, keys).execute()
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis cache invalidation failed", exc_info=True)
+
+    def clear(self):
+        self.local.clear()
+
+    def close(self):
+        # Закрытие pubsub прерывает ожидание сообщения в потоке-слушателе, иначе он остался бы висеть
+        self._closed.set()
+        pubsub = self._pubsub
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                logger.debug("Cache invalidation pubsub close failed", exc_info=True)
+        self._listener.join(timeout=2.0)
+        self.client.close()
+
+    async def close_async(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "local": self.local.stats(),
+        }
+
+    def _listen(self):
+        while not self._closed.is_set():
+            pubsub = self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                # get_message с таймаутом, а не listen(): флаг закрытия проверяется хотя бы раз в секунду
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    key = message.get("data") if message else None
+                    if isinstance(key, bytes):
+                        key = key.decode()
+                    if isinstance(key, str):
+                        self.local.delete(key)
+            except Exception:
+                if self._closed.is_set():
+                    return
+                # После разрыва соединения локальный кэш мог пропустить инвалидации
+                logger.warning("Cache invalidation listener reconnecting", exc_info=True)
+                self.local.clear()
+                self._closed.wait(1.0)
+            finally:
+                pubsub.close()
@@ -2,4 +2,7 @@ from .base import Base
 from .messages import Message
 from .rooms import Room
 from .locations import Location
-from .admins import Admin
\ No newline at end of file
+from .admins import Admin
+from .outbox import TelegramOutbox
+from .stats import MessageStatsHourly, MessageStatsDaily
+from .fsm import BotFsmState
\ No newline at end of file
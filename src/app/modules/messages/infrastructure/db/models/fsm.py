@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Text, TIMESTAMP, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from src.app.modules.messages.infrastructure.db.models import Base
+
+class BotFsmState(Base):
+    __tablename__ = "bot_fsm_states"
+    __table_args__ = (
+        Index("ix_bot_fsm_states_expires_at", "expires_at"),
+    )
+    key = Column(Text, primary_key=True)
+    state = Column(Text)
+    data = Column(JSONB, nullable=False, server_default="{}")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(TIMESTAMP(timezone=True))
@@ -6,5 +6,5 @@ from src.app.modules.messages.infrastructure.db.models import Base
 class Location(Base):
     __tablename__ = "locations"
     id = Column(Integer, primary_key=True)
-    address = Column(Text, nullable=False)
+    address = Column(Text, nullable=False, unique=True)
     rooms = relationship("Room", back_populates="location")
\ No newline at end of file
@@ -1,10 +1,23 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, Computed, Integer, Text, ForeignKey, TIMESTAMP, Index, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 
 from src.app.modules.messages.infrastructure.db.models import Base
 
 class Message(Base):
     __tablename__ = "messages"
-    id = Column(Integer, primary_key=True)
+    # Помесячные партиции по timestamp; ключ партиционирования обязан входить в первичный ключ
+    __table_args__ = (
+        Index("ix_messages_room_id_timestamp", "room_id", "timestamp"),
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
     room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"))
     text = Column(Text, nullable=False)
-    timestamp = Column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
+    timestamp = Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False, server_default=func.now())
+    # Полнотекстовый поиск: русская и английская морфология, колонку вычисляет Postgres
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('russian'::regconfig, text) || to_tsvector('english'::regconfig, text)", persisted=True),
+    ))
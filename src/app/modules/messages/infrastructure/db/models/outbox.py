@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, TIMESTAMP, Index, func, text
+
+from src.app.modules.messages.infrastructure.db.models import Base
+
+class TelegramOutbox(Base):
+    __tablename__ = "telegram_outbox"
+    __table_args__ = (
+        Index("ix_telegram_outbox_pending", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(BigInteger, nullable=False)
+    text = Column(Text, nullable=False)
+    status = Column(String, nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text)
+    next_attempt_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    sent_at = Column(TIMESTAMP(timezone=True))
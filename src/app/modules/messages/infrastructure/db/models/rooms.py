@@ -5,7 +5,7 @@ from src.app.modules.messages.infrastructure.db.models import Base
 class Room(Base):
     __tablename__ = "rooms"
     id = Column(Integer, primary_key=True)
-    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"))
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), index=True)
     name = Column(Text, nullable=False)
     tg_group_id = Column(BigInteger, nullable=False)
     qr_token = Column(String, unique=True, nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, TIMESTAMP
+
+from src.app.modules.messages.infrastructure.db.models import Base
+
+class MessageStatsHourly(Base):
+    __tablename__ = "message_stats_hourly"
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(TIMESTAMP(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False)
+
+class MessageStatsDaily(Base):
+    __tablename__ = "message_stats_daily"
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False)
@@ -0,0 +1,129 @@
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.app.settings import env
+
+# Сколько месяцев держать в messages; 0 — хранить всё
+MESSAGES_RETENTION_MONTHS = int(env("MESSAGES_RETENTION_MONTHS", "0"))
+# Куда выгружать старые партиции перед удалением; пусто — только отсоединить (DETACH)
+MESSAGES_ARCHIVE_DIR = env("MESSAGES_ARCHIVE_DIR", "")
+MESSAGES_PARTITIONS_AHEAD = int(env("MESSAGES_PARTITIONS_AHEAD", "3"))
+
+PARTITION_NAME = re.compile(r"^messages_(\d{4})_(\d{2})$")
+DEFAULT_PARTITION = "messages_default"
+
+
+class Partition(NamedTuple):
+    name: str
+    start: date
+    end: date
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_partition(month: date) -> Partition:
+    start = month.replace(day=1)
+    return Partition(f"messages_{start:%Y_%m}", start, add_months(start, 1))
+
+
+def list_partitions(db: Session) -> list[Partition]:
+    # Месячные партиции messages по имени; DEFAULT-партиция сюда не попадает
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'messages'::regclass"
+    )).scalars()
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append(month_partition(date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def missing_partitions(db: Session, ahead: int = MESSAGES_PARTITIONS_AHEAD, today: date | None = None) -> list[Partition]:
+    # Партиции на текущий месяц и ahead месяцев вперёд, чтобы вставки не уходили в DEFAULT
+    current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    existing = {partition.name for partition in list_partitions(db)}
+    needed = [month_partition(add_months(current, offset)) for offset in range(ahead + 1)]
+    return [partition for partition in needed if partition.name not in existing]
+
+
+def ensure_partitions(db: Session, ahead: int = MESSAGES_PARTITIONS_AHEAD, today: date | None = None) -> list[str]:
+    created = []
+    for partition in missing_partitions(db, ahead, today):
+        create_partition(db, partition)
+        db.commit()
+        created.append(partition.name)
+    return created
+
+
+def create_partition(db: Session, partition: Partition):
+    bounds = f"FOR VALUES FROM ('{partition.start}') TO ('{partition.end}')"
+    has_default_rows = db.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE timestamp >= :start AND timestamp < :end)'
+    ), {"start": partition.start, "end": partition.end}).scalar()
+    if not has_default_rows:
+        db.execute(text(f'CREATE TABLE "{partition.name}" PARTITION OF messages {bounds}'))
+        return
+    # Строки месяца уже попали в DEFAULT (партиции не было вовремя): с ними CREATE ... PARTITION OF падает.
+    # DEFAULT отсоединяется на время переноса, строки переезжают в новую партицию через родителя —
+    # индексы и search_vector строятся как при обычной вставке. Всё в одной транзакции вызывающего кода
+    db.execute(text(f'ALTER TABLE messages DETACH PARTITION "{DEFAULT_PARTITION}"'))
+    db.execute(text(f'CREATE TABLE "{partition.name}" PARTITION OF messages {bounds}'))
+    db.execute(text(
+        f"INSERT INTO messages (id, room_id, text, timestamp) "
+        f'SELECT id, room_id, text, timestamp FROM "{DEFAULT_PARTITION}" WHERE timestamp >= :start AND timestamp < :end'
+    ), {"start": partition.start, "end": partition.end})
+    db.execute(text(
+        f'DELETE FROM "{DEFAULT_PARTITION}" WHERE timestamp >= :start AND timestamp < :end'
+    ), {"start": partition.start, "end": partition.end})
+    db.execute(text(f'ALTER TABLE messages ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT'))
+
+
+def expired_partitions(db: Session, retention_months: int, today: date | None = None) -> list[Partition]:
+    if retention_months <= 0:
+        return []
+    cutoff = add_months((today or datetime.now(timezone.utc).date()).replace(day=1), -retention_months)
+    return [partition for partition in list_partitions(db) if partition.end <= cutoff]
+
+
+def detach_partition(db: Session, partition: Partition):
+    db.execute(text(f'ALTER TABLE messages DETACH PARTITION "{partition.name}"'))
+    db.commit()
+
+
+def archive_partition(db: Session, partition: Partition, directory: str) -> str:
+    # Сначала COPY в gzip-файл, пока партиция ещё подключена, и только после этого DETACH и DROP в одной
+    # транзакции: при сбое выгрузки партиция остаётся на месте и следующий запуск повторит попытку.
+    # Файл пишется под временным именем, чтобы не оставить обрезанный архив
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{partition.name}.csv.gz")
+    tmp_path = path + ".tmp"
+    cursor = db.connection().connection.cursor()
+    try:
+        with gzip.open(tmp_path, "wb") as archive:
+            cursor.copy_expert(
+                f'COPY "{partition.name}" (id, room_id, text, timestamp) TO STDOUT WITH (FORMAT csv, HEADER)', archive
+            )
+    except BaseException:
+        db.rollback()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        cursor.close()
+    os.replace(tmp_path, path)
+    db.execute(text(f'ALTER TABLE messages DETACH PARTITION "{partition.name}"'))
+    db.execute(text(f'DROP TABLE "{partition.name}"'))
+    db.commit()
+    return path
@@ -0,0 +1,114 @@
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+
+from src.app.settings import env
+
+DB_POOL_SIZE = int(env("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(env("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(env("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(env("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = env("DB_POOL_PRE_PING", "0") == "1"
+# Режим совместимости с PgBouncer (transaction pooling): без собственного пула и без prepared statements
+DB_PGBOUNCER = env("DB_PGBOUNCER", "0") == "1"
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def observe(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            if wait > self.wait_max:
+                self.wait_max = wait
+
+    def timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+class TimedQueuePool(QueuePool):
+    # Замеряет время ожидания свободного соединения при checkout.
+    # Счётчики свои у каждого пула, иначе движки sync и отдельных тестов складывались бы вместе
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeout()
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return conn
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeout()
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return conn
+
+
+def engine_kwargs(is_async: bool = False) -> dict:
+    if DB_PGBOUNCER:
+        kwargs = {"poolclass": NullPool}
+        if is_async:
+            # asyncpg по умолчанию кэширует prepared statements, что ломается за PgBouncer.
+            # Даже без кэша unnamed-выражений не избежать, а за PgBouncer соседние клиенты
+            # делят серверное соединение — поэтому имена выражений делаются уникальными
+            kwargs["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return kwargs
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_stats(pool) -> dict:
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    timed = getattr(pool, "stats", None)
+    if isinstance(timed, PoolStats):
+        stats.update({
+            "checkouts_total": timed.checkouts,
+            "checkout_timeouts_total": timed.timeouts,
+            "checkout_wait_seconds_total": timed.wait_total,
+            "checkout_wait_seconds_max": timed.wait_max,
+        })
+    return stats
@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    # Считает SQL-запросы, отправленные через engine внутри блока:
+    #   with count_queries(engine) as counter: ...; assert counter.count == 1
+    sync_engine = getattr(engine, "sync_engine", engine)
+    counter = QueryCounter()
+    event.listen(sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", counter)
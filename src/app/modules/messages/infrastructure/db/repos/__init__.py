@@ -1,9 +1,11 @@
 from fastapi import Depends
-from src.app.modules.messages.infrastructure.db.session import get_db
-from .messages import MessageRepo
-from .admins import AdminRepo
-from .locations import LocationRepo
-from .rooms import RoomRepo
+from src.app.modules.messages.infrastructure.db.session import get_db, get_async_db, SessionLocal, AsyncSessionLocal
+from .messages import MessageRepo, AsyncMessageRepo, PendingMessage
+from .admins import AdminRepo, AsyncAdminRepo
+from .locations import LocationRepo, AsyncLocationRepo, invalidate_locations, invalidate_locations_async
+from .rooms import RoomRepo, AsyncRoomRepo, RoomSnapshot, invalidate_room_token, invalidate_room_token_async, peek_room_snapshot, peek_room_snapshot_async
+from .outbox import OutboxRepo
+from .stats import StatsRepo, AsyncStatsRepo
 
 def get_room_repo(db=Depends(get_db)):
     return RoomRepo(db)
@@ -15,4 +17,29 @@ def get_message_repo(db=Depends(get_db)):
     return MessageRepo(db)
 
 def get_admin_repo(db=Depends(get_db)):
-    return AdminRepo(db)
\ No newline at end of file
+    return AdminRepo(db)
+
+def get_stats_repo(db=Depends(get_db)):
+    return StatsRepo(db)
+
+def get_streaming_message_repo():
+    # Отдельная сессия для StreamingResponse: её закрывает MessageRepo.stream_history
+    return MessageRepo(SessionLocal())
+
+def get_async_room_repo(db=Depends(get_async_db)):
+    return AsyncRoomRepo(db)
+
+def get_async_location_repo(db=Depends(get_async_db)):
+    return AsyncLocationRepo(db)
+
+def get_async_message_repo(db=Depends(get_async_db)):
+    return AsyncMessageRepo(db)
+
+def get_async_admin_repo(db=Depends(get_async_db)):
+    return AsyncAdminRepo(db)
+
+def get_async_stats_repo(db=Depends(get_async_db)):
+    return AsyncStatsRepo(db)
+
+def get_async_streaming_message_repo():
+    return AsyncMessageRepo(AsyncSessionLocal())
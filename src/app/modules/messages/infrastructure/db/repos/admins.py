@@ -1,9 +1,63 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+
 from src.app.modules.messages.infrastructure.db.models import Admin
+from src.app.modules.messages.infrastructure.cache import get_cache, MISSING
+from src.app.settings import env
+
+ADMIN_CACHE_TTL = float(env("ADMIN_CACHE_TTL", "60"))
+ADMIN_CACHE_NEGATIVE_TTL = float(env("ADMIN_CACHE_NEGATIVE_TTL", "10"))
+
+
+def _admin_key(username: str) -> str:
+    return f"admin:{username}"
+
+
+def _admin_ttl(is_admin: bool) -> float:
+    return ADMIN_CACHE_TTL if is_admin else ADMIN_CACHE_NEGATIVE_TTL
+
+
+def _store_admin(username: str, is_admin: bool) -> bool:
+    get_cache().set(_admin_key(username), is_admin, _admin_ttl(is_admin))
+    return is_admin
+
+
+async def _store_admin_async(username: str, is_admin: bool) -> bool:
+    await get_cache().set_async(_admin_key(username), is_admin, _admin_ttl(is_admin))
+    return is_admin
+
+
+def invalidate_admin(username: str):
+    get_cache().invalidate(_admin_key(username))
+
 
 class AdminRepo:
     def __init__(self, db: Session):
         self.db = db
 
     def is_admin(self, username: str) -> bool:
-        return self.db.query(Admin).filter(Admin.username == username).first() is not None
+        cached = get_cache().get(_admin_key(username))
+        if cached is not MISSING:
+            return cached
+        exists = self.db.query(Admin.id).filter(Admin.username == username).first() is not None
+        return _store_admin(username, exists)
+
+    def list_usernames(self) -> list[str]:
+        return [username for (username,) in self.db.query(Admin.username).order_by(Admin.id)]
+
+
+class AsyncAdminRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def is_admin(self, username: str) -> bool:
+        cached = await get_cache().get_async(_admin_key(username))
+        if cached is not MISSING:
+            return cached
+        result = await self.db.execute(select(Admin.id).where(Admin.username == username).limit(1))
+        return await _store_admin_async(username, result.first() is not None)
+
+    async def list_usernames(self) -> list[str]:
+        result = await self.db.execute(select(Admin.username).order_by(Admin.id))
+        return list(result.scalars().all())
@@ -1,5 +1,55 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.app.modules.messages.infrastructure.db.models import Location
+
+from src.app.modules.messages.infrastructure.db.models import Location, Room
+from src.app.modules.messages.infrastructure.cache import get_cache, MISSING
+from src.utils import chunked
+from src.app.settings import env
+
+LOCATIONS_CACHE_TTL = float(env("LOCATIONS_CACHE_TTL", "300"))
+LOCATIONS_KEY = "locations:addresses"
+BULK_CHUNK_SIZE = 1000
+
+
+def invalidate_locations():
+    get_cache().invalidate(LOCATIONS_KEY)
+
+
+async def invalidate_locations_async():
+    await get_cache().invalidate_async(LOCATIONS_KEY)
+
+
+def _rooms_by_address_query(address: str):
+    # Один SELECT вместо Location + lazy load location.rooms; outer join отличает пустой адрес от несуществующего
+    return (
+        select(Room.name, Room.qr_token)
+        .select_from(Location)
+        .outerjoin(Room, Room.location_id == Location.id)
+        .where(Location.address == address)
+        .order_by(Room.id)
+    )
+
+
+def _existing_locations_query(addresses: list[str]):
+    return select(Location.address, Location.id).where(Location.address.in_(addresses))
+
+
+def _insert_locations_stmt(addresses: list[str]):
+    # Адрес, вставленный параллельно другой транзакцией, пропускается и перечитывается
+    return (
+        pg_insert(Location)
+        .values([{"address": address} for address in addresses])
+        .on_conflict_do_nothing(index_elements=[Location.address])
+        .returning(Location.address, Location.id)
+    )
+
+
+def _rooms_from_rows(rows):
+    if not rows:
+        return None
+    return [{"name": name, "qr_token": qr_token} for name, qr_token in rows if qr_token is not None]
 
 class LocationRepo:
     def __init__(self, db: Session):
@@ -13,7 +63,79 @@ class LocationRepo:
         self.db.add(location)
         self.db.commit()
         self.db.refresh(location)
+        invalidate_locations()
         return location
 
+    def upsert_many(self, addresses: list[str]) -> dict[str, int]:
+        # Без commit: адреса вставляются в транзакции вызывающего кода (см. RoomRepo.create_many)
+        unique = list(dict.fromkeys(addresses))
+        ids = {}
+        for chunk in chunked(unique, BULK_CHUNK_SIZE):
+            ids.update(self.db.execute(_existing_locations_query(chunk)).all())
+        missing = [address for address in unique if address not in ids]
+        for chunk in chunked(missing, BULK_CHUNK_SIZE):
+            ids.update(self.db.execute(_insert_locations_stmt(chunk)).all())
+        raced = [address for address in missing if address not in ids]
+        for chunk in chunked(raced, BULK_CHUNK_SIZE):
+            ids.update(self.db.execute(_existing_locations_query(chunk)).all())
+        return ids
+
+    def list_rooms_by_address(self, address: str):
+        return _rooms_from_rows(self.db.execute(_rooms_by_address_query(address)).all())
+
+    def list_addresses(self) -> list[str]:
+        addresses = get_cache().get(LOCATIONS_KEY)
+        if addresses is MISSING:
+            addresses = [address for (address,) in self.db.query(Location.address).order_by(Location.id)]
+            get_cache().set(LOCATIONS_KEY, addresses, LOCATIONS_CACHE_TTL)
+        return addresses
+
+    # После методов с аннотациями list[...]: имя метода перекрывает встроенный list в теле класса
     def list(self):
         return self.db.query(Location).all()
+
+
+class AsyncLocationRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_address(self, address: str):
+        result = await self.db.execute(select(Location).where(Location.address == address))
+        return result.scalars().first()
+
+    async def create(self, address: str):
+        location = Location(address=address)
+        self.db.add(location)
+        await self.db.commit()
+        await self.db.refresh(location)
+        await invalidate_locations_async()
+        return location
+
+    async def upsert_many(self, addresses: list[str]) -> dict[str, int]:
+        unique = list(dict.fromkeys(addresses))
+        ids = {}
+        for chunk in chunked(unique, BULK_CHUNK_SIZE):
+            ids.update((await self.db.execute(_existing_locations_query(chunk))).all())
+        missing = [address for address in unique if address not in ids]
+        for chunk in chunked(missing, BULK_CHUNK_SIZE):
+            ids.update((await self.db.execute(_insert_locations_stmt(chunk))).all())
+        raced = [address for address in missing if address not in ids]
+        for chunk in chunked(raced, BULK_CHUNK_SIZE):
+            ids.update((await self.db.execute(_existing_locations_query(chunk))).all())
+        return ids
+
+    async def list_rooms_by_address(self, address: str):
+        result = await self.db.execute(_rooms_by_address_query(address))
+        return _rooms_from_rows(result.all())
+
+    async def list_addresses(self) -> list[str]:
+        addresses = await get_cache().get_async(LOCATIONS_KEY)
+        if addresses is MISSING:
+            result = await self.db.execute(select(Location.address).order_by(Location.id))
+            addresses = list(result.scalars().all())
+            await get_cache().set_async(LOCATIONS_KEY, addresses, LOCATIONS_CACHE_TTL)
+        return addresses
+
+    async def list(self):
+        result = await self.db.execute(select(Location))
+        return result.scalars().all()
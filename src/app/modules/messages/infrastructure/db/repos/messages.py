@@ -1,16 +1,180 @@
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import cast, func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import REAL, REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.app.modules.messages.infrastructure.db.models import Message
+from src.app.modules.messages.infrastructure.db.models import Message, Room, TelegramOutbox
+from .outbox import OutboxRepo
+from .stats import StatsRepo, AsyncStatsRepo, STATS_ROLLUP_INLINE, rollup_increment_many_statements
+from src.app.modules.messages.infrastructure.db.stats_buffer import stats_rollup_buffer
+
+STREAM_BATCH_SIZE = 1000
+
+
+class PendingMessage(NamedTuple):
+    room_id: int
+    text: str
+    notify_chat_id: int | None = None
+    notify_text: str | None = None
+
+
+def _create_many_statements(items: list[PendingMessage]):
+    # Многострочные INSERT сообщений, outbox и счётчиков статистики — по одному на таблицу
+    statements = [(insert(Message), [{"room_id": item.room_id, "text": item.text} for item in items])]
+    notify = [{"chat_id": item.notify_chat_id, "text": item.notify_text} for item in items if item.notify_chat_id is not None]
+    if notify:
+        statements.append((insert(TelegramOutbox), notify))
+    if STATS_ROLLUP_INLINE:
+        statements.extend((stmt, None) for stmt in rollup_increment_many_statements(Counter(item.room_id for item in items)))
+    return statements
+
+
+def _history_query(room_id: int | None = None, location_id: int | None = None, since: datetime | None = None,
+                   until: datetime | None = None, before: tuple[datetime, int] | None = None):
+    # Keyset-пагинация по (timestamp, id) от новых к старым
+    stmt = select(Message.id, Room.name, Message.text, Message.timestamp).join(Room, Message.room_id == Room.id)
+    if room_id is not None:
+        stmt = stmt.where(Message.room_id == room_id)
+    if location_id is not None:
+        stmt = stmt.where(Room.location_id == location_id)
+    if since is not None:
+        stmt = stmt.where(Message.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(Message.timestamp < until)
+    if before is not None:
+        # Сравнение кортежей планировщик не использует для отсечения партиций — дублируем границу по timestamp
+        stmt = stmt.where(Message.timestamp <= before[0], tuple_(Message.timestamp, Message.id) < before)
+    return stmt.order_by(Message.timestamp.desc(), Message.id.desc())
+
+def _search_tsquery(query: str):
+    # websearch_to_tsquery понимает кавычки, OR и минус; запрос разбирается обеими морфологиями, как и колонка
+    return func.websearch_to_tsquery(cast("russian", REGCONFIG), query).op("||")(
+        func.websearch_to_tsquery(cast("english", REGCONFIG), query)
+    )
+
+
+def _search_query(query: str, order: str = "rank", room_id: int | None = None, location_id: int | None = None,
+                  since: datetime | None = None, until: datetime | None = None,
+                  after: tuple[float, datetime, int] | None = None):
+    tsquery = _search_tsquery(query)
+    rank = func.ts_rank_cd(Message.search_vector, tsquery)
+    stmt = (
+        select(Message.id, Room.name, Message.text, Message.timestamp, rank.label("rank"))
+        .join(Room, Message.room_id == Room.id)
+        .where(Message.search_vector.op("@@")(tsquery))
+    )
+    if room_id is not None:
+        stmt = stmt.where(Message.room_id == room_id)
+    if location_id is not None:
+        stmt = stmt.where(Room.location_id == location_id)
+    if since is not None:
+        stmt = stmt.where(Message.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(Message.timestamp < until)
+    if order == "rank":
+        if after is not None:
+            # ts_rank_cd возвращает real: курсор приводится обратно к real, иначе строка на границе страницы повторится
+            stmt = stmt.where(tuple_(rank, Message.timestamp, Message.id) < tuple_(cast(after[0], REAL), after[1], after[2]))
+        return stmt.order_by(rank.desc(), Message.timestamp.desc(), Message.id.desc())
+    if after is not None:
+        stmt = stmt.where(Message.timestamp <= after[1], tuple_(Message.timestamp, Message.id) < (after[1], after[2]))
+    return stmt.order_by(Message.timestamp.desc(), Message.id.desc())
+
 
 class MessageRepo:
     def __init__(self, db: Session):
         self.db = db
 
-    def create(self, room_id: int, text: str):
+    def create(self, room_id: int, text: str, notify_chat_id: int | None = None, notify_text: str | None = None):
         message = Message(room_id=room_id, text=text)
         self.db.add(message)
+        if notify_chat_id is not None:
+            # Уведомление пишется в outbox в той же транзакции, что и сообщение
+            OutboxRepo(self.db).add(notify_chat_id, notify_text)
+        # Счётчики статистики — пачкой через stats_rollup_buffer, если он запущен (в процессе API),
+        # иначе в той же транзакции (скрипты, STATS_ROLLUP_FLUSH_INTERVAL=0)
+        buffered = STATS_ROLLUP_INLINE and stats_rollup_buffer.running
+        if STATS_ROLLUP_INLINE and not buffered:
+            StatsRepo(self.db).increment(room_id)
+        if buffered:
+            # timestamp входит в первичный ключ и приходит в RETURNING того же INSERT; после commit он истечёт
+            self.db.flush()
+            timestamp = message.timestamp
+        # Без refresh: id и timestamp обработчику не нужны, лишний SELECT после commit не делаем
         self.db.commit()
-        self.db.refresh(message)
+        if buffered:
+            stats_rollup_buffer.add(room_id, timestamp)
         return message
 
+    def create_many(self, items: list[PendingMessage]):
+        # Одна транзакция и один commit на всю пачку (group commit буфера записи)
+        for stmt, params in _create_many_statements(items):
+            self.db.execute(stmt, params)
+        self.db.commit()
+
     def list_by_room(self, room_id: int):
         return self.db.query(Message).filter(Message.room_id == room_id).all()
+
+    def list_history(self, limit: int, **filters):
+        return self.db.execute(_history_query(**filters).limit(limit)).all()
+
+    def search(self, query: str, limit: int, **filters):
+        return self.db.execute(_search_query(query, **filters).limit(limit)).all()
+
+    def stream_history(self, **filters):
+        # Серверный курсор (yield_per): экспорт любого объёма в постоянной памяти.
+        # Генератор сам закрывает сессию, т.к. ответ отдаётся уже после выхода из зависимостей FastAPI.
+        try:
+            result = self.db.execute(_history_query(**filters).execution_options(yield_per=STREAM_BATCH_SIZE))
+            yield from result
+        finally:
+            self.db.close()
+
+
+class AsyncMessageRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, room_id: int, text: str, notify_chat_id: int | None = None, notify_text: str | None = None):
+        message = Message(room_id=room_id, text=text)
+        self.db.add(message)
+        if notify_chat_id is not None:
+            OutboxRepo(self.db).add(notify_chat_id, notify_text)
+        buffered = STATS_ROLLUP_INLINE and stats_rollup_buffer.running
+        if STATS_ROLLUP_INLINE and not buffered:
+            await AsyncStatsRepo(self.db).increment(room_id)
+        if buffered:
+            await self.db.flush()
+            timestamp = message.timestamp
+        await self.db.commit()
+        if buffered:
+            stats_rollup_buffer.add(room_id, timestamp)
+        return message
+
+    async def create_many(self, items: list[PendingMessage]):
+        for stmt, params in _create_many_statements(items):
+            await self.db.execute(stmt, params)
+        await self.db.commit()
+
+    async def list_by_room(self, room_id: int):
+        result = await self.db.execute(select(Message).where(Message.room_id == room_id))
+        return result.scalars().all()
+
+    async def list_history(self, limit: int, **filters):
+        result = await self.db.execute(_history_query(**filters).limit(limit))
+        return result.all()
+
+    async def search(self, query: str, limit: int, **filters):
+        result = await self.db.execute(_search_query(query, **filters).limit(limit))
+        return result.all()
+
+    async def stream_history(self, **filters):
+        try:
+            result = await self.db.stream(_history_query(**filters).execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for row in result:
+                yield row
+        finally:
+            await self.db.close()
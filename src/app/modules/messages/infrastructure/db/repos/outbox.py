@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from src.app.modules.messages.infrastructure.db.models import TelegramOutbox
+
+class OutboxRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add(self, chat_id: int, text: str):
+        # Без commit: запись попадает в транзакцию вызывающего репозитория
+        entry = TelegramOutbox(chat_id=chat_id, text=text)
+        self.db.add(entry)
+        return entry
+
+    def claim_due(self, limit: int, lease_seconds: float):
+        # Забираем пачку готовых к отправке записей и сдвигаем next_attempt_at на время аренды,
+        # чтобы параллельные диспетчеры не отправили их повторно
+        now = datetime.now(timezone.utc)
+        entries = (
+            self.db.query(TelegramOutbox)
+            .filter(TelegramOutbox.status == "pending", TelegramOutbox.next_attempt_at <= now)
+            .order_by(TelegramOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        lease_until = now + timedelta(seconds=lease_seconds)
+        claimed = []
+        for entry in entries:
+            entry.next_attempt_at = lease_until
+            entry.attempts += 1
+            claimed.append((entry.id, entry.chat_id, entry.text, entry.attempts))
+        self.db.commit()
+        return claimed
+
+    def mark_sent(self, ids: list[int]):
+        if not ids:
+            return
+        self.db.execute(
+            update(TelegramOutbox)
+            .where(TelegramOutbox.id.in_(ids))
+            .values(status="sent", sent_at=datetime.now(timezone.utc), last_error=None)
+        )
+        self.db.commit()
+
+    def reschedule(self, entry_id: int, error: str, delay: float):
+        self.db.execute(
+            update(TelegramOutbox)
+            .where(TelegramOutbox.id == entry_id)
+            .values(next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=delay), last_error=error)
+        )
+        self.db.commit()
+
+    def defer(self, ids: list[int], delay: float, error: str | None = None):
+        # Отложено из-за лимита отправки (своего или 429 от Telegram) — попытка не засчитывается
+        if not ids:
+            return
+        values = {
+            "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            "attempts": TelegramOutbox.attempts - 1,
+        }
+        if error is not None:
+            values["last_error"] = error
+        self.db.execute(update(TelegramOutbox).where(TelegramOutbox.id.in_(ids)).values(**values))
+        self.db.commit()
+
+    def mark_failed(self, entry_id: int, error: str):
+        self.db.execute(
+            update(TelegramOutbox)
+            .where(TelegramOutbox.id == entry_id)
+            .values(status="failed", last_error=error)
+        )
+        self.db.commit()
+
+    def prune(self, older_than: timedelta, batch_size: int = 1000) -> int:
+        # Отправленные и окончательно не доставленные записи старше срока хранения удаляются пачками,
+        # чтобы не держать долгую блокировку; pending не трогаются независимо от возраста
+        cutoff = datetime.now(timezone.utc) - older_than
+        deleted = 0
+        while True:
+            ids = (
+                select(TelegramOutbox.id)
+                .where(TelegramOutbox.status.in_(("sent", "failed")), TelegramOutbox.created_at < cutoff)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            count = self.db.execute(delete(TelegramOutbox).where(TelegramOutbox.id.in_(ids))).rowcount
+            self.db.commit()
+            deleted += count
+            if count < batch_size:
+                return deleted
@@ -1,22 +1,205 @@
-from sqlalchemy.orm import Session
-from src.app.modules.messages.infrastructure.db.models import Room
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload
+from typing import NamedTuple
+
+from src.app.modules.messages.infrastructure.db.models import Room, Location
+from src.app.modules.messages.infrastructure.cache import get_cache, MISSING
+from src.utils import chunked
+from src.app.settings import env
+
+
+class RoomSnapshot(NamedTuple):
+    id: int
+    name: str
+    address: str
+    tg_group_id: int
+
+
+ROOM_CACHE_TTL = float(env("ROOM_CACHE_TTL", "300"))
+ROOM_CACHE_NEGATIVE_TTL = float(env("ROOM_CACHE_NEGATIVE_TTL", "30"))
+BULK_CHUNK_SIZE = 1000
+BULK_TOKEN_ATTEMPTS = 5
+
+
+def _snapshot_query(token: str):
+    return (
+        select(Room.id, Room.name, Location.address, Room.tg_group_id)
+        .outerjoin(Location, Room.location_id == Location.id)
+        .where(Room.qr_token == token)
+    )
+
+
+def _room_key(token: str) -> str:
+    return f"room:{token}"
+
+
+def _snapshot_from_cache(cached):
+    if cached is MISSING or cached is None:
+        return cached
+    return RoomSnapshot(*cached)
+
+
+# Проекция token -> комната для горячих путей (отправка отзыва, информация о комнате)
+def _cached_snapshot(token: str):
+    return _snapshot_from_cache(get_cache().get(_room_key(token)))
+
+
+async def _cached_snapshot_async(token: str):
+    return _snapshot_from_cache(await get_cache().get_async(_room_key(token)))
+
+
+def peek_room_snapshot(token: str) -> RoomSnapshot | None:
+    # Только кэш, без похода в БД: None, если комнаты нет или она ещё не закэширована
+    snapshot = _cached_snapshot(token)
+    return None if snapshot is MISSING else snapshot
+
+
+async def peek_room_snapshot_async(token: str) -> RoomSnapshot | None:
+    snapshot = await _cached_snapshot_async(token)
+    return None if snapshot is MISSING else snapshot
+
+
+def _snapshot_entry(row) -> tuple[RoomSnapshot | None, float]:
+    snapshot = RoomSnapshot(*row) if row else None
+    return snapshot, ROOM_CACHE_TTL if snapshot else ROOM_CACHE_NEGATIVE_TTL
+
+
+def _store_snapshot(token: str, row) -> RoomSnapshot | None:
+    snapshot, ttl = _snapshot_entry(row)
+    get_cache().set(_room_key(token), list(snapshot) if snapshot else None, ttl)
+    return snapshot
+
+
+async def _store_snapshot_async(token: str, row) -> RoomSnapshot | None:
+    snapshot, ttl = _snapshot_entry(row)
+    await get_cache().set_async(_room_key(token), list(snapshot) if snapshot else None, ttl)
+    return snapshot
+
+
+def invalidate_room_token(token: str):
+    get_cache().invalidate(_room_key(token))
+
+
+async def invalidate_room_token_async(token: str):
+    await get_cache().invalidate_async(_room_key(token))
+
+
+def _insert_rooms_stmt(rows: list[dict]):
+    # Коллизии токенов с уже существующими комнатами пропускаются и возвращаются на повтор
+    return (
+        pg_insert(Room)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Room.qr_token])
+        .returning(Room.qr_token)
+    )
+
+
+def _assign_unique_tokens(rows: list[dict], make_token, used: set[str]):
+    for row in rows:
+        token = make_token()
+        while token in used:
+            token = make_token()
+        used.add(token)
+        row["qr_token"] = token
 
 class RoomRepo:
     def __init__(self, db: Session):
         self.db = db
 
     def get_by_token(self, token: str):
-        return self.db.query(Room).filter(Room.qr_token == token).first()
+        return self.db.query(Room).options(joinedload(Room.location)).filter(Room.qr_token == token).first()
+
+    def get_snapshot_by_token(self, token: str) -> RoomSnapshot | None:
+        snapshot = _cached_snapshot(token)
+        if snapshot is MISSING:
+            snapshot = _store_snapshot(token, self.db.execute(_snapshot_query(token)).first())
+        return snapshot
 
     def create(self, location_id: int, name: str, tg_group_id: int, token: str):
         room = Room(location_id=location_id, name=name, tg_group_id=tg_group_id, qr_token=token)
         self.db.add(room)
         self.db.commit()
         self.db.refresh(room)
+        invalidate_room_token(token)
         return room
 
+    def create_many(self, rows: list[dict], make_token) -> list[dict]:
+        # rows: location_id, name, tg_group_id; вставка пачками multi-row INSERT ... RETURNING в одной транзакции
+        rows = [dict(row) for row in rows]
+        used: set[str] = set()
+        pending = rows
+        for _ in range(BULK_TOKEN_ATTEMPTS):
+            _assign_unique_tokens(pending, make_token, used)
+            inserted = set()
+            for chunk in chunked(pending, BULK_CHUNK_SIZE):
+                inserted.update(self.db.execute(_insert_rooms_stmt(chunk)).scalars())
+            pending = [row for row in pending if row["qr_token"] not in inserted]
+            if not pending:
+                break
+        else:
+            self.db.rollback()
+            raise RuntimeError("Не удалось подобрать уникальные токены")
+        self.db.commit()
+        get_cache().invalidate(*(_room_key(row["qr_token"]) for row in rows))
+        return rows
+
     def get_by_id(self, room_id: int):
         return self.db.query(Room).filter(Room.id == room_id).first()
 
     def list_by_location(self, location_id: int):
         return self.db.query(Room).filter(Room.location_id == location_id).all()
+
+
+class AsyncRoomRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_token(self, token: str):
+        # В async-сессии lazy load недоступен, поэтому location подгружается сразу
+        result = await self.db.execute(
+            select(Room).options(joinedload(Room.location)).where(Room.qr_token == token)
+        )
+        return result.scalars().first()
+
+    async def get_snapshot_by_token(self, token: str) -> RoomSnapshot | None:
+        snapshot = await _cached_snapshot_async(token)
+        if snapshot is MISSING:
+            snapshot = await _store_snapshot_async(token, (await self.db.execute(_snapshot_query(token))).first())
+        return snapshot
+
+    async def create(self, location_id: int, name: str, tg_group_id: int, token: str):
+        room = Room(location_id=location_id, name=name, tg_group_id=tg_group_id, qr_token=token)
+        self.db.add(room)
+        await self.db.commit()
+        await self.db.refresh(room)
+        await invalidate_room_token_async(token)
+        return room
+
+    async def create_many(self, rows: list[dict], make_token) -> list[dict]:
+        rows = [dict(row) for row in rows]
+        used: set[str] = set()
+        pending = rows
+        for _ in range(BULK_TOKEN_ATTEMPTS):
+            _assign_unique_tokens(pending, make_token, used)
+            inserted = set()
+            for chunk in chunked(pending, BULK_CHUNK_SIZE):
+                inserted.update((await self.db.execute(_insert_rooms_stmt(chunk))).scalars())
+            pending = [row for row in pending if row["qr_token"] not in inserted]
+            if not pending:
+                break
+        else:
+            await self.db.rollback()
+            raise RuntimeError("Не удалось подобрать уникальные токены")
+        await self.db.commit()
+        await get_cache().invalidate_async(*(_room_key(row["qr_token"]) for row in rows))
+        return rows
+
+    async def get_by_id(self, room_id: int):
+        result = await self.db.execute(select(Room).where(Room.id == room_id))
+        return result.scalars().first()
+
+    async def list_by_location(self, location_id: int):
+        result = await self.db.execute(select(Room).where(Room.location_id == location_id))
+        return result.scalars().all()
@@ -0,0 +1,207 @@
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import select, delete, insert, func, cast, text, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.app.modules.messages.infrastructure.db.models import (
+    Message,
+    Room,
+    Location,
+    MessageStatsHourly,
+    MessageStatsDaily
+)
+from src.app.settings import env
+
+# Инкремент агрегатов в транзакции записи сообщения; при 0 агрегаты пересчитывает manage.py compact-stats
+STATS_ROLLUP_INLINE = env("STATS_ROLLUP_INLINE", "1") == "1"
+# Пересчёт не трогает последние часы: в них ещё могут прийти инкременты, уже учтённые в сырых сообщениях
+# (буфер stats_rollup_buffer, долгие транзакции). Должно быть заметно больше STATS_ROLLUP_FLUSH_INTERVAL
+STATS_RECOMPUTE_SETTLE = float(env("STATS_RECOMPUTE_SETTLE", "300"))
+
+
+def _utc_hour(ts):
+    return func.timezone("UTC", func.date_trunc("hour", func.timezone("UTC", ts)))
+
+
+def _utc_day(ts):
+    return cast(func.timezone("UTC", ts), Date)
+
+
+def hour_bucket(ts: datetime) -> datetime:
+    # То же, что _utc_hour, но на стороне Python: ключ часа для буферизованных инкрементов
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_increment_statements(room_id: int, count: int = 1):
+    return rollup_increment_many_statements({room_id: count})
+
+
+def rollup_increment_many_statements(counts: dict[int, int]):
+    # Счётчики текущего часа и дня; now() совпадает с timestamp сообщений в той же транзакции.
+    # Один многострочный upsert на таблицу; строки по room_id — одинаковый порядок блокировок у параллельных транзакций
+    rooms = sorted(counts.items())
+    return _rollup_upserts(
+        [{"room_id": room_id, "bucket": _utc_hour(func.now()), "count": count} for room_id, count in rooms],
+        [{"room_id": room_id, "day": _utc_day(func.now()), "count": count} for room_id, count in rooms],
+    )
+
+
+def rollup_increment_buckets_statements(counts: dict[tuple[int, datetime], int]):
+    # Инкременты, накопленные вне транзакции сообщения: час и день берутся из timestamp самих сообщений
+    # (ключи — hour_bucket), а не из момента записи
+    days = Counter()
+    for (room_id, bucket), count in counts.items():
+        days[room_id, bucket.date()] += count
+    return _rollup_upserts(
+        [{"room_id": room_id, "bucket": bucket, "count": count} for (room_id, bucket), count in sorted(counts.items())],
+        [{"room_id": room_id, "day": day, "count": count} for (room_id, day), count in sorted(days.items())],
+    )
+
+
+def _rollup_upserts(hourly_rows: list[dict], daily_rows: list[dict]):
+    hourly = pg_insert(MessageStatsHourly).values(hourly_rows)
+    daily = pg_insert(MessageStatsDaily).values(daily_rows)
+    return [
+        hourly.on_conflict_do_update(
+            index_elements=[MessageStatsHourly.room_id, MessageStatsHourly.bucket],
+            set_={"count": MessageStatsHourly.count + hourly.excluded.count},
+        ),
+        daily.on_conflict_do_update(
+            index_elements=[MessageStatsDaily.room_id, MessageStatsDaily.day],
+            set_={"count": MessageStatsDaily.count + daily.excluded.count},
+        ),
+    ]
+
+
+def _day_bounds(since: datetime, until: datetime) -> tuple[datetime, datetime]:
+    start = datetime.combine(since.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+    end = datetime.combine(until.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+    if end < until:
+        end += timedelta(days=1)
+    return start, end
+
+
+def _recompute_statements(start: datetime, end: datetime, settled_end: datetime):
+    # Часы до settled_end пересобираются из сообщений, более свежие остаются за инкрементами;
+    # дни — суммой часов, чтобы день с несобранными часами не разошёлся с ними
+    in_range = (Message.timestamp >= start) & (Message.timestamp < settled_end) & Message.room_id.isnot(None)
+    hour = _utc_hour(Message.timestamp)
+    day = _utc_day(MessageStatsHourly.bucket)
+    return [
+        # Инкременты (INSERT ... ON CONFLICT) ждут конца пересчёта, а пересчёт — завершения уже начатых:
+        # сообщение учитывается либо здесь, либо своим инкрементом после commit пересчёта
+        text("LOCK TABLE message_stats_hourly, message_stats_daily IN SHARE ROW EXCLUSIVE MODE"),
+        delete(MessageStatsHourly).where(MessageStatsHourly.bucket >= start, MessageStatsHourly.bucket < settled_end),
+        insert(MessageStatsHourly).from_select(
+            ["room_id", "bucket", "count"],
+            select(Message.room_id, hour, func.count()).where(in_range).group_by(Message.room_id, hour),
+        ),
+        delete(MessageStatsDaily).where(MessageStatsDaily.day >= start.date(), MessageStatsDaily.day < end.date()),
+        insert(MessageStatsDaily).from_select(
+            ["room_id", "day", "count"],
+            select(MessageStatsHourly.room_id, day, func.sum(MessageStatsHourly.count))
+            .where(MessageStatsHourly.bucket >= start, MessageStatsHourly.bucket < end)
+            .group_by(MessageStatsHourly.room_id, day),
+        ),
+    ]
+
+
+def _rollup(granularity: str):
+    if granularity == "hour":
+        return MessageStatsHourly, MessageStatsHourly.bucket
+    return MessageStatsDaily, MessageStatsDaily.day
+
+
+def _range_filter(bucket, granularity: str, since: datetime | None, until: datetime | None):
+    conditions = []
+    if since is not None:
+        conditions.append(bucket >= (since if granularity == "hour" else since.astimezone(timezone.utc).date()))
+    if until is not None:
+        conditions.append(bucket < (until if granularity == "hour" else until.astimezone(timezone.utc).date()))
+    return conditions
+
+
+def _locations_totals_query(granularity: str, since, until):
+    table, bucket = _rollup(granularity)
+    return (
+        select(Location.address, func.sum(table.count))
+        .select_from(table)
+        .join(Room, Room.id == table.room_id)
+        .join(Location, Location.id == Room.location_id)
+        .where(*_range_filter(bucket, granularity, since, until))
+        .group_by(Location.address)
+        .order_by(func.sum(table.count).desc())
+    )
+
+
+def _rooms_totals_query(location_id: int, granularity: str, since, until):
+    table, bucket = _rollup(granularity)
+    return (
+        select(Room.name, Room.qr_token, func.sum(table.count))
+        .select_from(table)
+        .join(Room, Room.id == table.room_id)
+        .where(Room.location_id == location_id, *_range_filter(bucket, granularity, since, until))
+        .group_by(Room.id)
+        .order_by(func.sum(table.count).desc())
+    )
+
+
+def _series_query(location_id: int, granularity: str, since, until, room_id: int | None = None):
+    table, bucket = _rollup(granularity)
+    stmt = (
+        select(bucket, func.sum(table.count))
+        .select_from(table)
+        .join(Room, Room.id == table.room_id)
+        .where(Room.location_id == location_id, *_range_filter(bucket, granularity, since, until))
+    )
+    if room_id is not None:
+        stmt = stmt.where(table.room_id == room_id)
+    return stmt.group_by(bucket).order_by(bucket)
+
+
+class StatsRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def increment(self, room_id: int, count: int = 1):
+        # Без commit: выполняется в транзакции MessageRepo.create
+        for stmt in rollup_increment_statements(room_id, count):
+            self.db.execute(stmt)
+
+    def recompute(self, since: datetime, until: datetime):
+        start, end = _day_bounds(since, until)
+        settled = hour_bucket(datetime.now(timezone.utc) - timedelta(seconds=STATS_RECOMPUTE_SETTLE))
+        for stmt in _recompute_statements(start, end, max(start, min(end, settled))):
+            self.db.execute(stmt)
+        self.db.commit()
+        return start, end
+
+    def locations_totals(self, granularity: str, since=None, until=None):
+        return self.db.execute(_locations_totals_query(granularity, since, until)).all()
+
+    def rooms_totals(self, location_id: int, granularity: str, since=None, until=None):
+        return self.db.execute(_rooms_totals_query(location_id, granularity, since, until)).all()
+
+    def series(self, location_id: int, granularity: str, since=None, until=None, room_id: int | None = None):
+        return self.db.execute(_series_query(location_id, granularity, since, until, room_id)).all()
+
+
+class AsyncStatsRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def increment(self, room_id: int, count: int = 1):
+        for stmt in rollup_increment_statements(room_id, count):
+            await self.db.execute(stmt)
+
+    async def locations_totals(self, granularity: str, since=None, until=None):
+        return (await self.db.execute(_locations_totals_query(granularity, since, until))).all()
+
+    async def rooms_totals(self, location_id: int, granularity: str, since=None, until=None):
+        return (await self.db.execute(_rooms_totals_query(location_id, granularity, since, until))).all()
+
+    async def series(self, location_id: int, granularity: str, since=None, until=None, room_id: int | None = None):
+        return (await self.db.execute(_series_query(location_id, granularity, since, until, room_id))).all()
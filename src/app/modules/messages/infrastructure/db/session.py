@@ -1,14 +1,87 @@
+import threading
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+from src.app.modules.messages.infrastructure.db.pool import engine_kwargs, pool_stats
+from src.app.metrics import instrument_engine
+from src.app.settings import settings
+
+DATABASE_URL = settings.database_url
+DB_BACKEND = settings.db_backend
+
+
+def to_async_url(url: str) -> str:
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = settings.async_database_url or (to_async_url(DATABASE_URL) if DATABASE_URL else None)
+
+# Движки создаются при первом обращении, а не при импорте: импорт модулей не требует DATABASE_URL
+# и не тянет asyncpg в sync-режиме
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise RuntimeError("DATABASE_URL не задан")
+                engine = create_engine(DATABASE_URL, **engine_kwargs())
+                instrument_engine(engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import create_async_engine
+
+                if not ASYNC_DATABASE_URL:
+                    raise RuntimeError("DATABASE_URL не задан")
+                engine = create_async_engine(ASYNC_DATABASE_URL, **engine_kwargs(is_async=True))
+                instrument_engine(engine)
+                _async_engine = engine
+    return _async_engine
+
+
+class _LazySessionmaker:
+    # Фабрика сессий, которая привязывается к движку при первом вызове
+    def __init__(self, get_bind, factory):
+        self._get_bind = get_bind
+        self._factory = factory
+        self._maker = None
 
-load_dotenv()
+    def __call__(self, **kwargs):
+        if self._maker is None:
+            self._maker = self._factory(self._get_bind())
+        return self._maker(**kwargs)
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+    def reset(self):
+        self._maker = None
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+def _sync_sessionmaker(bind):
+    return sessionmaker(bind=bind, autoflush=False)
+
+
+def _async_sessionmaker(bind):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(bind=bind, autoflush=False, expire_on_commit=False)
+
+
+SessionLocal = _LazySessionmaker(get_engine, _sync_sessionmaker)
+AsyncSessionLocal = _LazySessionmaker(get_async_engine, _async_sessionmaker)
 
 
 def get_db():
@@ -16,4 +89,32 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines():
+    # Закрывает соединения пула при остановке; следующий вызов get_engine создаст движок заново
+    global _engine, _async_engine
+    with _engine_lock:
+        engine, async_engine = _engine, _async_engine
+        _engine = _async_engine = None
+    SessionLocal.reset()
+    AsyncSessionLocal.reset()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
+
+
+def db_pool_stats() -> dict:
+    stats = {}
+    if _engine is not None:
+        stats["sync"] = pool_stats(_engine.pool)
+    if _async_engine is not None:
+        stats["async"] = pool_stats(_async_engine.pool)
+    return stats
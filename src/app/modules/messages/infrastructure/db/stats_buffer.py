@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+from src.app.modules.messages.infrastructure.db.session import DB_BACKEND, SessionLocal, AsyncSessionLocal
+from src.app.modules.messages.infrastructure.db.repos.stats import hour_bucket, rollup_increment_buckets_statements
+from src.app.settings import env
+
+# > 0 — инкременты статистики от одиночных отзывов копятся в памяти и пишутся одним upsert на таблицу
+# раз в интервал, и транзакция отзыва не держит блокировку строки (комната, час) до commit.
+# Цена: при падении процесса несброшенные инкременты теряются до следующего manage.py compact-stats.
+# 0 (по умолчанию) — инкремент в транзакции сообщения
+STATS_ROLLUP_FLUSH_INTERVAL = float(env("STATS_ROLLUP_FLUSH_INTERVAL", "0"))
+
+logger = logging.getLogger(__name__)
+
+
+class StatsRollupBuffer:
+    # Счётчики группируются по (комната, час timestamp сообщения), поэтому отзыв из 10:59:59 попадает в 10:00
+    # при любом моменте сброса. compact-stats не пересобирает последние STATS_RECOMPUTE_SETTLE секунд,
+    # так что сброс после пересчёта не учтёт сообщение второй раз
+    def __init__(self, session_factory=SessionLocal, async_session_factory=None,
+                 interval: float = STATS_ROLLUP_FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.interval = interval
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopped: asyncio.Event | None = None
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopped.is_set()
+
+    def start(self):
+        self._stopped = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        # Последний сброс — после остановки буфера отзывов, когда новых инкрементов уже не будет
+        if self._task is None:
+            return
+        self._stopped.set()
+        await self._task
+        self._task = None
+
+    def add(self, room_id: int, timestamp: datetime, count: int = 1):
+        # Вызывается после commit сообщения, в том числе из потоков threadpool
+        with self._lock:
+            self._counts[room_id, hour_bucket(timestamp)] += count
+
+    async def run(self):
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+        # Последний сброс и тогда, когда остановка пришла раньше первого шага задачи
+        await self.flush()
+
+    async def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        try:
+            await self._write(counts)
+        except Exception:
+            # Вернём инкременты и попробуем при следующем сбросе
+            logger.warning("Stats rollup flush of %s buckets failed", len(counts), exc_info=True)
+            with self._lock:
+                self._counts.update(counts)
+        else:
+            self.flushes += 1
+
+    async def _write(self, counts: Counter):
+        if self.async_session_factory is not None:
+            async with self.async_session_factory() as db:
+                for stmt in rollup_increment_buckets_statements(counts):
+                    await db.execute(stmt)
+                await db.commit()
+        else:
+            await asyncio.to_thread(self._write_sync, counts)
+
+    def _write_sync(self, counts: Counter):
+        with self.session_factory() as db:
+            for stmt in rollup_increment_buckets_statements(counts):
+                db.execute(stmt)
+            db.commit()
+
+
+stats_rollup_buffer = StatsRollupBuffer(async_session_factory=AsyncSessionLocal if DB_BACKEND == "async" else None)
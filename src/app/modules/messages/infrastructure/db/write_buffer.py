@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+
+from src.app.metrics import FEEDBACK_WRITE_DROPPED
+from src.app.modules.messages.infrastructure.db.session import DB_BACKEND, SessionLocal, AsyncSessionLocal
+from src.app.modules.messages.infrastructure.db.repos.messages import MessageRepo, AsyncMessageRepo, PendingMessage
+from src.app.modules.messages.infrastructure.telegram import notify_outbox
+from src.app.settings import env
+
+# Write-behind для POST /feedback: отзывы копятся в очереди и пишутся пачками одним commit
+FEEDBACK_WRITE_BEHIND = env("FEEDBACK_WRITE_BEHIND", "0") == "1"
+FEEDBACK_BUFFER_SIZE = int(env("FEEDBACK_BUFFER_SIZE", "10000"))
+FEEDBACK_FLUSH_ROWS = int(env("FEEDBACK_FLUSH_ROWS", "500"))
+FEEDBACK_FLUSH_INTERVAL_MS = float(env("FEEDBACK_FLUSH_INTERVAL_MS", "5"))
+# Сколько запрос ждёт места в заполненной очереди, прежде чем получить 503
+FEEDBACK_BUFFER_TIMEOUT = float(env("FEEDBACK_BUFFER_TIMEOUT", "1.0"))
+# 1 — ответ уходит после commit пачки (group commit), 0 — сразу после постановки в очередь
+FEEDBACK_WAIT_COMMIT = env("FEEDBACK_WAIT_COMMIT", "1") == "1"
+
+logger = logging.getLogger(__name__)
+# Отзывы, которые не удалось записать после ответа клиенту, — с содержимым, для ручного восстановления
+dead_letter = logging.getLogger("feedback.dead_letter")
+
+_STOP = object()
+
+
+class BufferFull(Exception):
+    pass
+
+
+class FeedbackWriteBuffer:
+    def __init__(self, session_factory=SessionLocal, async_session_factory=None,
+                 maxsize: int = FEEDBACK_BUFFER_SIZE, flush_rows: int = FEEDBACK_FLUSH_ROWS,
+                 flush_interval: float = FEEDBACK_FLUSH_INTERVAL_MS / 1000, wait_commit: bool = FEEDBACK_WAIT_COMMIT):
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.maxsize = maxsize
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.wait_commit = wait_commit
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._putting = 0
+        self._no_putters: asyncio.Event | None = None
+        self.batches = 0
+        self.rows = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._stopping = False
+        self._putting = 0
+        self._no_putters = asyncio.Event()
+        self._no_putters.set()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        # Новые отзывы больше не принимаются (BufferFull -> 503), всё, что уже в очереди, записывается до выхода
+        if self._task is None:
+            return
+        self._stopping = True
+        # Запросы, уже ждущие места в очереди, встают в неё до _STOP (или получают BufferFull по таймауту):
+        # после _STOP в очереди не должно остаться ничего, иначе их future никогда не разрешится
+        await self._no_putters.wait()
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, item: PendingMessage, on_commit: Callable[[], None] | None = None,
+                     on_failure: Callable[[], Awaitable[None]] | None = None):
+        # on_commit вызывается после commit строки, on_failure (корутина) — если строку записать не удалось
+        # и ошибку некому вернуть: ответ клиенту уже ушёл или запрос отменён
+        if not self.running:
+            raise BufferFull("Write buffer is not running")
+        future = self._loop.create_future() if self.wait_commit else None
+        self._putting += 1
+        self._no_putters.clear()
+        try:
+            await asyncio.wait_for(self._queue.put((item, future, on_commit, on_failure)), timeout=FEEDBACK_BUFFER_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise BufferFull("Write buffer is full")
+        finally:
+            self._putting -= 1
+            if not self._putting:
+                self._no_putters.set()
+        if future is not None:
+            await future
+
+    def submit_threadsafe(self, item: PendingMessage, on_commit: Callable[[], None] | None = None,
+                          on_failure: Callable[[], Awaitable[None]] | None = None):
+        # Для sync-обработчиков, работающих в threadpool
+        if not self.running:
+            raise BufferFull("Write buffer is not running")
+        asyncio.run_coroutine_threadsafe(self.submit(item, on_commit, on_failure), self._loop).result()
+
+    async def run(self):
+        stopping = False
+        while not stopping or not self._queue.empty():
+            entry = await self._queue.get()
+            batch = []
+            # Пачка закрывается по числу строк или по истечении интервала с первой строки
+            deadline = self._loop.time() + self.flush_interval
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    batch.append(entry)
+                if len(batch) >= self.flush_rows:
+                    break
+                timeout = 0 if stopping else deadline - self._loop.time()
+                try:
+                    if timeout <= 0:
+                        entry = self._queue.get_nowait()
+                    else:
+                        entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple]):
+        items = [entry[0] for entry in batch]
+        try:
+            await self._write(items)
+        except Exception:
+            # Одна плохая строка (например, комнату удалили) не должна ронять всю пачку — пишем поштучно
+            logger.warning("Feedback batch of %s rows failed, retrying row by row", len(items), exc_info=True)
+            for entry in batch:
+                try:
+                    await self._write([entry[0]])
+                except Exception as e:
+                    await self._failed(entry, e)
+                else:
+                    self._committed(entry)
+        else:
+            for entry in batch:
+                self._committed(entry)
+        self.batches += 1
+        self.rows += len(items)
+        notify_outbox()
+
+    def _committed(self, entry: tuple):
+        _, future, on_commit, _ = entry
+        if future is not None and not future.done():
+            future.set_result(None)
+        if on_commit is not None:
+            try:
+                on_commit()
+            except Exception:
+                logger.warning("Feedback on_commit callback failed", exc_info=True)
+
+    async def _failed(self, entry: tuple, error: Exception):
+        item, future, _, on_failure = entry
+        if future is not None and not future.done():
+            # Клиент ждёт commit и получит ошибку — обработчик сам освободит ключи, клиент повторит отправку
+            logger.error("Feedback insert failed", exc_info=error)
+            future.set_exception(error)
+            return
+        if future is None:
+            # Ответ 200 уже ушёл — отзыв потерян для клиента
+            FEEDBACK_WRITE_DROPPED.inc()
+            dead_letter.error("Feedback dropped: %s", json.dumps(item._asdict(), ensure_ascii=False), exc_info=error)
+        else:
+            logger.error("Feedback insert failed", exc_info=error)
+        if on_failure is not None:
+            try:
+                await on_failure()
+            except Exception:
+                logger.warning("Feedback on_failure callback failed", exc_info=True)
+
+    async def _write(self, items: list[PendingMessage]):
+        if self.async_session_factory is not None:
+            async with self.async_session_factory() as db:
+                await AsyncMessageRepo(db).create_many(items)
+        else:
+            await asyncio.to_thread(self._write_sync, items)
+
+    def _write_sync(self, items: list[PendingMessage]):
+        with self.session_factory() as db:
+            MessageRepo(db).create_many(items)
+
+
+feedback_buffer = FeedbackWriteBuffer(async_session_factory=AsyncSessionLocal if DB_BACKEND == "async" else None)
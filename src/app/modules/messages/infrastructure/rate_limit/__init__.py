@@ -0,0 +1,37 @@
+import threading
+
+from .memory import MemoryRateLimiter
+from .redis_backend import RedisRateLimiter
+from src.app.settings import env, settings
+
+# memory — счётчики внутри процесса, redis — общие для всех воркеров
+RATE_LIMIT_BACKEND = env("RATE_LIMIT_BACKEND", settings.cache_backend)
+REDIS_URL = settings.redis_url
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                if RATE_LIMIT_BACKEND == "redis":
+                    _limiter = RedisRateLimiter(url=REDIS_URL)
+                else:
+                    _limiter = MemoryRateLimiter()
+    return _limiter
+
+
+def close_rate_limiter():
+    global _limiter
+    with _limiter_lock:
+        limiter, _limiter = _limiter, None
+    if limiter is not None:
+        limiter.close()
+
+
+def set_rate_limiter(limiter):
+    global _limiter
+    _limiter = limiter
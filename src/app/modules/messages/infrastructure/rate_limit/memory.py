@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+class MemoryRateLimiter:
+    # Скользящее окно из двух соседних фиксированных окон: предыдущее учитывается с весом
+    # оставшейся доли, так что всплеск на стыке окон не удваивает лимит.
+    # Отклонённые запросы тоже считаются: поток из одного источника не пройдёт, пока не остановится
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._windows: dict[str, tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        # 0 — запрос пропущен, иначе через сколько секунд можно повторить
+        now = time.time()
+        current = int(now // window)
+        elapsed = now - current * window
+        with self._lock:
+            item = self._windows.get(key)
+            if item is None:
+                if len(self._windows) >= self.max_keys:
+                    self._prune(current)
+                start, count, previous = current, 0, 0
+            else:
+                start, count, previous = item
+            if start != current:
+                previous = count if start == current - 1 else 0
+                count = 0
+            self._windows[key] = (current, count + 1, previous)
+        if previous * (1 - elapsed / window) + count >= limit:
+            return window - elapsed
+        return 0.0
+
+    def close(self):
+        pass
+
+    def _prune(self, current: int):
+        # Ключи, не тронутые два окна подряд, больше ни на что не влияют
+        stale = [key for key, (start, _, _) in self._windows.items() if start < current - 1]
+        for key in stale:
+            del self._windows[key]
+        if len(self._windows) >= self.max_keys:
+            self._windows.clear()
@@ -0,0 +1,39 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RedisRateLimiter:
+    # Тот же алгоритм, что в MemoryRateLimiter, но счётчики общие для всех воркеров
+    def __init__(self, url: str | None = None, client=None, prefix: str = "feedback:rl:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        current = int(now // window)
+        elapsed = now - current * window
+        current_key = f"{self.prefix}{key}:{current}"
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(current_key)
+            pipe.expire(current_key, int(window * 2) + 1)
+            pipe.get(f"{self.prefix}{key}:{current - 1}")
+            count, _, previous = pipe.execute()
+        except Exception:
+            # Redis недоступен — пропускаем запрос, а не роняем публичный эндпоинт
+            self.errors += 1
+            logger.warning("Redis rate limit failed", exc_info=True)
+            return 0.0
+        weighted = int(previous or 0) * (1 - elapsed / window) + count - 1
+        if weighted >= limit:
+            return window - elapsed
+        return 0.0
+
+    def close(self):
+        self.client.close()
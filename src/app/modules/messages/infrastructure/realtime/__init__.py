@@ -0,0 +1,28 @@
+import logging
+
+from src.app.settings import settings
+
+from .broker import FeedbackBroker, Subscription, TooManySubscribers, feedback_event, STREAM_BACKEND
+
+logger = logging.getLogger(__name__)
+
+
+def to_asyncpg_dsn(url: str) -> str:
+    # asyncpg.connect принимает обычный postgresql:// без имени драйвера SQLAlchemy
+    for prefix in ("postgresql+psycopg2://", "postgresql+asyncpg://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql://" + url[len(prefix):]
+    return url
+
+
+feedback_broker = FeedbackBroker(
+    dsn=to_asyncpg_dsn(settings.database_url or "") if STREAM_BACKEND == "postgres" else None,
+)
+
+
+def publish_feedback(token: str, room_name: str, address: str, text: str):
+    # Лента для дашбордов — побочный эффект: её сбой не должен ронять сохранённый отзыв
+    try:
+        feedback_broker.publish(feedback_event(token, room_name, address, text))
+    except Exception:
+        logger.warning("Feedback stream publish failed", exc_info=True)
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+
+from src.app.metrics import FEEDBACK_STREAM_DROPPED
+from src.app.settings import env
+
+# memory — только подписчики этого процесса, postgres — LISTEN/NOTIFY между всеми воркерами API
+STREAM_BACKEND = env("STREAM_BACKEND", "memory")
+STREAM_BUFFER_SIZE = int(env("STREAM_BUFFER_SIZE", "100"))
+STREAM_MAX_SUBSCRIBERS = int(env("STREAM_MAX_SUBSCRIBERS", "1000"))
+STREAM_CHANNEL = "feedback_stream"
+# Лимит payload у NOTIFY — 8000 байт; длинный текст в событии обрезается
+STREAM_TEXT_LIMIT = 2000
+
+logger = logging.getLogger(__name__)
+
+_CLOSED = object()
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, broker: "FeedbackBroker", address: str | None, token: str | None, maxsize: int):
+        self.broker = broker
+        self.address = address
+        self.token = token
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._pending = None
+
+    def matches(self, event: dict) -> bool:
+        if self.token is not None and event["token"] != self.token:
+            return False
+        return self.address is None or event["address"] == self.address
+
+    def offer(self, event):
+        # Медленный клиент не копит события бесконечно: при полном буфере выбрасывается самое старое
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            FEEDBACK_STREAM_DROPPED.inc()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float | None = None) -> dict | None:
+        # None — за timeout событий не было (пора слать keepalive); StopAsyncIteration — брокер остановлен
+        if self._pending is not None:
+            event, self._pending = self._pending, None
+            return event
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is _CLOSED:
+            raise StopAsyncIteration
+        if self.dropped:
+            # Клиент узнаёт, что часть событий пропущена и ленту стоит перечитать из истории
+            dropped, self.dropped = self.dropped, 0
+            self._pending = event
+            return {"type": "dropped", "count": dropped}
+        return event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FeedbackBroker:
+    def __init__(self, backend: str = STREAM_BACKEND, buffer_size: int = STREAM_BUFFER_SIZE,
+                 max_subscribers: int = STREAM_MAX_SUBSCRIBERS, dsn: str | None = None):
+        self.backend = backend
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.dsn = dsn
+        self._subscribers: set[Subscription] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._outgoing: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._listening = False
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.backend == "postgres":
+            self._outgoing = asyncio.Queue(maxsize=10000)
+            self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._notify())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._listening = False
+        # Открытые SSE/WebSocket завершаются, иначе остановка сервера ждала бы клиентов
+        for subscription in list(self._subscribers):
+            subscription.offer(_CLOSED)
+        self._subscribers.clear()
+        self._loop = None
+
+    def subscribe(self, address: str | None = None, token: str | None = None) -> Subscription:
+        if len(self._subscribers) >= self.max_subscribers:
+            raise TooManySubscribers("Too many stream subscribers")
+        subscription = Subscription(self, address, token, self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, event: dict):
+        # Вызывается и из потоков threadpool (sync-обработчики), и из event loop
+        loop = self._loop
+        if loop is None:
+            return
+        if self._listening:
+            loop.call_soon_threadsafe(self._enqueue_notify, event)
+        elif self._subscribers:
+            loop.call_soon_threadsafe(self._fanout, event)
+
+    def _fanout(self, event: dict):
+        for subscription in list(self._subscribers):
+            if subscription.matches(event):
+                subscription.offer(event)
+
+    def _enqueue_notify(self, event: dict):
+        try:
+            self._outgoing.put_nowait(event)
+        except asyncio.QueueFull:
+            FEEDBACK_STREAM_DROPPED.inc()
+
+    async def _connect(self):
+        import asyncpg
+
+        return await asyncpg.connect(self.dsn)
+
+    async def _listen(self):
+        # Свои NOTIFY тоже приходят сюда, поэтому в postgres-режиме локальная раздача идёт только через канал
+        while True:
+            conn = None
+            try:
+                conn = await self._connect()
+                await conn.add_listener(STREAM_CHANNEL, self._on_notify)
+                self._listening = True
+                await asyncio.Future()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Feedback stream listener reconnecting", exc_info=True)
+                await asyncio.sleep(1.0)
+            finally:
+                self._listening = False
+                if conn is not None:
+                    await conn.close()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self._fanout(json.loads(payload))
+        except ValueError:
+            logger.warning("Malformed feedback stream payload")
+
+    async def _notify(self):
+        # Одно соединение для pg_notify: asyncpg не выполняет запросы параллельно на одном соединении
+        conn = None
+        while True:
+            event = await self._outgoing.get()
+            try:
+                if conn is None or conn.is_closed():
+                    conn = await self._connect()
+                await conn.execute("SELECT pg_notify($1, $2)", STREAM_CHANNEL, json.dumps(event, ensure_ascii=False))
+            except asyncio.CancelledError:
+                if conn is not None:
+                    await conn.close()
+                raise
+            except Exception:
+                logger.warning("Feedback stream notify failed, delivering locally", exc_info=True)
+                self._fanout(event)
+                conn = None
+
+
+def feedback_event(token: str, room_name: str, address: str, text: str) -> dict:
+    return {
+        "type": "feedback",
+        "token": token,
+        "room": room_name,
+        "address": address,
+        "text": text[:STREAM_TEXT_LIMIT],
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
@@ -0,0 +1 @@
+from .outbox_dispatcher import OutboxDispatcher, notify_outbox
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from src.app.modules.messages.infrastructure.db.session import SessionLocal
+from src.app.modules.messages.infrastructure.db.repos.outbox import OutboxRepo
+from src.utils import send_telegram_message, TelegramError
+from .rate_limit import ChatRateLimiter, TokenBucket
+from src.app.settings import env
+
+if TYPE_CHECKING:
+    import aiohttp
+
+OUTBOX_BATCH_SIZE = int(env("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(env("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_LEASE_SECONDS = float(env("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_MAX_ATTEMPTS = int(env("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(env("OUTBOX_BACKOFF_BASE", "2.0"))
+OUTBOX_BACKOFF_MAX = float(env("OUTBOX_BACKOFF_MAX", "300"))
+# Сколько дней хранить отправленные и неотправленные записи outbox; 0 — не удалять
+OUTBOX_RETENTION_DAYS = float(env("OUTBOX_RETENTION_DAYS", "7"))
+OUTBOX_PRUNE_INTERVAL = float(env("OUTBOX_PRUNE_INTERVAL", "3600"))
+TELEGRAM_TIMEOUT = float(env("TELEGRAM_TIMEOUT", "10"))
+TELEGRAM_CHAT_PER_MINUTE = float(env("TELEGRAM_CHAT_PER_MINUTE", "20"))
+TELEGRAM_CHAT_BURST = float(env("TELEGRAM_CHAT_BURST", "5"))
+TELEGRAM_GLOBAL_PER_SECOND = float(env("TELEGRAM_GLOBAL_PER_SECOND", "30"))
+TELEGRAM_MESSAGE_LIMIT = 4096
+DIGEST_SEPARATOR = "\n\n———\n\n"
+
+logger = logging.getLogger(__name__)
+
+_dispatchers: list["OutboxDispatcher"] = []
+
+
+def notify_outbox():
+    # Вызывается из потоков threadpool после commit, будит диспетчер без ожидания poll-интервала
+    for dispatcher in _dispatchers:
+        dispatcher.wakeup()
+
+
+class OutboxDispatcher:
+    def __init__(self, session_factory=SessionLocal, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._http: "aiohttp.ClientSession | None" = None
+        self._drain_timeout = 0.0
+        self.limiter = ChatRateLimiter(TELEGRAM_CHAT_PER_MINUTE, TELEGRAM_CHAT_BURST)
+        self.global_bucket = TokenBucket(TELEGRAM_GLOBAL_PER_SECOND, TELEGRAM_GLOBAL_PER_SECOND)
+        self.digests_sent = 0
+        self._next_prune = 0.0
+
+    def wakeup(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self.run())
+        _dispatchers.append(self)
+
+    async def stop(self, drain_timeout: float = 0):
+        # drain_timeout > 0 — перед выходом дорассылает уже записанные уведомления, но не дольше этого времени
+        self._drain_timeout = drain_timeout
+        self._stopping = True
+        if self in _dispatchers:
+            _dispatchers.remove(self)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def run(self):
+        if self._wakeup is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+        import aiohttp
+
+        # HTTP-сессия создаётся при запуске цикла, а не при импорте модуля
+        timeout = aiohttp.ClientTimeout(total=TELEGRAM_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as http:
+            self._http = http
+            while not self._stopping:
+                try:
+                    processed = await self.drain_once()
+                except Exception:
+                    logger.exception("Outbox dispatch failed")
+                    processed = 0
+                await self._maybe_prune()
+                if processed >= self.batch_size:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            if self._drain_timeout > 0:
+                await self._drain()
+            self._http = None
+
+    async def _maybe_prune(self):
+        if OUTBOX_RETENTION_DAYS <= 0 or self._loop.time() < self._next_prune:
+            return
+        self._next_prune = self._loop.time() + OUTBOX_PRUNE_INTERVAL
+        try:
+            deleted = await asyncio.to_thread(self._with_repo, OutboxRepo.prune, timedelta(days=OUTBOX_RETENTION_DAYS))
+        except Exception:
+            logger.exception("Outbox prune failed")
+            return
+        if deleted:
+            logger.info("Pruned %s outbox entries older than %s days", deleted, OUTBOX_RETENTION_DAYS)
+
+    async def _drain(self):
+        deadline = self._loop.time() + self._drain_timeout
+        try:
+            while self._loop.time() < deadline:
+                processed = await asyncio.wait_for(self.drain_once(), deadline - self._loop.time())
+                if processed < self.batch_size:
+                    break
+        except asyncio.TimeoutError:
+            logger.warning("Outbox drain timed out, the rest will be sent after restart")
+        except Exception:
+            logger.exception("Outbox drain failed")
+
+    async def drain_once(self) -> int:
+        entries = await asyncio.to_thread(self._claim)
+        if not entries:
+            return 0
+        by_chat: dict[int, list[tuple]] = {}
+        for entry in entries:
+            by_chat.setdefault(entry[1], []).append(entry)
+        results = await asyncio.gather(*(self._deliver_chat(chat_id, items) for chat_id, items in by_chat.items()))
+        sent = [entry_id for chat_sent in results for entry_id in chat_sent]
+        await asyncio.to_thread(self._with_repo, OutboxRepo.mark_sent, sent)
+        return len(entries)
+
+    async def _deliver_chat(self, chat_id: int, items: list[tuple]) -> list[int]:
+        bucket = self.limiter.bucket(chat_id)
+        wait = bucket.time_until(1)
+        if wait > 0:
+            # Чат исчерпал лимит: откладываем без траты попытки, к следующему окну сообщения сольются в сводку
+            await self._defer([item[0] for item in items], wait)
+            return []
+
+        tokens = bucket.available()
+        if len(items) <= tokens:
+            messages = [([entry_id], text, attempts) for entry_id, _, text, attempts in items]
+        else:
+            messages = build_digests(items, max_messages=max(tokens, 1))
+        delivered = {entry_id for ids, _, _ in messages for entry_id in ids}
+        leftover = [item[0] for item in items if item[0] not in delivered]
+
+        sent = []
+        for index, (ids, text, attempts) in enumerate(messages):
+            bucket.try_acquire()
+            await self._acquire_global()
+            try:
+                await send_telegram_message(self._http, chat_id, text)
+                sent.extend(ids)
+                if len(ids) > 1:
+                    self.digests_sent += 1
+            except TelegramError as e:
+                if e.retry_after:
+                    # 429 — сообщение не отправлено из-за лимита, а не из-за сбоя: попытку не тратим
+                    bucket.block(e.retry_after)
+                    rest = [entry_id for pending, _, _ in messages[index:] for entry_id in pending]
+                    await self._defer(rest, e.retry_after, str(e))
+                    break
+                await self._fail(ids, str(e), attempts, e.permanent)
+        if leftover:
+            await self._defer(leftover, bucket.time_until(1))
+        return sent
+
+    async def _acquire_global(self):
+        while not self.global_bucket.try_acquire():
+            await asyncio.sleep(self.global_bucket.time_until(1))
+
+    async def _defer(self, ids: list[int], delay: float, error: str | None = None):
+        await asyncio.to_thread(self._with_repo, OutboxRepo.defer, ids, delay, error)
+
+    async def _reschedule(self, ids: list[int], error: str, delay: float):
+        for entry_id in ids:
+            await asyncio.to_thread(self._with_repo, OutboxRepo.reschedule, entry_id, error, delay)
+
+    async def _fail(self, ids: list[int], error: str, attempts: int, permanent: bool):
+        if permanent or attempts >= OUTBOX_MAX_ATTEMPTS:
+            logger.warning("Outbox entries %s dropped after %s attempts: %s", ids, attempts, error)
+            for entry_id in ids:
+                await asyncio.to_thread(self._with_repo, OutboxRepo.mark_failed, entry_id, error)
+        else:
+            await self._reschedule(ids, error, min(OUTBOX_BACKOFF_BASE ** attempts, OUTBOX_BACKOFF_MAX))
+
+    def _claim(self):
+        return self._with_repo(OutboxRepo.claim_due, self.batch_size, OUTBOX_LEASE_SECONDS)
+
+    def _with_repo(self, method, *args):
+        db = self.session_factory()
+        try:
+            return method(OutboxRepo(db), *args)
+        finally:
+            db.close()
+
+
+def build_digests(items: list[tuple], max_messages: int) -> list[tuple[list[int], str, int]]:
+    # Склеивает накопившиеся уведомления одного чата в сводки в пределах лимита длины сообщения Telegram
+    digests = []
+    ids, parts, attempts, length = [], [], 0, 0
+    for entry_id, _, text, entry_attempts in items:
+        text = text[:TELEGRAM_MESSAGE_LIMIT - 100]
+        added = len(text) + (len(DIGEST_SEPARATOR) if parts else 0)
+        if parts and length + added > TELEGRAM_MESSAGE_LIMIT - 100:
+            digests.append((ids, parts, attempts))
+            if len(digests) >= max_messages:
+                ids, parts = [], []
+                break
+            ids, parts, attempts, length = [], [], 0, 0
+            added = len(text)
+        ids.append(entry_id)
+        parts.append(text)
+        attempts = max(attempts, entry_attempts)
+        length += added
+    if parts:
+        digests.append((ids, parts, attempts))
+    return [
+        (ids, parts[0] if len(parts) == 1 else f"\U0001F4E8 Сводка: {len(parts)} новых сообщений" + DIGEST_SEPARATOR + DIGEST_SEPARATOR.join(parts), attempts)
+        for ids, parts, attempts in digests
+    ]
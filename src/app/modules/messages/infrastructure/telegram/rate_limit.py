@@ -0,0 +1,64 @@
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> int:
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return 0
+        self._refill(now)
+        return int(self.tokens)
+
+    def time_until(self, n: int = 1) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, (n - self.tokens) / self.rate) if self.tokens < n else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def try_acquire(self, n: int = 1) -> bool:
+        if self.available() < n:
+            return False
+        self.tokens -= n
+        return True
+
+    def block(self, seconds: float):
+        # Ответ 429 с retry_after: до его истечения в этот чат ничего не отправляем
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class ChatRateLimiter:
+    # Token bucket на каждый чат (лимит Telegram ~20 сообщений в минуту на группу)
+    def __init__(self, per_minute: float, burst: float, max_chats: int = 10000):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_chats = max_chats
+        self._buckets: dict[int, TokenBucket] = {}
+
+    def bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_chats:
+                self._prune()
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _prune(self):
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self._buckets.items() if bucket.idle(now)]:
+            del self._buckets[chat_id]
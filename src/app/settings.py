@@ -0,0 +1,76 @@
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+def _split(value: str) -> tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Общие настройки сервиса; узкие параметры модулей (размеры пачек, таймауты) читаются там же через env()
+    database_url: str | None = None
+    async_database_url: str | None = None
+    # sync — psycopg2 и threadpool, async — asyncpg и async-обработчики
+    db_backend: str = "sync"
+    form_url: str | None = None
+    cors_allowed_origins: tuple[str, ...] = field(default_factory=tuple)
+    # memory — внутри процесса, redis — общий для всех воркеров
+    cache_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    bot_token: str | None = None
+    # Можно направить на локальный фейковый сервер Telegram в тестах
+    telegram_api_base: str = "https://api.telegram.org"
+    # Лимиты Telegram считаются в памяти диспетчера, поэтому он должен работать в одном процессе:
+    # по умолчанию это outbox_worker.py, а не каждый воркер uvicorn
+    outbox_dispatcher_enabled: bool = False
+    # Сколько при остановке дорассылать уже записанные уведомления
+    outbox_drain_timeout: float = 5.0
+    bot_mode: str = "polling"
+    bot_webhook_path: str = "/bot/webhook"
+    bot_webhook_url: str | None = None
+    bot_webhook_secret: str | None = None
+    bot_webhook_concurrency: int = 100
+    api_base: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        env = os.environ
+        return cls(
+            database_url=env.get("DATABASE_URL"),
+            async_database_url=env.get("ASYNC_DATABASE_URL"),
+            db_backend=env.get("DB_BACKEND", "sync"),
+            form_url=env.get("FORM_URL"),
+            cors_allowed_origins=_split(env.get("CORS_ALLOWED_ORIGINS", "")),
+            cache_backend=env.get("CACHE_BACKEND", "memory"),
+            redis_url=env.get("REDIS_URL", "redis://localhost:6379/0"),
+            bot_token=env.get("BOT_TOKEN"),
+            telegram_api_base=env.get("TELEGRAM_API_BASE", "https://api.telegram.org"),
+            outbox_dispatcher_enabled=env.get("OUTBOX_DISPATCHER_ENABLED", "0") == "1",
+            outbox_drain_timeout=float(env.get("OUTBOX_DRAIN_TIMEOUT", "5")),
+            bot_mode=env.get("BOT_MODE", "polling"),
+            bot_webhook_path=env.get("BOT_WEBHOOK_PATH", "/bot/webhook"),
+            bot_webhook_url=env.get("BOT_WEBHOOK_URL"),
+            bot_webhook_secret=env.get("BOT_WEBHOOK_SECRET"),
+            bot_webhook_concurrency=int(env.get("BOT_WEBHOOK_CONCURRENCY", "100")),
+            api_base=env.get("API_BASE"),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    # .env читается один раз на процесс; переменные окружения процесса имеют приоритет
+    load_dotenv()
+    return Settings.from_env()
+
+
+def env(name: str, default: str | None = None) -> str | None:
+    # Для параметров конкретных модулей: гарантирует, что .env уже прочитан
+    get_settings()
+    return os.environ.get(name, default)
+
+
+settings = get_settings()
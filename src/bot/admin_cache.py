@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class AdminAuthCache:
+    # TTL-кэш результатов проверки администратора с объединением одновременных запросов (single-flight).
+    # Ошибки бэкенда не кэшируются. Записи хранятся в LRU: бот проверяет любого, кто ему написал.
+    def __init__(self, fetch, ttl: float = 300.0, negative_ttl: float = 15.0, maxsize: int = 10000):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, bool]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def is_admin(self, user_id) -> bool:
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # Отменили задачу, которая делала запрос, а не нас: прежнее значение, если оно было, иначе проверяем сами
+            if entry is not None:
+                return entry[1]
+            return await self.is_admin(user_id)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = bool(await self._fetch(user_id))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим; помечаем его обработанным, если ожидающих нет
+            future.exception()
+            raise
+        else:
+            self.set(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def set(self, user_id, is_admin: bool):
+        key = str(user_id)
+        ttl = self.ttl if is_admin else self.negative_ttl
+        self._entries[key] = (time.monotonic() + ttl, is_admin)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def prime(self, user_ids):
+        for user_id in user_ids:
+            self.set(user_id, True)
+
+    def invalidate(self, user_id=None):
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(user_id), None)
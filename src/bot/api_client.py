@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from typing import TypedDict
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class BackendError(Exception):
+    pass
+
+
+class BackendUnavailable(BackendError):
+    pass
+
+
+class CreatedRoom(TypedDict):
+    qr_token: str
+    qr_link: str
+
+
+class RoomItem(TypedDict):
+    name: str
+    qr_token: str
+
+
+class RoomInfo(TypedDict):
+    address: str
+    name: str
+
+
+class BackendClient:
+    # Общая aiohttp-сессия с keep-alive для всех обработчиков бота
+    def __init__(self, base_url: str, timeout: float = 10.0, retries: int = 2, backoff: float = 0.3,
+                 limit: int = 100):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.limit = limit
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method: str, path: str, **kwargs):
+        # GET повторяется при сетевых ошибках и 5xx, POST — нет, чтобы не создать запись дважды
+        attempts = self.retries + 1 if method == "GET" else 1
+        for attempt in range(attempts):
+            try:
+                async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+                    if response.status >= 500 and attempt + 1 < attempts:
+                        raise BackendUnavailable(f"HTTP {response.status}")
+                    try:
+                        payload = await response.json(content_type=None)
+                    except ValueError:
+                        payload = None
+                    return response.status, payload
+            except (aiohttp.ClientError, asyncio.TimeoutError, BackendUnavailable) as e:
+                if attempt + 1 >= attempts:
+                    raise BackendUnavailable(str(e) or type(e).__name__) from e
+                logger.warning("Backend %s %s failed (%s), retrying", method, path, e)
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    @staticmethod
+    def _check(status: int, payload):
+        if status != 200:
+            detail = payload.get("detail") if isinstance(payload, dict) else None
+            raise BackendError(detail or f"HTTP {status}")
+        return payload
+
+    async def is_authorized(self, user_id: int) -> bool:
+        status, payload = await self._request("GET", f"/admin/is_authorized/{user_id}")
+        return bool(self._check(status, payload).get("authorized", False))
+
+    async def list_admins(self) -> list[str]:
+        status, payload = await self._request("GET", "/admin/admins")
+        return self._check(status, payload)["admins"]
+
+    async def list_locations(self) -> list[str]:
+        status, payload = await self._request("GET", "/admin/locations")
+        return self._check(status, payload)
+
+    async def add_location(self, address: str) -> bool:
+        status, _ = await self._request("POST", "/admin/add_location", data={"address": address})
+        return status == 200
+
+    async def create_room(self, address: str, name: str, tg_group_id: int) -> CreatedRoom:
+        status, payload = await self._request("POST", "/admin/create_room", data={
+            "address": address,
+            "name": name,
+            "tg_group_id": str(tg_group_id),
+        })
+        return self._check(status, payload)
+
+    async def rooms_by_location(self, address: str) -> list[RoomItem]:
+        status, payload = await self._request("GET", "/admin/rooms/by_location", params={"address": address})
+        return self._check(status, payload)
+
+    async def stats(self, address: str | None = None, since: str | None = None, granularity: str = "day") -> dict:
+        params = {"granularity": granularity}
+        if address:
+            params["address"] = address
+        if since:
+            params["since"] = since
+        status, payload = await self._request("GET", "/admin/stats", params=params)
+        return self._check(status, payload)
+
+    async def search(self, query: str, address: str | None = None, limit: int = 10) -> dict:
+        params = {"q": query, "limit": limit}
+        if address:
+            params["address"] = address
+        status, payload = await self._request("GET", "/admin/messages/search", params=params)
+        return self._check(status, payload)
+
+    async def room_info(self, token: str) -> RoomInfo | None:
+        status, payload = await self._request("GET", f"/room/{token}")
+        if status == 404:
+            return None
+        return self._check(status, payload)
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+import qrcode
+from aiogram.types import BufferedInputFile
+
+logger = logging.getLogger(__name__)
+
+
+def render_qr_png(link: str) -> bytes:
+    # Выполняется в пуле потоков/процессов, не в event loop
+    qr = qrcode.make(link)
+    buf = BytesIO()
+    qr.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def qr_key(link: str) -> str:
+    return hashlib.sha256(link.encode()).hexdigest()
+
+
+class QRCache:
+    # Кэш PNG по содержимому ссылки: LRU в памяти + каталог на диске.
+    # После первой отправки запоминается file_id Telegram, и повторно картинка не загружается.
+    def __init__(self, directory: str | None = None, maxsize: int = 256, executor: Executor | None = None):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.executor = executor
+        self._png: OrderedDict[str, bytes] = OrderedDict()
+        self._file_ids: dict[str, str] = {}
+        self._rendering: dict[str, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str | None:
+        return os.path.join(self.directory, f"{key}{suffix}") if self.directory else None
+
+    def _remember_png(self, key: str, png: bytes):
+        self._png[key] = png
+        self._png.move_to_end(key)
+        while len(self._png) > self.maxsize:
+            self._png.popitem(last=False)
+
+    async def get_png(self, link: str) -> bytes:
+        key = qr_key(link)
+        png = self._png.get(key)
+        if png is not None:
+            self._png.move_to_end(key)
+            return png
+        future = self._rendering.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # Отменили задачу, которая рендерила картинку, а не нас: рендерим сами
+            return await self.get_png(link)
+
+        future = asyncio.get_running_loop().create_future()
+        self._rendering[key] = future
+        try:
+            png = await self._load_or_render(key, link)
+        except asyncio.CancelledError:
+            # Ожидающие не должны зависнуть на future отменённой задачи
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            self._remember_png(key, png)
+            future.set_result(png)
+            return png
+        finally:
+            self._rendering.pop(key, None)
+
+    async def _load_or_render(self, key: str, link: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        path = self._path(key, ".png")
+        if path and os.path.exists(path):
+            return await loop.run_in_executor(None, _read_bytes, path)
+        png = await loop.run_in_executor(self.executor, render_qr_png, link)
+        if path:
+            await loop.run_in_executor(None, _write_bytes, path, png)
+        return png
+
+    def get_file_id(self, link: str) -> str | None:
+        key = qr_key(link)
+        file_id = self._file_ids.get(key)
+        if file_id is None:
+            path = self._path(key, ".file_id")
+            if path and os.path.exists(path):
+                file_id = _read_bytes(path).decode()
+                self._file_ids[key] = file_id
+        return file_id
+
+    def remember_file_id(self, link: str, file_id: str):
+        key = qr_key(link)
+        self._file_ids[key] = file_id
+        path = self._path(key, ".file_id")
+        if path:
+            _write_bytes(path, file_id.encode())
+
+    async def photo(self, link: str):
+        # Возвращает file_id, если картинка уже загружалась в Telegram, иначе PNG для загрузки
+        file_id = self.get_file_id(link)
+        if file_id:
+            return file_id
+        return BufferedInputFile(await self.get_png(link), filename="qr.png")
+
+    def remember_sent(self, link: str, sent_message):
+        if sent_message is not None and sent_message.photo:
+            self.remember_file_id(link, sent_message.photo[-1].file_id)
+
+    async def prerender(self, links: list[str]) -> int:
+        # Пакетная предварительная генерация, например для всех комнат адреса
+        results = await asyncio.gather(*(self.get_png(link) for link in links), return_exceptions=True)
+        for link, result in zip(links, results):
+            if isinstance(result, Exception):
+                logger.warning("QR prerender failed for %s: %s", link, result)
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    def prerender_in_background(self, links: list[str]):
+        task = asyncio.create_task(self.prerender(links))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+def make_executor(kind: str, workers: int) -> Executor:
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qr-render")
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path: str, data: bytes):
+    # Запись через временный файл, чтобы параллельные процессы не прочитали неполный PNG
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import case, delete, literal, select, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresStorage(BaseStorage):
+    # FSM-хранилище в таблице bot_fsm_states; брошенные сценарии истекают по expires_at
+    def __init__(self, engine, ttl: int | None = None, key_builder: KeyBuilder | None = None,
+                 owns_engine: bool = False):
+        from src.app.modules.messages.infrastructure.db.models import BotFsmState
+
+        self.table = BotFsmState.__table__
+        self.engine = engine
+        self.ttl = ttl
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.owns_engine = owns_engine
+
+    def _expires_at(self):
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl) if self.ttl else None
+
+    def _alive(self):
+        return or_(self.table.c.expires_at.is_(None), self.table.c.expires_at > func.now())
+
+    async def _upsert(self, key: str, **values):
+        values.update(updated_at=func.now(), expires_at=self._expires_at())
+        stmt = pg_insert(self.table).values(key=key, **values)
+        # Состояние и данные живут одной записью: продление истёкшей записи не должно возвращать
+        # вторую половину, которая уже истекла
+        expired = self.table.c.expires_at <= func.now()
+        updates = dict(values)
+        if "state" not in updates:
+            updates["state"] = case((expired, None), else_=self.table.c.state)
+        if "data" not in updates:
+            updates["data"] = case((expired, literal({}, self.table.c.data.type)), else_=self.table.c.data)
+        stmt = stmt.on_conflict_do_update(index_elements=[self.table.c.key], set_=updates)
+        async with self.engine.begin() as conn:
+            await conn.execute(stmt)
+            # Пустая запись (нет ни состояния, ни данных) не нужна
+            await conn.execute(
+                delete(self.table).where(
+                    self.table.c.key == key, self.table.c.state.is_(None), self.table.c.data == {}
+                )
+            )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._upsert(self.key_builder.build(key), state=value)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        async with self.engine.connect() as conn:
+            return (await conn.execute(
+                select(self.table.c.state).where(self.table.c.key == self.key_builder.build(key), self._alive())
+            )).scalar()
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._upsert(self.key_builder.build(key), data=dict(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        async with self.engine.connect() as conn:
+            data = (await conn.execute(
+                select(self.table.c.data).where(self.table.c.key == self.key_builder.build(key), self._alive())
+            )).scalar()
+        return dict(data) if data else {}
+
+    async def cleanup(self) -> int:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(delete(self.table).where(self.table.c.expires_at <= func.now()))
+        return result.rowcount
+
+    async def run_cleanup(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await self.cleanup()
+                if removed:
+                    logger.info("Removed %s expired FSM states", removed)
+            except Exception:
+                logger.exception("FSM cleanup failed")
+
+    async def close(self) -> None:
+        if self.owns_engine:
+            await self.engine.dispose()
+
+
+def create_storage(kind: str, ttl: int | None = None, redis_url: str | None = None) -> BaseStorage:
+    # memory — для локальной разработки; redis и postgres позволяют запускать несколько реплик бота
+    if kind == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage
+
+        # redis-py принимает в SET ex только int или timedelta
+        ttl = int(ttl) if ttl else None
+        return RedisStorage.from_url(redis_url, state_ttl=ttl, data_ttl=ttl)
+    if kind == "postgres":
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from src.app.modules.messages.infrastructure.db.pool import engine_kwargs
+        from src.app.modules.messages.infrastructure.db.session import DB_BACKEND, ASYNC_DATABASE_URL, get_async_engine
+
+        if DB_BACKEND == "async":
+            # В режиме webhook бот живёт в процессе API и использует его пул
+            return PostgresStorage(get_async_engine(), ttl=ttl)
+        engine = create_async_engine(ASYNC_DATABASE_URL, **engine_kwargs(is_async=True))
+        return PostgresStorage(engine, ttl=ttl, owns_engine=True)
+    return MemoryStorage()
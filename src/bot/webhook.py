@@ -0,0 +1,69 @@
+import asyncio
+import hmac
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import FastAPI, HTTPException, Request, Response
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookHandler:
+    # Принимает обновления Telegram и обрабатывает их в фоне, сразу отвечая 200,
+    # чтобы медленный обработчик не задерживал доставку следующих обновлений
+    def __init__(self, dp: Dispatcher, bot: Bot, secret: str, concurrency: int = 100,
+                 path: str = "/bot/webhook", base_url: str | None = None):
+        self.dp = dp
+        self.bot = bot
+        self.secret = secret
+        self.path = path
+        self.base_url = base_url
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def handle(self, request: Request):
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not hmac.compare_digest(token, self.secret):
+            raise HTTPException(status_code=403, detail="Forbidden")
+        update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return Response(status_code=200)
+
+    async def _process(self, update: Update):
+        async with self.semaphore:
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception:
+                logger.exception("Failed to process update %s", update.update_id)
+
+    async def drain(self, timeout: float = 10.0):
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+    async def startup(self):
+        await self.dp.emit_startup(bot=self.bot, dispatcher=self.dp)
+        if self.base_url:
+            # Несколько реплик за балансировщиком регистрируют один и тот же URL — это идемпотентно
+            await self.bot.set_webhook(
+                url=f"{self.base_url.rstrip('/')}{self.path}",
+                secret_token=self.secret,
+                allowed_updates=self.dp.resolve_used_update_types(),
+            )
+
+    async def shutdown(self):
+        await self.drain()
+        await self.dp.emit_shutdown(bot=self.bot, dispatcher=self.dp)
+        await self.bot.session.close()
+
+
+def setup_webhook(app: FastAPI, dp: Dispatcher, bot: Bot, path: str, base_url: str | None,
+                  secret: str | None, concurrency: int = 100):
+    # Запуск и остановка — через startup()/shutdown() обработчика из lifespan приложения
+    if not secret:
+        raise ValueError("Не задан BOT_WEBHOOK_SECRET для режима webhook")
+    handler = WebhookHandler(dp, bot, secret, concurrency, path=path, base_url=base_url)
+    app.add_api_route(path, handler.handle, methods=["POST"], include_in_schema=False)
+    return handler
@@ -1,19 +1,62 @@
-import requests
-from dotenv import load_dotenv
-import os
+import asyncio
+import time
+from typing import TYPE_CHECKING
 
-load_dotenv()
+from src.app.settings import settings
+from src.app.metrics import TELEGRAM_SEND_DURATION
 
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+if TYPE_CHECKING:
+    import aiohttp
+
+TELEGRAM_API_URL = f"{settings.telegram_api_base}/bot{settings.bot_token}/sendMessage"
+
+
+class TelegramError(Exception):
+    def __init__(self, message: str, retry_after: float | None = None, permanent: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+async def send_telegram_message(session: "aiohttp.ClientSession", chat_id: int, message: str):
+    start = time.perf_counter()
+    result = "error"
+    try:
+        await _send_telegram_message(session, chat_id, message)
+        result = "ok"
+    except TelegramError as e:
+        if e.retry_after:
+            result = "rate_limited"
+        raise
+    finally:
+        TELEGRAM_SEND_DURATION.labels(result).observe(time.perf_counter() - start)
+
+
+async def _send_telegram_message(session: "aiohttp.ClientSession", chat_id: int, message: str):
+    # aiohttp импортируется при первой отправке: репозитории берут отсюда chunked и не должны его тянуть
+    import aiohttp
 
-def send_telegram_message(chat_id: int, message: str):
     data = {
         "chat_id": chat_id,
         "text": message
     }
     try:
-        response = requests.post(TELEGRAM_API_URL, data=data)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        print("Telegram error:", e)
+        async with session.post(TELEGRAM_API_URL, data=data) as response:
+            if response.status == 200:
+                return
+            try:
+                payload = await response.json(content_type=None)
+            except ValueError:
+                payload = {}
+            description = payload.get("description") or f"HTTP {response.status}"
+            retry_after = (payload.get("parameters") or {}).get("retry_after")
+            # 400/403 — чат не найден или бот удалён из группы, повторять бессмысленно
+            permanent = response.status in (400, 403)
+            raise TelegramError(description, retry_after=retry_after, permanent=permanent)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise TelegramError(str(e)) from e
+
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
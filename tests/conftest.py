@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import psycopg2
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Тесты идут против настоящего Postgres: TEST_DATABASE_URL — сервер, на котором можно создать временную базу
+# (например, postgresql://postgres@localhost/postgres). Без него тесты пропускаются
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Таблицы, которые существовали до Alembic: первая миграция f0c1b43a72ff их только изменяет
+INITIAL_SCHEMA = """
+    CREATE TABLE admins (
+        id serial PRIMARY KEY,
+        username text NOT NULL UNIQUE,
+        hashed_password text NOT NULL
+    );
+    CREATE TABLE locations (
+        id serial PRIMARY KEY,
+        address text NOT NULL
+    );
+    CREATE TABLE rooms (
+        id serial PRIMARY KEY,
+        location_id integer REFERENCES locations (id) ON DELETE CASCADE,
+        name text NOT NULL,
+        tg_group_id bigint NOT NULL,
+        qr_token text NOT NULL UNIQUE
+    );
+    CREATE TABLE messages (
+        id serial PRIMARY KEY,
+        room_id integer REFERENCES rooms (id) ON DELETE CASCADE,
+        text text NOT NULL,
+        timestamp timestamptz DEFAULT now()
+    );
+"""
+
+_test_database = {}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _with_database(url: str, name: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, f"/{name}", parts.query, parts.fragment))
+
+
+def _execute(url: str, sql: str):
+    # libpq не понимает имя драйвера SQLAlchemy в схеме (postgresql+psycopg2://)
+    parts = urlsplit(url)
+    conn = psycopg2.connect(urlunsplit(("postgresql",) + tuple(parts)[1:]))
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+    finally:
+        conn.close()
+
+
+def pytest_configure(config):
+    # Окружение задаётся до первого импорта src: настройки читаются один раз на процесс
+    if not TEST_DATABASE_URL:
+        return
+    name = f"feedback_test_{uuid.uuid4().hex[:8]}"
+    _execute(TEST_DATABASE_URL, f'CREATE DATABASE "{name}"')
+    _test_database["name"] = name
+    _execute(_with_database(TEST_DATABASE_URL, name), INITIAL_SCHEMA)
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.update(
+        DATABASE_URL=_with_database(TEST_DATABASE_URL, name),
+        DB_BACKEND="sync",
+        CACHE_BACKEND="memory",
+        RATE_LIMIT_BACKEND="memory",
+        STREAM_BACKEND="memory",
+        FEEDBACK_WRITE_BEHIND="0",
+        FEEDBACK_RATE_LIMIT_ENABLED="0",
+        OUTBOX_DISPATCHER_ENABLED="0",
+        BOT_MODE="polling",
+        TELEGRAM_API_BASE=f"http://127.0.0.1:{_free_port()}",
+    )
+
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(ROOT, "alembic.ini")), "head")
+
+
+def pytest_unconfigure(config):
+    name = _test_database.pop("name", None)
+    if name is None:
+        return
+    from src.app.modules.messages.infrastructure.db.session import dispose_engines
+
+    asyncio.run(dispose_engines())
+    _execute(TEST_DATABASE_URL, f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+
+
+@pytest.fixture(scope="session")
+def database():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL не задан")
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from src.app.modules.messages.infrastructure.cache import get_cache
+
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
+@pytest.fixture
+def db(database):
+    from src.app.modules.messages.infrastructure.db.session import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def room(db):
+    from src.app.modules.messages.infrastructure.db.repos import LocationRepo, RoomRepo
+
+    suffix = uuid.uuid4().hex[:12]
+    location = LocationRepo(db).create(f"ул. Тестовая, {suffix}")
+    # Свой чат у каждой комнаты, чтобы уведомления разных тестов не смешивались
+    tg_group_id = -(10 ** 12 + int(suffix[:8], 16))
+    room = RoomRepo(db).create(location_id=location.id, name="Переговорная", tg_group_id=tg_group_id, token=suffix)
+    return SimpleNamespace(id=room.id, token=room.qr_token, name=room.name, tg_group_id=room.tg_group_id,
+                           location_id=location.id, address=location.address)
+
+
+class FakeTelegram:
+    # Локальный HTTP-сервер вместо api.telegram.org; ответы по умолчанию — успех,
+    # responses позволяет заранее поставить в очередь ошибки (например, 429)
+    def __init__(self, port: int):
+        self.calls: list[dict] = []
+        self.responses: list[tuple[int, dict]] = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                with fake._lock:
+                    fake.calls.append(dict(parse_qsl(body)))
+                    status, payload = fake.responses.pop(0) if fake.responses else (200, {"ok": True, "result": {}})
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def messages_to(self, chat_id: int) -> list[str]:
+        return [call["text"] for call in self.calls if int(call["chat_id"]) == chat_id]
+
+
+@pytest.fixture
+def telegram(database):
+    fake = FakeTelegram(urlsplit(os.environ["TELEGRAM_API_BASE"]).port)
+    fake._thread.start()
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
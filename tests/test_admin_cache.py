@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from src.bot.admin_cache import AdminAuthCache
+
+
+class SlowBackend:
+    # Проверка администратора занимает заметное время, чтобы запросы успели наложиться
+    def __init__(self, admins=(), error: Exception | None = None):
+        self.admins = set(admins)
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, user_id):
+        self.calls.append(user_id)
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return user_id in self.admins
+
+
+def test_concurrent_checks_share_one_request():
+    backend = SlowBackend(admins={1})
+    cache = AdminAuthCache(backend)
+
+    async def run():
+        return await asyncio.gather(*(cache.is_admin(1) for _ in range(5)))
+
+    assert asyncio.run(run()) == [True] * 5
+    assert backend.calls == [1]
+
+
+def test_result_is_cached_until_invalidated():
+    backend = SlowBackend(admins={1})
+    cache = AdminAuthCache(backend)
+
+    async def run():
+        await cache.is_admin(1)
+        await cache.is_admin(1)
+        cache.invalidate(1)
+        await cache.is_admin(1)
+
+    asyncio.run(run())
+    assert backend.calls == [1, 1]
+
+
+def test_backend_errors_are_not_cached():
+    backend = SlowBackend(error=RuntimeError("backend down"))
+    cache = AdminAuthCache(backend)
+
+    async def run():
+        results = await asyncio.gather(*(cache.is_admin(1) for _ in range(3)), return_exceptions=True)
+        backend.error = None
+        return results, await cache.is_admin(1)
+
+    results, retried = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried is False
+    assert backend.calls == [1, 1]
+
+
+def test_least_recently_used_entry_is_evicted():
+    backend = SlowBackend(admins={1, 2, 3})
+    cache = AdminAuthCache(backend, maxsize=2)
+
+    async def run():
+        for user_id in (1, 2, 1, 3, 1, 2):
+            await cache.is_admin(user_id)
+
+    asyncio.run(run())
+    # 2 вытеснен при добавлении 3, потому что 1 использовался позже
+    assert backend.calls == [1, 2, 3, 2]
+
+
+def test_waiter_survives_cancelled_fetcher():
+    backend = SlowBackend(admins={1})
+    cache = AdminAuthCache(backend)
+
+    async def run():
+        fetcher = asyncio.create_task(cache.is_admin(1))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.is_admin(1))
+        await asyncio.sleep(0)
+        fetcher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await fetcher
+        return await waiter
+
+    # Ожидающий не получает чужую отмену, а проверяет сам
+    assert asyncio.run(run()) is True
+    assert backend.calls == [1, 1]
@@ -0,0 +1,127 @@
+import asyncio
+
+from src.app.modules.messages.infrastructure.db.repos import (
+    AsyncAdminRepo,
+    AsyncLocationRepo,
+    AsyncMessageRepo,
+    AsyncRoomRepo,
+    PendingMessage,
+    RoomSnapshot,
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return FakeResult(row[0] for row in self.rows)
+
+
+class FakeAsyncSession:
+    # Вместо Postgres: отдаёт заранее заданные результаты по порядку и запоминает выполненные запросы
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.added = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return FakeResult(self.results.pop(0) if self.results else [])
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def refresh(self, obj):
+        pass
+
+
+def test_room_snapshot_is_read_once():
+    db = FakeAsyncSession([(7, "Переговорная", "ул. Ленина, 1", -100)])
+    repo = AsyncRoomRepo(db)
+
+    async def run():
+        return [await repo.get_snapshot_by_token("abc") for _ in range(2)]
+
+    assert asyncio.run(run()) == [RoomSnapshot(7, "Переговорная", "ул. Ленина, 1", -100)] * 2
+    assert len(db.statements) == 1
+
+
+def test_missing_room_is_cached_negatively():
+    db = FakeAsyncSession()
+    repo = AsyncRoomRepo(db)
+
+    async def run():
+        return [await repo.get_snapshot_by_token("missing") for _ in range(2)]
+
+    assert asyncio.run(run()) == [None, None]
+    assert len(db.statements) == 1
+
+
+def test_admin_check_is_cached():
+    db = FakeAsyncSession([(1,)])
+    repo = AsyncAdminRepo(db)
+
+    async def run():
+        return [await repo.is_admin("alice"), await repo.is_admin("alice")]
+
+    assert asyncio.run(run()) == [True, True]
+    assert len(db.statements) == 1
+
+
+def test_created_location_invalidates_address_list():
+    db = FakeAsyncSession([("ул. Ленина, 1",)], [("ул. Ленина, 1",), ("ул. Мира, 2",)])
+    repo = AsyncLocationRepo(db)
+
+    async def run():
+        before = await repo.list_addresses()
+        cached = await repo.list_addresses()
+        await repo.create("ул. Мира, 2")
+        return before, cached, await repo.list_addresses()
+
+    before, cached, after = asyncio.run(run())
+    assert before == cached == ["ул. Ленина, 1"]
+    assert after == ["ул. Ленина, 1", "ул. Мира, 2"]
+    assert db.commits == 1
+
+
+def test_upsert_many_inserts_only_missing_addresses():
+    # Первый запрос — уже существующие адреса, второй — INSERT ... RETURNING недостающих
+    db = FakeAsyncSession([("ул. Ленина, 1", 1)], [("ул. Мира, 2", 2)])
+    repo = AsyncLocationRepo(db)
+
+    ids = asyncio.run(repo.upsert_many(["ул. Ленина, 1", "ул. Мира, 2", "ул. Ленина, 1"]))
+
+    assert ids == {"ул. Ленина, 1": 1, "ул. Мира, 2": 2}
+    assert len(db.statements) == 2
+
+
+def test_message_create_commits_message_with_outbox_entry():
+    db = FakeAsyncSession()
+
+    asyncio.run(AsyncMessageRepo(db).create(room_id=7, text="Холодно", notify_chat_id=-100, notify_text="Уведомление"))
+
+    assert db.commits == 1
+    assert sorted(type(obj).__name__ for obj in db.added) == ["Message", "TelegramOutbox"]
+
+
+def test_message_batch_is_one_insert_per_table():
+    db = FakeAsyncSession()
+    items = [PendingMessage(7, f"Отзыв {i}", -100, "Уведомление") for i in range(3)]
+
+    asyncio.run(AsyncMessageRepo(db).create_many(items))
+
+    tables = [statement.table.name for statement in db.statements]
+    assert tables[:2] == ["messages", "telegram_outbox"]
+    assert len(tables) == len(set(tables))
+    assert db.commits == 1
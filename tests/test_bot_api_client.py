@@ -0,0 +1,83 @@
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.bot.api_client import BackendClient, BackendError, BackendUnavailable
+
+
+def run_with_backend(statuses: list[int], call):
+    # Бэкенд отвечает статусами по очереди (последний повторяется) и считает запросы
+    hits = []
+
+    async def handler(request):
+        status = statuses[min(len(hits), len(statuses) - 1)]
+        hits.append(request.method)
+        return web.json_response({"authorized": True, "detail": "boom"}, status=status)
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        async with TestServer(app) as server:
+            client = BackendClient(str(server.make_url("")), retries=2, backoff=0)
+            try:
+                return await call(client)
+            finally:
+                await client.close()
+
+    try:
+        return asyncio.run(run()), hits
+    except Exception as e:
+        return e, hits
+
+
+def test_get_is_retried_after_server_error():
+    result, hits = run_with_backend([500, 502, 200], lambda client: client.is_authorized(1))
+
+    assert result is True
+    assert hits == ["GET"] * 3
+
+
+def test_get_gives_up_after_retries():
+    result, hits = run_with_backend([503], lambda client: client.is_authorized(1))
+
+    # Ответ последней попытки доходит до вызывающего кода вместе с detail бэкенда
+    assert isinstance(result, BackendError) and str(result) == "boom"
+    assert len(hits) == 3
+
+
+def test_post_is_not_retried():
+    result, hits = run_with_backend([500, 200], lambda client: client.create_room("ул. Ленина, 1", "Зал", -100))
+
+    assert isinstance(result, BackendError) and not isinstance(result, BackendUnavailable)
+    assert hits == ["POST"]
+
+
+def test_connection_error_is_unavailable():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def run():
+        # Порт свободен — соединение отклоняется
+        client = BackendClient(f"http://127.0.0.1:{port}", retries=1, backoff=0)
+        try:
+            await client.list_admins()
+        finally:
+            await client.close()
+
+    with pytest.raises(BackendUnavailable):
+        asyncio.run(run())
+
+
+def test_session_is_reused():
+    async def run():
+        client = BackendClient("http://127.0.0.1")
+        try:
+            return client.session is client.session
+        finally:
+            await client.close()
+
+    assert asyncio.run(run())
@@ -0,0 +1,29 @@
+import pytest
+
+from src.app.modules.messages.application.services.feedback_service import parse_rooms_csv
+
+
+def test_parse_rooms_csv():
+    items = parse_rooms_csv("address,name,tg_group_id\nул. Ленина 1,Переговорная,-100\n")
+
+    assert [(item.address, item.name, item.tg_group_id) for item in items] == [("ул. Ленина 1", "Переговорная", -100)]
+
+
+@pytest.mark.parametrize("content, error", [
+    ("address,name\nул. Ленина 1,Переговорная\n", "нет колонок: tg_group_id"),
+    ("address,name,tg_group_id\nул. Ленина 1,Переговорная,-100\nул. Ленина, 2,Зал,-200\n", "Строка 3"),
+    ("address,name,tg_group_id\nул. Ленина 1,Переговорная\n", "Строка 2"),
+    ("address,name,tg_group_id\nул. Ленина 1,Переговорная,чат\n", "Строка 2: tg_group_id"),
+])
+def test_malformed_rooms_csv_is_rejected_with_line(content, error):
+    with pytest.raises(ValueError, match=error):
+        parse_rooms_csv(content)
+
+
+def test_malformed_csv_upload_is_bad_request(client):
+    content = "address,name,tg_group_id\nул. Ленина, 2,Зал,-200\n".encode()
+
+    response = client.post("/feedback/admin/rooms/bulk_csv", files={"file": ("rooms.csv", content, "text/csv")})
+
+    assert response.status_code == 400
+    assert "Строка 2" in response.json()["detail"]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+BASE_TIME = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def messages(db, room):
+    # 25 сообщений, по пять с одинаковым timestamp: порядок внутри группы задаёт только id
+    rows = db.execute(
+        text("""
+            INSERT INTO messages (room_id, text, timestamp)
+            SELECT :room_id, 'msg ' || g, :base + (g / 5) * interval '1 minute'
+            FROM generate_series(0, 24) g
+            RETURNING id, timestamp
+        """),
+        {"room_id": room.id, "base": BASE_TIME},
+    ).all()
+    db.commit()
+    return sorted(rows, key=lambda row: (row.timestamp, row.id), reverse=True)
+
+
+def read_all(client, url: str, **params) -> list[dict]:
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_history_once_in_keyset_order(client, room, messages):
+    pages = read_all(client, f"/feedback/admin/rooms/{room.token}/messages", limit=7)
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert [item["id"] for page in pages for item in page] == [row.id for row in messages]
+
+
+def test_exact_multiple_of_limit_ends_without_cursor(client, room, messages):
+    pages = read_all(client, f"/feedback/admin/rooms/{room.token}/messages", limit=25)
+
+    assert [len(page) for page in pages] == [25]
+
+
+def test_new_messages_do_not_shift_later_pages(client, db, room, messages):
+    url = f"/feedback/admin/rooms/{room.token}/messages"
+    first = client.get(url, params={"limit": 10}).json()
+    db.execute(text("INSERT INTO messages (room_id, text) VALUES (:room_id, 'new')"), {"room_id": room.id})
+    db.commit()
+
+    second = client.get(url, params={"limit": 10, "cursor": first["next_cursor"]}).json()
+
+    assert [item["id"] for item in second["items"]] == [row.id for row in messages[10:20]]
+
+
+def test_date_range_filters(client, room, messages):
+    since = BASE_TIME + timedelta(minutes=1)
+    until = BASE_TIME + timedelta(minutes=3)
+
+    pages = read_all(client, f"/feedback/admin/rooms/{room.token}/messages", limit=4,
+                     since=since.isoformat(), until=until.isoformat())
+
+    expected = [row.id for row in messages if since <= row.timestamp < until]
+    assert len(expected) == 10
+    assert [item["id"] for page in pages for item in page] == expected
+
+
+def test_location_history_uses_the_same_contract(client, room, messages):
+    pages = read_all(client, "/feedback/admin/locations/messages", address=room.address, limit=10)
+
+    assert [item["id"] for page in pages for item in page] == [row.id for row in messages]
+
+
+def test_invalid_cursor_is_rejected(client, room, messages):
+    response = client.get(f"/feedback/admin/rooms/{room.token}/messages", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_unknown_room_is_not_found(client, database):
+    response = client.get("/feedback/admin/rooms/missing-token/messages")
+
+    assert response.status_code == 404
@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from src.app.modules.messages.infrastructure.db.session import get_engine
+
+LOCATIONS = 50
+ROOMS_PER_LOCATION = 20
+MESSAGES_PER_ROOM = 20
+
+# Запрос, таблица и индекс, который он должен использовать. messages секционирована по месяцам:
+# в плане фигурируют партиции (messages_2026_10, ...) и их копии индекса (..._room_id_timestamp_idx)
+QUERIES = {
+    "messages_by_room": (
+        "SELECT * FROM messages WHERE room_id = :room_id ORDER BY timestamp DESC LIMIT 50",
+        "messages", "room_id_timestamp",
+    ),
+    "rooms_by_location": (
+        "SELECT * FROM rooms WHERE location_id = :location_id",
+        "rooms", "ix_rooms_location_id",
+    ),
+    "location_by_address": (
+        "SELECT * FROM locations WHERE address = :address",
+        "locations", "locations_address_key",
+    ),
+}
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    # Данные засеваются в транзакции и откатываются после тестов модуля
+    prefix = f"explain-{uuid.uuid4().hex[:8]}"
+    with get_engine().connect() as conn:
+        trans = conn.begin()
+        conn.execute(text("""
+            INSERT INTO locations (address)
+            SELECT :prefix || ' ' || g FROM generate_series(1, :n) g
+        """), {"prefix": prefix, "n": LOCATIONS})
+        conn.execute(text("""
+            INSERT INTO rooms (location_id, name, tg_group_id, qr_token)
+            SELECT l.id, 'room ' || g, -1000000000000, :prefix || '-' || l.id || '-' || g
+            FROM locations l, generate_series(1, :n) g
+            WHERE l.address LIKE :prefix || ' %'
+        """), {"prefix": prefix, "n": ROOMS_PER_LOCATION})
+        conn.execute(text("""
+            INSERT INTO messages (room_id, text, timestamp)
+            SELECT r.id, 'seed', now() - g * interval '1 hour'
+            FROM rooms r, generate_series(1, :n) g
+            WHERE r.qr_token LIKE :prefix || '-%'
+        """), {"prefix": prefix, "n": MESSAGES_PER_ROOM})
+        conn.execute(text("ANALYZE locations, rooms, messages"))
+        location_id, room_id = conn.execute(text("""
+            SELECT l.id, r.id FROM locations l JOIN rooms r ON r.location_id = l.id
+            WHERE l.address = :address LIMIT 1
+        """), {"address": f"{prefix} 1"}).one()
+        # На маленьких таблицах планировщик законно предпочёл бы Seq Scan; с enable_seqscan = off
+        # он выберет его только если подходящего индекса нет
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        yield conn, {"room_id": room_id, "location_id": location_id, "address": f"{prefix} 1"}
+        trans.rollback()
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_hot_lookup_uses_index(seeded, name):
+    conn, params = seeded
+    sql, table, index = QUERIES[name]
+
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar_one()[0]["Plan"]
+
+    scans = [
+        node for node in plan_nodes(plan)
+        if node.get("Relation Name") == table or node.get("Relation Name", "").startswith(f"{table}_")
+    ]
+    assert scans, plan
+    for node in scans:
+        assert node["Node Type"] != "Seq Scan", plan
+        assert any(index in child.get("Index Name", "") for child in plan_nodes(node)), plan
@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+from src.app.metrics import MetricsMiddleware
+
+
+def response_app(content_type: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+def call(app, path: str, scope_type: str = "http"):
+    async def noop(message=None):
+        return {"type": "websocket.disconnect"}
+
+    scope = {"type": scope_type, "method": "GET", "route": SimpleNamespace(path=path)}
+    asyncio.run(MetricsMiddleware(app)(scope, noop, noop))
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_event_stream_is_kept_out_of_request_latency():
+    call(response_app(b"text/event-stream; charset=utf-8"), "/test/stream")
+
+    assert sample("http_stream_duration_seconds_count", route="/test/stream") == 1
+    assert sample("http_request_duration_seconds_count", method="GET", route="/test/stream", status="200") == 0
+
+
+def test_regular_response_is_measured_as_request():
+    call(response_app(b"application/json"), "/test/plain")
+
+    assert sample("http_request_duration_seconds_count", method="GET", route="/test/plain", status="200") == 1
+    assert sample("http_stream_duration_seconds_count", route="/test/plain") == 0
+
+
+def test_websocket_connection_has_its_own_metric():
+    async def app(scope, receive, send):
+        await receive()
+
+    call(app, "/test/ws", scope_type="websocket")
+
+    assert sample("http_stream_duration_seconds_count", route="/test/ws") == 1
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from src.app.modules.messages.infrastructure.db.models import TelegramOutbox
+from src.app.modules.messages.infrastructure.db.repos import OutboxRepo
+from src.app.modules.messages.infrastructure.telegram import OutboxDispatcher
+
+
+def run_dispatcher(**kwargs):
+    async def run():
+        dispatcher = OutboxDispatcher(**kwargs)
+        dispatcher.start()
+        await dispatcher.stop(drain_timeout=5)
+
+    asyncio.run(run())
+
+
+def outbox_entries(db, chat_id: int):
+    db.expire_all()
+    return db.execute(select(TelegramOutbox).where(TelegramOutbox.chat_id == chat_id)).scalars().all()
+
+
+def test_feedback_is_written_to_outbox_without_calling_telegram(client, room, telegram, db):
+    response = client.post(f"/feedback/{room.token}", json={"text": "Не работает проектор"})
+
+    assert response.status_code == 200
+    assert telegram.calls == []
+    [entry] = outbox_entries(db, room.tg_group_id)
+    assert entry.status == "pending"
+    assert "Не работает проектор" in entry.text
+
+
+def test_repeated_submission_is_written_once(client, room, db):
+    for _ in range(2):
+        response = client.post(f"/feedback/{room.token}", json={"text": "Не работает проектор"},
+                               headers={"Idempotency-Key": "retry-1"})
+        assert response.status_code == 200
+
+    assert len(outbox_entries(db, room.tg_group_id)) == 1
+
+
+def test_dispatcher_delivers_pending_entries(client, room, telegram, db):
+    client.post(f"/feedback/{room.token}", json={"text": "Холодно в зале"})
+
+    run_dispatcher()
+
+    [text] = telegram.messages_to(room.tg_group_id)
+    assert room.address in text and "Холодно в зале" in text
+    [entry] = outbox_entries(db, room.tg_group_id)
+    assert entry.status == "sent"
+
+
+def test_dispatcher_retries_after_server_error(client, room, telegram, db):
+    client.post(f"/feedback/{room.token}", json={"text": "Шумно"})
+    telegram.responses.append((500, {"ok": False, "description": "Internal Server Error"}))
+
+    run_dispatcher()
+
+    [entry] = outbox_entries(db, room.tg_group_id)
+    assert entry.status == "pending"
+    assert entry.attempts == 1
+    assert entry.last_error == "Internal Server Error"
+
+
+def test_dispatcher_drops_entry_on_permanent_error(client, room, telegram, db):
+    client.post(f"/feedback/{room.token}", json={"text": "Шумно"})
+    telegram.responses.append((403, {"ok": False, "description": "Forbidden: bot was kicked"}))
+
+    run_dispatcher()
+
+    [entry] = outbox_entries(db, room.tg_group_id)
+    assert entry.status == "failed"
+
+
+def test_dispatcher_defers_rate_limited_entry_without_spending_attempt(client, room, telegram, db):
+    client.post(f"/feedback/{room.token}", json={"text": "Шумно"})
+    telegram.responses.append((429, {"ok": False, "description": "Too Many Requests: retry after 30",
+                                     "parameters": {"retry_after": 30}}))
+
+    run_dispatcher()
+
+    [entry] = outbox_entries(db, room.tg_group_id)
+    assert entry.status == "pending"
+    assert entry.attempts == 0
+    assert entry.last_error == "Too Many Requests: retry after 30"
+
+
+def test_prune_removes_only_old_finished_entries(room, db):
+    old = datetime.now(timezone.utc) - timedelta(days=30)
+    for status, created_at in (("sent", old), ("failed", old), ("pending", old), ("sent", None)):
+        entry = TelegramOutbox(chat_id=room.tg_group_id, text=status, status=status)
+        if created_at is not None:
+            entry.created_at = created_at
+        db.add(entry)
+    db.commit()
+
+    deleted = OutboxRepo(db).prune(timedelta(days=7), batch_size=1)
+
+    assert deleted >= 2
+    assert sorted(entry.status for entry in outbox_entries(db, room.tg_group_id)) == ["pending", "sent"]
+
+
+def test_dispatcher_prunes_on_start(room, db):
+    db.add(TelegramOutbox(chat_id=room.tg_group_id, text="old", status="sent",
+                          created_at=datetime.now(timezone.utc) - timedelta(days=30)))
+    db.commit()
+
+    async def run():
+        dispatcher = OutboxDispatcher()
+        dispatcher.start()
+        # Первая итерация цикла чистит outbox сразу после запуска
+        await asyncio.sleep(0.2)
+        await dispatcher.stop()
+
+    asyncio.run(run())
+
+    assert outbox_entries(db, room.tg_group_id) == []
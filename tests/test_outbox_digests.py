@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from src.app.modules.messages.infrastructure.telegram import outbox_dispatcher
+from src.app.modules.messages.infrastructure.telegram.outbox_dispatcher import (
+    TELEGRAM_MESSAGE_LIMIT,
+    OutboxDispatcher,
+    build_digests,
+)
+from src.app.modules.messages.infrastructure.telegram.rate_limit import ChatRateLimiter, TokenBucket
+from src.utils import TelegramError
+
+CHAT = -100
+
+
+class RecordingDispatcher(OutboxDispatcher):
+    # Без БД: отложенные и неудачные записи только запоминаются
+    def __init__(self, per_minute: float = 60, burst: float = 2):
+        super().__init__(session_factory=None)
+        self.limiter = ChatRateLimiter(per_minute, burst)
+        self.deferred = []
+        self.failed = []
+
+    async def _defer(self, ids, delay, error=None):
+        self.deferred.append((ids, error))
+
+    async def _fail(self, ids, error, attempts, permanent):
+        self.failed.append(ids)
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.messages = []
+        self.errors = []
+
+    async def send(self, session, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.messages.append((chat_id, text))
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    fake = FakeTelegram()
+    monkeypatch.setattr(outbox_dispatcher, "send_telegram_message", fake.send)
+    return fake
+
+
+def items(count: int, text: str = "Отзыв"):
+    return [(entry_id, CHAT, f"{text} {entry_id}", 1) for entry_id in range(1, count + 1)]
+
+
+def test_burst_within_limit_is_sent_as_is(telegram):
+    dispatcher = RecordingDispatcher(burst=5)
+
+    delivered = asyncio.run(dispatcher._deliver_chat(CHAT, items(3)))
+
+    assert delivered == [1, 2, 3]
+    assert [text for _, text in telegram.messages] == ["Отзыв 1", "Отзыв 2", "Отзыв 3"]
+
+
+def test_burst_over_limit_is_coalesced_into_digest(telegram):
+    dispatcher = RecordingDispatcher(burst=2)
+
+    delivered = asyncio.run(dispatcher._deliver_chat(CHAT, items(5)))
+
+    assert delivered == [1, 2, 3, 4, 5]
+    [(chat_id, text)] = telegram.messages
+    assert chat_id == CHAT and "Сводка: 5" in text
+    assert dispatcher.digests_sent == 1
+
+
+def test_exhausted_chat_is_deferred_without_sending(telegram):
+    dispatcher = RecordingDispatcher(burst=1)
+    dispatcher.limiter.bucket(CHAT).try_acquire()
+
+    delivered = asyncio.run(dispatcher._deliver_chat(CHAT, items(2)))
+
+    assert delivered == [] and telegram.messages == []
+    assert dispatcher.deferred == [([1, 2], None)]
+
+
+def test_rate_limited_chat_defers_the_rest(telegram):
+    dispatcher = RecordingDispatcher(burst=5)
+    telegram.errors.append(TelegramError("Too Many Requests", retry_after=30))
+
+    delivered = asyncio.run(dispatcher._deliver_chat(CHAT, items(3)))
+
+    assert delivered == []
+    assert dispatcher.deferred == [([1, 2, 3], "Too Many Requests")]
+    assert dispatcher.limiter.bucket(CHAT).available() == 0
+
+
+def test_digests_respect_message_length():
+    long_items = items(3, text="x" * (TELEGRAM_MESSAGE_LIMIT // 2))
+
+    digests = build_digests(long_items, max_messages=10)
+
+    assert [ids for ids, _, _ in digests] == [[1], [2], [3]]
+    assert all(len(text) <= TELEGRAM_MESSAGE_LIMIT for _, text, _ in digests)
+    # Сверх max_messages ничего не собирается — остаток отложит диспетчер
+    assert [ids for ids, _, _ in build_digests(long_items, max_messages=2)] == [[1], [2]]
+
+
+def test_token_bucket_blocks_after_retry_after():
+    bucket = TokenBucket(rate=1, capacity=2)
+
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.block(30)
+    assert bucket.time_until(1) > 29
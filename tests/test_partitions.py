@@ -0,0 +1,137 @@
+import gzip
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from src.app.modules.messages.infrastructure.db import partitions
+from src.app.modules.messages.infrastructure.db.partitions import (
+    DEFAULT_PARTITION,
+    archive_partition,
+    create_partition,
+    detach_partition,
+    ensure_partitions,
+    expired_partitions,
+    list_partitions,
+    month_partition,
+)
+
+
+@pytest.fixture
+def cleanup(db):
+    # Партиции, созданные тестом, удаляются вместе с данными, в том числе отсоединённые
+    names = []
+    yield names
+    db.rollback()
+    for name in names:
+        db.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+    db.commit()
+
+
+def insert_message(db, room, timestamp: datetime) -> int:
+    message_id = db.execute(
+        text("INSERT INTO messages (room_id, text, timestamp) VALUES (:room_id, 'архивный отзыв', :ts) RETURNING id"),
+        {"room_id": room.id, "ts": timestamp},
+    ).scalar()
+    db.commit()
+    return message_id
+
+
+def stored_in(db, message_id: int) -> str | None:
+    return db.execute(
+        text("SELECT tableoid::regclass::text FROM messages WHERE id = :id"), {"id": message_id}
+    ).scalar()
+
+
+def test_ensure_creates_current_and_future_months(db, cleanup):
+    today = date(2031, 1, 15)
+    cleanup.extend(f"messages_2031_{month:02d}" for month in range(1, 4))
+
+    created = ensure_partitions(db, ahead=2, today=today)
+
+    assert created == ["messages_2031_01", "messages_2031_02", "messages_2031_03"]
+    assert set(created) <= {partition.name for partition in list_partitions(db)}
+    assert ensure_partitions(db, ahead=2, today=today) == []
+
+
+def test_ensure_moves_rows_out_of_default_partition(db, room, cleanup):
+    cleanup.append("messages_2032_03")
+    message_id = insert_message(db, room, datetime(2032, 3, 10, tzinfo=timezone.utc))
+    assert stored_in(db, message_id) == DEFAULT_PARTITION
+
+    assert ensure_partitions(db, ahead=0, today=date(2032, 3, 1)) == ["messages_2032_03"]
+
+    assert stored_in(db, message_id) == "messages_2032_03"
+    assert db.execute(text(
+        "SELECT search_vector IS NOT NULL FROM messages WHERE id = :id"
+    ), {"id": message_id}).scalar()
+    assert DEFAULT_PARTITION in db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'messages'::regclass"
+    )).scalars().all()
+
+
+def test_expired_partitions_follow_retention(db, cleanup):
+    cleanup.extend(["messages_2020_01", "messages_2020_02"])
+    for month in (date(2020, 1, 1), date(2020, 2, 1)):
+        create_partition(db, month_partition(month))
+    db.commit()
+
+    expired = {partition.name for partition in expired_partitions(db, retention_months=16, today=date(2021, 6, 20))}
+
+    assert "messages_2020_01" in expired
+    assert "messages_2020_02" not in expired
+    assert expired_partitions(db, retention_months=0, today=date(2021, 6, 20)) == []
+
+
+def test_detach_keeps_table_outside_messages(db, room, cleanup):
+    cleanup.append("messages_2019_05")
+    partition = month_partition(date(2019, 5, 1))
+    create_partition(db, partition)
+    db.commit()
+    message_id = insert_message(db, room, datetime(2019, 5, 3, tzinfo=timezone.utc))
+
+    detach_partition(db, partition)
+
+    assert partition not in list_partitions(db)
+    assert stored_in(db, message_id) is None
+    assert db.execute(text('SELECT count(*) FROM "messages_2019_05"')).scalar() == 1
+
+
+def test_archive_writes_file_and_drops_partition(db, room, cleanup, tmp_path):
+    cleanup.append("messages_2019_07")
+    partition = month_partition(date(2019, 7, 1))
+    create_partition(db, partition)
+    db.commit()
+    message_id = insert_message(db, room, datetime(2019, 7, 4, tzinfo=timezone.utc))
+
+    path = archive_partition(db, partition, str(tmp_path))
+
+    with gzip.open(path, "rt") as archive:
+        header, row = archive.read().splitlines()
+    assert header == "id,room_id,text,timestamp"
+    assert row.startswith(f"{message_id},{room.id},архивный отзыв,2019-07-04")
+    assert partition not in list_partitions(db)
+    assert db.execute(text("SELECT to_regclass('messages_2019_07')")).scalar() is None
+
+
+def test_failed_archive_keeps_partition_attached(db, room, cleanup, tmp_path, monkeypatch):
+    cleanup.append("messages_2019_09")
+    partition = month_partition(date(2019, 9, 1))
+    create_partition(db, partition)
+    db.commit()
+    message_id = insert_message(db, room, datetime(2019, 9, 4, tzinfo=timezone.utc))
+
+    def failing_open(path, mode):
+        archive = gzip.open(path, mode)
+        archive.write = lambda data: (_ for _ in ()).throw(OSError("No space left on device"))
+        return archive
+
+    monkeypatch.setattr(partitions, "gzip", SimpleNamespace(open=failing_open))
+    with pytest.raises(Exception):
+        archive_partition(db, partition, str(tmp_path))
+
+    assert partition in list_partitions(db)
+    assert stored_in(db, message_id) == "messages_2019_09"
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,25 @@
+import sqlite3
+
+from src.app.modules.messages.infrastructure.db import pool as pool_module
+from src.app.modules.messages.infrastructure.db.pool import TimedQueuePool, engine_kwargs, pool_stats
+
+
+def test_each_pool_counts_its_own_checkouts():
+    first = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1)
+    second = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1)
+
+    first.connect().close()
+
+    assert pool_stats(first)["checkouts_total"] == 1
+    assert pool_stats(second)["checkouts_total"] == 0
+
+
+def test_pgbouncer_uses_unique_statement_names(monkeypatch):
+    monkeypatch.setattr(pool_module, "DB_PGBOUNCER", True)
+
+    connect_args = engine_kwargs(is_async=True)["connect_args"]
+    name = connect_args["prepared_statement_name_func"]
+
+    assert connect_args["statement_cache_size"] == 0
+    assert name() != name()
+    assert name().startswith("__asyncpg_")
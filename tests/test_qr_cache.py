@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import BufferedInputFile
+
+from src.bot import qr
+from src.bot.qr import QRCache
+
+LINK = "https://example.com/room/abc"
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    # Вместо qrcode: считает вызовы, рендер занимает заметное время
+    calls = []
+    lock = threading.Lock()
+
+    def render(link):
+        with lock:
+            calls.append(link)
+        time.sleep(0.02)
+        return f"png:{link}".encode()
+
+    monkeypatch.setattr(qr, "render_qr_png", render)
+    return calls
+
+
+def test_concurrent_requests_render_once(renders):
+    cache = QRCache()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_png(LINK) for _ in range(5)))
+
+    assert asyncio.run(run()) == [f"png:{LINK}".encode()] * 5
+    assert renders == [LINK]
+
+
+def test_rendered_png_is_reused_from_disk(renders, tmp_path):
+    asyncio.run(QRCache(directory=str(tmp_path)).get_png(LINK))
+
+    png = asyncio.run(QRCache(directory=str(tmp_path)).get_png(LINK))
+
+    assert png == f"png:{LINK}".encode()
+    assert renders == [LINK]
+
+
+def test_sent_photo_file_id_is_reused(renders, tmp_path):
+    cache = QRCache(directory=str(tmp_path))
+    first = asyncio.run(cache.photo(LINK))
+    sent = SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="large")])
+
+    cache.remember_sent(LINK, sent)
+
+    assert isinstance(first, BufferedInputFile)
+    assert asyncio.run(cache.photo(LINK)) == "large"
+    # file_id переживает перезапуск бота
+    assert asyncio.run(QRCache(directory=str(tmp_path)).photo(LINK)) == "large"
+    assert renders == [LINK]
+
+
+def test_waiter_renders_after_renderer_is_cancelled(renders):
+    cache = QRCache()
+
+    async def run():
+        renderer = asyncio.create_task(cache.get_png(LINK))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_png(LINK))
+        await asyncio.sleep(0)
+        renderer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await renderer
+        return await asyncio.wait_for(waiter, timeout=2)
+
+    assert asyncio.run(run()) == f"png:{LINK}".encode()
+    assert len(renders) == 2
+
+
+def test_memory_cache_is_bounded(renders):
+    cache = QRCache(maxsize=2)
+    links = [f"{LINK}/{i}" for i in range(3)]
+
+    async def run():
+        for link in links + links[:1]:
+            await cache.get_png(link)
+
+    asyncio.run(run())
+    assert renders == links + links[:1]
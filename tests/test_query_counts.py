@@ -0,0 +1,38 @@
+import pytest
+
+from src.app.modules.messages.infrastructure.db.query_counter import count_queries
+from src.app.modules.messages.infrastructure.db.session import get_engine
+
+# Сколько SQL-запросов отправляет горячий эндпоинт при пустом кэше (движок берётся после старта
+# приложения: lifespan пересоздаёт его между тестами). Если число выросло — в обработчик
+# вернулся lazy load или лишний запрос; если уменьшилось намеренно — обновите ожидание здесь
+ENDPOINTS = {
+    # комната одним SELECT, затем сообщение, outbox и счётчики статистики за час и за день
+    "send_feedback": (5, lambda room: ("post", f"/feedback/{room.token}", {"json": {"text": "Сломан стул"}})),
+    "room_info": (1, lambda room: ("get", f"/feedback/room/{room.token}", {})),
+    "rooms_by_location": (1, lambda room: ("get", "/feedback/admin/rooms/by_location", {"params": {"address": room.address}})),
+    "is_authorized": (1, lambda room: ("get", "/feedback/admin/is_authorized/1", {})),
+    "locations": (1, lambda room: ("get", "/feedback/admin/locations", {})),
+}
+
+
+@pytest.mark.parametrize("name", ENDPOINTS)
+def test_endpoint_query_count(client, room, name):
+    expected, request = ENDPOINTS[name]
+    method, url, kwargs = request(room)
+
+    with count_queries(get_engine()) as counter:
+        response = getattr(client, method)(url, **kwargs)
+
+    assert response.status_code == 200, response.text
+    assert counter.count == expected, "\n".join(counter.statements)
+
+
+def test_cached_room_lookup_does_not_query(client, room):
+    client.get(f"/feedback/room/{room.token}")
+
+    with count_queries(get_engine()) as counter:
+        response = client.get(f"/feedback/room/{room.token}")
+
+    assert response.status_code == 200
+    assert counter.count == 0
@@ -0,0 +1,47 @@
+import fakeredis
+import pytest
+
+from src.app.modules.messages.api import rate_limit
+from src.app.modules.messages.infrastructure.rate_limit import MemoryRateLimiter, set_rate_limiter
+from src.app.modules.messages.infrastructure.rate_limit.redis_backend import RedisRateLimiter
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(rate_limit, "FEEDBACK_RATE_LIMIT_ENABLED", True)
+    set_rate_limiter(MemoryRateLimiter())
+    yield
+    set_rate_limiter(None)
+
+
+def send(client, room, text: str) -> int:
+    return client.post(f"/feedback/{room.token}", json={"text": text}).status_code
+
+
+def test_location_override_applies_on_cold_cache(client, room, limited, monkeypatch):
+    monkeypatch.setattr(rate_limit, "FEEDBACK_LOCATION_LIMITS", {room.address: {"token": 1}})
+
+    # Снапшот комнаты ещё не в кэше — адрес для переопределения берётся из БД
+    assert send(client, room, "Первое") == 200
+    assert send(client, room, "Второе") == 429
+
+
+def test_default_limit_without_override(client, room, limited, monkeypatch):
+    monkeypatch.setattr(rate_limit, "FEEDBACK_LOCATION_LIMITS", {"ул. Другая, 1": {"token": 1}})
+
+    assert [send(client, room, text) for text in ("Первое", "Второе")] == [200, 200]
+
+
+def test_redis_limiter_counts_window():
+    limiter = RedisRateLimiter(client=fakeredis.FakeRedis())
+
+    assert [limiter.hit("token:a", 2, 60) > 0 for _ in range(3)] == [False, False, True]
+
+
+def test_unavailable_redis_limiter_fails_open():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    limiter = RedisRateLimiter(client=fakeredis.FakeRedis(server=server))
+
+    assert limiter.hit("token:a", 0, 60) == 0.0
+    assert limiter.errors == 1
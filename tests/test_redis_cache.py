@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+import redis
+
+from src.app.modules.messages.infrastructure.cache import MISSING
+from src.app.modules.messages.infrastructure.cache.redis_backend import RedisCacheBackend
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def backend(server, **kwargs):
+    return RedisCacheBackend(client=fakeredis.FakeRedis(server=server),
+                             async_client=fakeredis.FakeAsyncRedis(server=server), **kwargs)
+
+
+def wait_for(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_get_set_add(server):
+    cache = backend(server)
+    try:
+        assert cache.get("room:1") is MISSING
+        cache.set("room:1", {"id": 1}, 60)
+        cache.clear()
+        assert cache.get("room:1") == {"id": 1}
+
+        assert cache.add("dedup:1", 1, 60) is True
+        assert cache.add("dedup:1", 1, 60) is False
+    finally:
+        cache.close()
+
+
+def test_async_get_set_add(server):
+    cache = backend(server)
+
+    async def run():
+        await cache.set_async("room:2", {"id": 2}, 60)
+        cache.clear()
+        value = await cache.get_async("room:2")
+        added = [await cache.add_async("dedup:2", 1, 60) for _ in range(2)]
+        await cache.invalidate_async("room:2")
+        cache.clear()
+        return value, added, await cache.get_async("room:2")
+
+    try:
+        assert asyncio.run(run()) == ({"id": 2}, [True, False], MISSING)
+    finally:
+        cache.close()
+
+
+def test_unavailable_redis_fails_open(server):
+    cache = backend(server)
+    server.connected = False
+    try:
+        assert cache.get("room:3") is MISSING
+        cache.set("room:3", {"id": 3}, 60)
+        # Локальная копия переживает недоступность Redis
+        assert cache.get("room:3") == {"id": 3}
+        # Без Redis дедупликация не должна отклонять запросы
+        assert cache.add("dedup:3", 1, 60) is True
+        assert cache.errors == 3
+    finally:
+        cache.close()
+
+
+def test_invalidation_reaches_other_instance(server):
+    writer, reader = backend(server), backend(server, local_ttl=60)
+    try:
+        # Слушатель подписывается в фоне — ждём подписки, иначе публикация уйдёт в пустоту
+        assert wait_for(lambda: server_subscribers(writer) == 2)
+        writer.set("room:4", {"id": 4}, 60)
+        assert reader.get("room:4") == {"id": 4}
+
+        writer.invalidate("room:4")
+
+        assert wait_for(lambda: "room:4" not in reader.local._data)
+        assert reader.get("room:4") is MISSING
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_close_stops_listener(server):
+    cache = backend(server)
+    assert wait_for(lambda: server_subscribers(cache) == 1)
+
+    cache.close()
+
+    assert not cache._listener.is_alive()
+
+
+def server_subscribers(cache: RedisCacheBackend) -> int:
+    try:
+        return dict(cache.client.pubsub_numsub(cache.channel)).get(cache.channel.encode(), 0)
+    except redis.RedisError:
+        return 0
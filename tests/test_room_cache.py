@@ -0,0 +1,94 @@
+import time
+
+from src.app.modules.messages.infrastructure.cache import MemoryCacheBackend, TTLCache, MISSING
+from src.app.modules.messages.infrastructure.db.repos import RoomRepo, RoomSnapshot
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return iter(row[0] for row in self.rows)
+
+
+class FakeSession:
+    # Вместо Postgres: отдаёт заранее заданные результаты по порядку и считает запросы
+    def __init__(self, *results):
+        self.results = list(results)
+        self.queries = 0
+
+    def execute(self, statement, params=None):
+        self.queries += 1
+        return FakeResult(self.results.pop(0) if self.results else [])
+
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        pass
+
+    def refresh(self, obj):
+        pass
+
+    def rollback(self):
+        pass
+
+
+ROW = (7, "Переговорная", "ул. Ленина, 1", -100)
+
+
+def test_snapshot_is_served_from_cache():
+    db = FakeSession([ROW])
+    repo = RoomRepo(db)
+
+    assert repo.get_snapshot_by_token("abc") == RoomSnapshot(*ROW)
+    assert repo.get_snapshot_by_token("abc") == RoomSnapshot(*ROW)
+    assert db.queries == 1
+
+
+def test_created_room_replaces_cached_miss():
+    # Токен запросили до создания комнаты — отрицательный ответ закэширован и должен сброситься
+    db = FakeSession([], [ROW])
+    repo = RoomRepo(db)
+
+    assert repo.get_snapshot_by_token("abc") is None
+    repo.create(location_id=1, name="Переговорная", tg_group_id=-100, token="abc")
+
+    assert repo.get_snapshot_by_token("abc") == RoomSnapshot(*ROW)
+    assert db.queries == 2
+
+
+def test_bulk_created_rooms_replace_cached_misses():
+    db = FakeSession([], [("abc",)], [ROW])
+    repo = RoomRepo(db)
+
+    assert repo.get_snapshot_by_token("abc") is None
+    repo.create_many([{"location_id": 1, "name": "Переговорная", "tg_group_id": -100}], lambda: "abc")
+
+    assert repo.get_snapshot_by_token("abc") == RoomSnapshot(*ROW)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_ttl_cache_expires_entries():
+    cache = MemoryCacheBackend(maxsize=10, default_ttl=60)
+    cache.set("room:abc", [1], 0.001)
+    cache.set("room:def", None, 60)
+
+    time.sleep(0.01)
+
+    assert cache.get("room:abc") is MISSING
+    assert cache.get("room:def") is None
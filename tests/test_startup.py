@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Порт 1 никто не слушает: любая попытка соединиться с БД провалила бы запрос
+UNREACHABLE_DATABASE_URL = "postgresql://feedback@127.0.0.1:1/feedback"
+
+
+def run_fresh(script: str, **env):
+    # Настройки читаются один раз на процесс, поэтому каждый сценарий — в отдельном интерпретаторе
+    environ = {key: value for key, value in os.environ.items() if key != "ASYNC_DATABASE_URL"}
+    environ.update({"DATABASE_URL": UNREACHABLE_DATABASE_URL, "CACHE_BACKEND": "memory", "RATE_LIMIT_BACKEND": "memory",
+                    "STREAM_BACKEND": "memory", "BOT_MODE": "polling", "OUTBOX_DISPATCHER_ENABLED": "0", **env})
+    result = subprocess.run([sys.executable, "-c", textwrap.dedent(script)], cwd=ROOT, env=environ,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize("backend", ["sync", "async"])
+def test_app_starts_without_touching_the_database(backend):
+    run_fresh("""
+        import sys
+
+        from fastapi.testclient import TestClient
+
+        import main
+        from src.app.modules.messages.infrastructure.db import session
+
+        assert session._engine is None and session._async_engine is None
+        with TestClient(main.app) as client:
+            assert client.get("/metrics").status_code == 200
+        assert session._engine is None and session._async_engine is None
+        # asyncpg подгружается только при создании async-движка
+        assert "asyncpg" not in sys.modules
+    """, DB_BACKEND=backend)
+
+
+def test_engine_is_created_once_and_recreated_after_dispose():
+    run_fresh("""
+        import asyncio
+
+        from src.app.modules.messages.infrastructure.db import session
+
+        engine = session.get_engine()
+        assert session.get_engine() is engine
+        assert session.SessionLocal().get_bind() is engine
+        asyncio.run(session.dispose_engines())
+        assert session._engine is None
+        assert session.get_engine() is not engine
+    """)
+
+
+def test_missing_database_url_fails_on_first_use():
+    run_fresh("""
+        from src.app.modules.messages.infrastructure.db import session
+
+        try:
+            session.get_engine()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("get_engine() without DATABASE_URL")
+    """, DATABASE_URL="")
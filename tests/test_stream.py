@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+
+from src.app.modules.messages.api import stream
+from src.app.modules.messages.infrastructure.realtime.broker import FeedbackBroker, TooManySubscribers, feedback_event
+
+
+def event(n: int, address: str = "ул. Ленина, 1", token: str = "abc") -> dict:
+    return feedback_event(token, "Переговорная", address, f"Отзыв {n}")
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def run():
+        broker = FeedbackBroker(backend="memory", buffer_size=2)
+        await broker.start()
+        subscription = broker.subscribe()
+        for n in range(1, 5):
+            broker.publish(event(n))
+        await asyncio.sleep(0)
+        received = [await subscription.get(timeout=0.1) for _ in range(3)]
+        await broker.stop()
+        return received
+
+    dropped, third, fourth = asyncio.run(run())
+    assert dropped == {"type": "dropped", "count": 2}
+    assert (third["text"], fourth["text"]) == ("Отзыв 3", "Отзыв 4")
+
+
+def test_subscription_filters_by_address_and_token():
+    async def run():
+        broker = FeedbackBroker(backend="memory")
+        await broker.start()
+        by_address = broker.subscribe(address="ул. Мира, 2")
+        by_token = broker.subscribe(token="def")
+        broker.publish(event(1))
+        broker.publish(event(2, address="ул. Мира, 2"))
+        broker.publish(event(3, token="def"))
+        await asyncio.sleep(0)
+        received = [await by_address.get(timeout=0.01), await by_address.get(timeout=0.01),
+                    await by_token.get(timeout=0.01), await by_token.get(timeout=0.01)]
+        await broker.stop()
+        return [item and item["text"] for item in received]
+
+    assert asyncio.run(run()) == ["Отзыв 2", None, "Отзыв 3", None]
+
+
+def test_subscribers_are_limited():
+    broker = FeedbackBroker(backend="memory", max_subscribers=1)
+    with broker.subscribe():
+        with pytest.raises(TooManySubscribers):
+            broker.subscribe()
+    # Закрытая подписка освобождает место
+    broker.subscribe().close()
+
+
+def test_sse_sends_keepalive_and_ends_on_stop(monkeypatch):
+    monkeypatch.setattr(stream, "STREAM_KEEPALIVE", 0.01)
+
+    async def run():
+        broker = FeedbackBroker(backend="memory")
+        await broker.start()
+        events = stream._sse_events(broker.subscribe())
+        chunks = [await anext(events), await anext(events)]
+        broker.publish(event(1))
+        chunks.append(await anext(events))
+        await broker.stop()
+        chunks.extend([chunk async for chunk in events])
+        return chunks, broker.subscribers
+
+    chunks, subscribers = asyncio.run(run())
+    assert chunks[:2] == ["retry: 3000\n\n", ": keepalive\n\n"]
+    name, data = chunks[2].strip().split("\n")
+    assert name == "event: feedback" and json.loads(data.removeprefix("data: "))["text"] == "Отзыв 1"
+    # После остановки брокера поток завершается, лишних keepalive нет
+    assert chunks[3:] == []
+    assert subscribers == 0
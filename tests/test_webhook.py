@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import pytest
+from aiogram import Bot
+from fastapi import FastAPI
+
+from src.bot.webhook import setup_webhook
+
+PATH = "/bot/webhook"
+SECRET = "webhook-secret"
+
+
+class FakeDispatcher:
+    # Вместо aiogram Dispatcher: обработка обновления ждёт release, чтобы проверить ответ до её окончания
+    def __init__(self, fail_ids=()):
+        self.release = asyncio.Event()
+        self.processed = []
+        self.fail_ids = set(fail_ids)
+
+    async def feed_update(self, bot, update):
+        await self.release.wait()
+        if update.update_id in self.fail_ids:
+            raise RuntimeError("handler failed")
+        self.processed.append(update.update_id)
+
+
+def post_updates(dp, headers, update_ids=(1,)):
+    app = FastAPI()
+    handler = setup_webhook(app, dp, Bot("42:TEST"), PATH, None, SECRET)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses = [(await client.post(PATH, json={"update_id": update_id}, headers=headers)).status_code
+                        for update_id in update_ids]
+        # Ответы получены, а обработка ещё не закончилась
+        pending = list(dp.processed)
+        dp.release.set()
+        await handler.drain()
+        return statuses, pending
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "wrong"}])
+def test_request_without_valid_secret_is_forbidden(headers):
+    dp = FakeDispatcher()
+
+    statuses, _ = post_updates(dp, headers)
+
+    assert statuses == [403]
+    assert dp.processed == []
+
+
+def test_updates_are_processed_in_background():
+    dp = FakeDispatcher()
+
+    statuses, pending = post_updates(dp, {"X-Telegram-Bot-Api-Secret-Token": SECRET}, update_ids=(1, 2))
+
+    assert statuses == [200, 200]
+    assert pending == []
+    assert sorted(dp.processed) == [1, 2]
+
+
+def test_failed_update_does_not_affect_others():
+    dp = FakeDispatcher(fail_ids={1})
+
+    statuses, _ = post_updates(dp, {"X-Telegram-Bot-Api-Secret-Token": SECRET}, update_ids=(1, 2))
+
+    assert statuses == [200, 200]
+    assert dp.processed == [2]
+
+
+def test_webhook_requires_secret():
+    with pytest.raises(ValueError):
+        setup_webhook(FastAPI(), FakeDispatcher(), Bot("42:TEST"), PATH, None, None)
@@ -0,0 +1,151 @@
+import asyncio
+from functools import partial
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.app.modules.messages.application.services.idempotency import claim_submission, release_submission_async
+from src.app.modules.messages.infrastructure.db import write_buffer
+from src.app.modules.messages.infrastructure.db.repos import PendingMessage
+from src.app.modules.messages.infrastructure.db.write_buffer import BufferFull, FeedbackWriteBuffer
+
+
+class RecordingBuffer(FeedbackWriteBuffer):
+    # Вместо БД запоминает записанные тексты; запись пачки занимает заметное время.
+    # Пачка с текстом "bad" падает целиком, как при нарушении внешнего ключа
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.written = []
+        self.sizes = []
+
+    async def _write(self, items):
+        await asyncio.sleep(0.01)
+        self.sizes.append(len(items))
+        if any(item.text == "bad" for item in items):
+            raise RuntimeError("insert failed")
+        self.written.extend(item.text for item in items)
+
+
+def test_submission_racing_stop_is_written():
+    async def run():
+        # Очередь на одно место: "a" пишется, "b" занимает очередь, "c" начинает ждать места
+        # одновременно с остановкой и не должен оказаться в очереди после _STOP
+        buffer = RecordingBuffer(maxsize=1, flush_rows=1)
+        buffer.start()
+        first = [asyncio.create_task(buffer.submit(PendingMessage(1, name))) for name in ("a", "b")]
+        await asyncio.sleep(0.005)
+        racing = asyncio.create_task(buffer.submit(PendingMessage(1, "c")))
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.wait_for(asyncio.gather(*first, racing, stopping), timeout=2)
+        return buffer.written
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+
+def test_submit_after_stop_began_is_rejected():
+    async def run():
+        buffer = RecordingBuffer()
+        buffer.start()
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0)
+        with pytest.raises(BufferFull):
+            await buffer.submit(PendingMessage(1, "late"))
+        await stopping
+        return buffer.written
+
+    assert asyncio.run(run()) == []
+
+
+def test_rows_are_written_in_batches():
+    async def run():
+        buffer = RecordingBuffer(flush_rows=3, flush_interval=1, wait_commit=False)
+        buffer.start()
+        for name in "abcdefg":
+            await buffer.submit(PendingMessage(1, name))
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.sizes == [3, 3, 1]
+    assert "".join(buffer.written) == "abcdefg"
+
+
+def test_failed_batch_is_retried_row_by_row():
+    async def run():
+        buffer = RecordingBuffer(flush_interval=0.05)
+        buffer.start()
+        results = await asyncio.gather(*(buffer.submit(PendingMessage(1, name)) for name in ("a", "bad", "c")),
+                                       return_exceptions=True)
+        await buffer.stop()
+        return buffer, results
+
+    buffer, results = asyncio.run(run())
+    assert buffer.sizes == [3, 1, 1, 1]
+    assert buffer.written == ["a", "c"]
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_row_dropped_after_response_is_counted_and_not_published():
+    dropped = REGISTRY.get_sample_value("feedback_write_dropped_total") or 0
+    committed = []
+
+    async def run():
+        buffer = RecordingBuffer(flush_interval=1, wait_commit=False)
+        buffer.start()
+        for name in ("a", "bad"):
+            await buffer.submit(PendingMessage(1, name), on_commit=lambda name=name: committed.append(name))
+        # Без ожидания commit в ленту ничего не уходит до записи
+        assert committed == []
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert committed == ["a"]
+    assert REGISTRY.get_sample_value("feedback_write_dropped_total") == dropped + 1
+
+
+def test_full_queue_rejects_submission(monkeypatch):
+    monkeypatch.setattr(write_buffer, "FEEDBACK_BUFFER_TIMEOUT", 0.01)
+
+    async def run():
+        # Пишущий занят первой строкой, вторая занимает единственное место в очереди
+        buffer = RecordingBuffer(maxsize=1, flush_rows=1, wait_commit=False)
+        buffer.start()
+        await buffer.submit(PendingMessage(1, "a"))
+        await asyncio.sleep(0)
+        await buffer.submit(PendingMessage(1, "b"))
+        with pytest.raises(BufferFull):
+            await buffer.submit(PendingMessage(1, "c"))
+        await buffer.stop()
+        return buffer.written
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+
+def test_buffer_full_is_service_unavailable(client, room, monkeypatch):
+    from src.app.modules.messages.application.services import feedback_service
+
+    monkeypatch.setattr(feedback_service, "FEEDBACK_WRITE_BEHIND", True)
+    # Буфер в тестах не запущен — submit отвечает BufferFull, как при переполнении
+    response = client.post(f"/feedback/{room.token}", json={"text": "Сломан стул"}, headers={"Idempotency-Key": "k1"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    # Ключ идемпотентности освобождён — повтор проходит
+    monkeypatch.setattr(feedback_service, "FEEDBACK_WRITE_BEHIND", False)
+    response = client.post(f"/feedback/{room.token}", json={"text": "Сломан стул"}, headers={"Idempotency-Key": "k1"})
+    assert response.status_code == 200
+
+
+def test_dropped_row_releases_idempotency_claim():
+    claimed = claim_submission("buffer-token", "key-1", "bad")
+
+    async def run():
+        buffer = RecordingBuffer(flush_interval=0.01, wait_commit=False)
+        buffer.start()
+        await buffer.submit(PendingMessage(1, "bad"), on_failure=partial(release_submission_async, claimed))
+        await buffer.stop()
+
+    asyncio.run(run())
+    # Клиент получил 200, но отзыв не записан — повтор с тем же ключом должен пройти
+    assert claim_submission("buffer-token", "key-1", "bad") is not None